@@ -0,0 +1,390 @@
+#
+# `arrivals.py`
+# Lazy arrival processes that yield customers as the simulation reaches them
+#
+# Written by Joshua Paul A. Chan
+
+import math
+from bisect import bisect_right
+
+from .customer import Customer
+
+# arrival processes a Scenario can be built with
+WAVE = 'wave'
+CONSTANT = 'constant'
+POISSON = 'poisson'
+NHPP = 'nhpp'
+BATCH = 'batch'
+
+PROCESSES = (WAVE, CONSTANT, POISSON, NHPP, BATCH)
+
+class ArrivalProcess(object):
+    """
+    `ArrivalProcess`
+    An iterator over arrival times. Unlike a generator it keeps its position
+    in plain attributes, so a process can be pickled part way through a run
+    and resumed exactly where it left off.
+    
+    The process stops after n arrivals or at the horizon, whichever comes
+    first, without drawing anything past the last arrival.
+    
+    @attr   : n         : int   : stop after this many arrivals, or None
+    @attr   : horizon   : float : stop before this time, or None
+    @attr   : count     : int   : the number of arrivals so far
+    
+    @method : set_rate  : none  : changes the rate of later arrivals
+    """
+    
+    def __init__(self, n=None, horizon=None):
+        assert n is not None or horizon is not None
+        self.n = n
+        self.horizon = horizon
+        self.count = 0
+        self._done = False
+    
+    def _draw(self):
+        # the next arrival time, ignoring n and horizon
+        raise NotImplementedError
+    
+    def set_rate(self, rate):
+        """
+        `set_rate(rate)`
+        Changes the arrival rate from the next arrival drawn onwards, e.g.
+        for a what-if branch. A wave spreads the new rate over the following
+        ticks; a nonhomogeneous process scales its whole rate function so
+        that its peak becomes the new rate.
+        
+        @pre    : rate must be positive
+        @pre    : a nonhomogeneous process's rate must be a PiecewiseRate
+        
+        @param  : self  : the ArrivalProcess object to operate upon
+        @param  : rate  : float : the new rate
+        @return : none
+        """
+        raise NotImplementedError
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self._done or (self.n is not None and self.count >= self.n):
+            raise StopIteration
+        t = self._draw()
+        if self.horizon is not None and t >= self.horizon:
+            self._done = True
+            raise StopIteration
+        self.count += 1
+        return t
+    
+    def __str__(self):
+        return "<{} count='{}' />".format(type(self).__name__, self.count)
+    
+    def __repr__(self):
+        return str(self)
+
+class SquareWave(ArrivalProcess):
+    """
+    `SquareWave`
+    The iterator behind square_wave(); see there
+    """
+    
+    def __init__(self, n, ticks=10):
+        assert n >= 0
+        assert ticks > 0
+        super().__init__(n)
+        self.per_tick = max(1, math.ceil(n / ticks))
+        self._start = 0     # the tick and arrival count per_tick applies from
+        self._first = 0
+    
+    def _draw(self):
+        return self._start + int((self.count - self._first) // self.per_tick)
+    
+    def set_rate(self, rate):
+        # arrivals stay on whole ticks, starting with the tick after the last
+        # one drawn (or later, for less than one arrival per tick)
+        assert rate > 0
+        if self.count > 0:
+            last = self._start + int((self.count - 1 - self._first) // self.per_tick)
+            self._start = last + math.ceil(1 / rate)
+            self._first = self.count
+        self.per_tick = rate
+
+class Constant(ArrivalProcess):
+    """
+    `Constant`
+    The iterator behind constant(); see there
+    """
+    
+    def __init__(self, rate, n=None, horizon=None):
+        assert rate > 0
+        super().__init__(n, horizon)
+        self.rate = rate
+        self._start = 0     # the time and arrival count the rate applies from
+        self._first = 0
+    
+    def _draw(self):
+        return self._start + (self.count - self._first) / self.rate
+    
+    def set_rate(self, rate):
+        assert rate > 0
+        if self.count > 0:
+            last = self._start + (self.count - 1 - self._first) / self.rate
+            self._start = last + 1 / rate
+            self._first = self.count
+        self.rate = rate
+
+class Poisson(ArrivalProcess):
+    """
+    `Poisson`
+    The iterator behind poisson(); see there
+    """
+    
+    def __init__(self, rate, rng, n=None, horizon=None):
+        assert rate > 0
+        super().__init__(n, horizon)
+        self.rate = rate
+        self.rng = rng
+        self.t = 0
+    
+    def _draw(self):
+        self.t += self.rng.expovariate(self.rate)
+        return self.t
+    
+    def set_rate(self, rate):
+        assert rate > 0
+        self.rate = rate
+
+class NonhomogeneousPoisson(ArrivalProcess):
+    """
+    `NonhomogeneousPoisson`
+    The iterator behind nonhomogeneous_poisson(); see there
+    """
+    
+    def __init__(self, rate, max_rate, rng, n=None, horizon=None):
+        assert max_rate > 0
+        if isinstance(rate, PiecewiseRate) and rate.end() is not None:
+            # nobody arrives once the rate drops to 0 for good
+            horizon = rate.end() if horizon is None else min(horizon, rate.end())
+        super().__init__(n, horizon)
+        self.rate = rate
+        self.max_rate = max_rate
+        self.rng = rng
+        self.t = 0
+    
+    def _draw(self):
+        rng = self.rng
+        while True:
+            self.t += rng.expovariate(self.max_rate)
+            if self.horizon is not None and self.t >= self.horizon:
+                return self.t
+            r = self.rate(self.t)
+            assert 0 <= r <= self.max_rate
+            if rng.random() * self.max_rate < r:
+                return self.t
+    
+    def set_rate(self, rate):
+        assert rate > 0
+        assert isinstance(self.rate, PiecewiseRate)
+        assert self.rate.max_rate() > 0
+        factor = rate / self.rate.max_rate()
+        self.rate = self.rate.scaled(factor)
+        self.max_rate *= factor
+
+class Batches(ArrivalProcess):
+    """
+    `Batches`
+    The iterator behind batches(); see there
+    """
+    
+    def __init__(self, rate, size, rng, n=None, horizon=None):
+        assert rate > 0
+        super().__init__(n, horizon)
+        self.rate = rate
+        self.size = size
+        self.rng = rng
+        self.t = 0
+        self.left = 0   # members of the current group still to arrive
+    
+    def _draw(self):
+        if self.left == 0:
+            self.t += self.rng.expovariate(self.rate)
+            k = self.size(self.rng) if callable(self.size) else self.size
+            assert type(k) == int and k > 0
+            self.left = k
+        self.left -= 1
+        return self.t
+    
+    def set_rate(self, rate):
+        assert rate > 0
+        self.rate = rate
+
+def square_wave(n, ticks=10):
+    """
+    `square_wave(n, ticks)`
+    The schedule main.py has always used: n customers spread evenly over the
+    first few ticks, the same number arriving at every tick
+    
+    @pre    : n must be non-negative and ticks must be positive
+    
+    @param  : n     : int   : the number of customers
+    @param  : ticks : int   : the number of ticks to spread them over
+    [default 10]
+    @return : SquareWave    : integer arrival times
+    """
+    return SquareWave(n, ticks)
+
+def constant(rate, n=None, horizon=None):
+    """
+    `constant(rate, n, horizon)`
+    Arrivals evenly spaced 1 / rate apart, starting at time 0
+    
+    @pre    : rate must be positive
+    @pre    : at least one of n and horizon must be given
+    
+    @param  : rate      : float : arrivals per unit time
+    @param  : n         : int   : stop after this many arrivals [default None]
+    @param  : horizon   : float : stop before this time [default None]
+    @return : Constant  : arrival times
+    """
+    return Constant(rate, n, horizon)
+
+def poisson(rate, rng, n=None, horizon=None):
+    """
+    `poisson(rate, rng, n, horizon)`
+    A homogeneous Poisson process: exponential gaps with mean 1 / rate
+    
+    @pre    : rate must be positive
+    @pre    : at least one of n and horizon must be given
+    
+    @param  : rate      : float         : mean arrivals per unit time
+    @param  : rng       : random.Random : the source of randomness
+    @param  : n         : int   : stop after this many arrivals [default None]
+    @param  : horizon   : float : stop before this time [default None]
+    @return : Poisson   : arrival times
+    """
+    return Poisson(rate, rng, n, horizon)
+
+def nonhomogeneous_poisson(rate, max_rate, rng, n=None, horizon=None):
+    """
+    `nonhomogeneous_poisson(rate, max_rate, rng, n, horizon)`
+    A Poisson process whose rate changes over time, e.g. a lunchtime rush.
+    Candidate arrivals are drawn at max_rate and each one at time t is kept
+    with probability rate(t) / max_rate (Lewis and Shedler's thinning). A
+    PiecewiseRate that ends at 0 also ends the process, as if it had a
+    horizon there.
+    
+    @pre    : 0 <= rate(t) <= max_rate for every t
+    @pre    : at least one of n and horizon must be given
+    
+    @param  : rate      : callable      : t -> arrivals per unit time at t
+    @param  : max_rate  : float         : an upper bound on rate
+    @param  : rng       : random.Random : the source of randomness
+    @param  : n         : int   : stop after this many arrivals [default None]
+    @param  : horizon   : float : stop before this time [default None]
+    @return : NonhomogeneousPoisson : arrival times
+    """
+    return NonhomogeneousPoisson(rate, max_rate, rng, n, horizon)
+
+def batches(rate, size, rng, n=None, horizon=None):
+    """
+    `batches(rate, size, rng, n, horizon)`
+    Groups of customers that walk in together, the groups arriving as a
+    Poisson process
+    
+    @pre    : rate must be positive
+    @pre    : size must be a positive int, or a callable taking rng and
+    returning one (only an int can be pickled)
+    @pre    : at least one of n and horizon must be given
+    
+    @param  : rate      : float         : mean groups per unit time
+    @param  : size      : int/callable  : how many customers are in a group
+    @param  : rng       : random.Random : the source of randomness
+    @param  : n         : int   : stop after this many arrivals [default None]
+    @param  : horizon   : float : stop before this time [default None]
+    @return : Batches   : arrival times, repeated once per group member
+    """
+    return Batches(rate, size, rng, n, horizon)
+
+class PiecewiseRate(object):
+    """
+    `PiecewiseRate`
+    A rate function that is constant between breakpoints, for use with
+    nonhomogeneous_poisson. Unlike a lambda it can be pickled and compared,
+    so it can be part of a Scenario.
+    
+    @attr   : schedule  : tuple[]   : sorted (start time, rate) pairs; the first
+    rate also applies before the first start time
+    
+    @method : max_rate  : float     : the largest rate in the schedule
+    @method : end       : float     : the time the rate drops to 0 for good,
+    or None
+    @method : scaled    : PiecewiseRate : the schedule with every rate
+    multiplied by a factor
+    @method : __call__  : float     : the rate at a time
+    """
+    
+    def __init__(self, schedule):
+        """
+        `PiecewiseRate(schedule)`
+        Constructs a new PiecewiseRate
+        
+        @pre    : schedule must be a non-empty list of (start time, rate) pairs
+        with non-negative rates
+        
+        @param  : self      : the PiecewiseRate object to operate upon
+        @param  : schedule  : iterable  : (start time, rate) pairs
+        @return : none
+        """
+        self.schedule = tuple(sorted((float(t), float(r)) for t, r in schedule))
+        assert len(self.schedule) > 0
+        assert all(r >= 0 for _, r in self.schedule)
+        self._starts = [t for t, _ in self.schedule]
+    
+    def max_rate(self):
+        return max(r for _, r in self.schedule)
+    
+    def end(self):
+        if self.schedule[-1][1] > 0:
+            return None
+        i = len(self.schedule) - 1
+        while i > 0 and self.schedule[i - 1][1] == 0:
+            i -= 1
+        return self.schedule[i][0]
+    
+    def scaled(self, factor):
+        assert factor >= 0
+        return PiecewiseRate((t, r * factor) for t, r in self.schedule)
+    
+    def __call__(self, t):
+        i = bisect_right(self._starts, t) - 1
+        return self.schedule[max(i, 0)][1]
+    
+    def __eq__(self, other):
+        return isinstance(other, PiecewiseRate) and self.schedule == other.schedule
+    
+    def __hash__(self):
+        return hash(self.schedule)
+    
+    def __str__(self):
+        return "<PiecewiseRate schedule='{}' />".format(list(self.schedule))
+    
+    def __repr__(self):
+        return str(self)
+
+def customers(times, service_times=None, first_id=0):
+    """
+    `customers(times, service_times, first_id)`
+    Turns a stream of arrival times into a stream of new customers, building
+    each Customer only as it is pulled
+    
+    @param  : times         : iterable  : arrival times in non-decreasing order
+    @param  : service_times : iterable  : a service time for each customer, or
+    None for unit service [default None]
+    @param  : first_id      : int       : the first sequential customer id
+    [default 0]
+    @return : generator : (time, Customer) pairs
+    """
+    service_times = iter(service_times) if service_times is not None else None
+    for i, t in enumerate(times, first_id):
+        s = 1 if service_times is None else next(service_times)
+        yield t, Customer(str(i).zfill(3), service_time=s, customer_id=i)
@@ -4,9 +4,11 @@
 # 
 # Written by Joshua Paul A. Chan
 
+from heapq import heapify, heappush, heappop
+
 from .customer import Customer
 from .teller import Teller
-from .reception_queue import ReceptionQueue
+from .reception_queue import ReceptionQueue, FIFO
 
 class Bank(object):
     """
@@ -20,6 +22,21 @@ class Bank(object):
     served
     @attr   : operating : bool              : Whether this bank is open
     (functioning) or not
+    @attr   : clock     : int/float         : The current simulation time
+    @attr   : free      : int[]             : Min-heap of the indices of idle
+    tellers
+    @attr   : busy      : tuple[]           : Min-heap of (completion time,
+    teller index) for tellers serving a customer
+    @attr   : balk_at   : int               : How many customers waiting
+    beyond the idle tellers make an arriving customer leave at once, or None
+    if nobody balks
+    @attr   : deadlines : tuple[]           : Min-heap of (time patience runs
+    out, order joined, customer) for impatient customers
+    @attr   : balked    : int               : Customers who left on arrival
+    @attr   : reneged   : int               : Customers who left the line
+    after running out of patience
+    @attr   : reneged_wait  : float         : The total time customers who
+    reneged spent in line
     
     @method : __init__      : none              : Constructor initiliazing
     function for a Bank instance
@@ -29,21 +46,98 @@ class Bank(object):
     @method : open          : void  : Opens the bank for business/prepares the
     queue
     @method : close         : void  : Clears the queue and frees the tellers
+    @method : tick          : void  : Advances the simulation clock
+    @method : update        : void  : Frees tellers whose service has ended
+    @method : has_free_teller   : bool  : Checks whether any teller is idle
+    @method : can_serve     : bool  : Checks whether an idle teller has a
+    customer waiting for them
+    @method : serve_next    : tuple : Hands the next customer to an idle teller
+    @method : utilization   : float : The fraction of tellers at work that
+    are busy
+    @method : set_tellers   : void  : Hires or lets go of tellers
+    @method : receive_customer  : bool  : Lets a customer in, unless they balk
+    @method : renege        : Customer[]    : Removes customers whose patience
+    ran out from the line
     """
     
-    def __init__(self, n_tellers=1):
+    def __init__(self, n_tellers=1, discipline=FIFO, balk_at=None):
         assert type(n_tellers) == int
         assert n_tellers > 0
+        assert balk_at is None or (type(balk_at) == int and balk_at >= 0)
         
-        self.tellers = [Teller(str(i).zfill(3)) for i in range(n_tellers)]
-        self.customers = ReceptionQueue()
+        self.tellers = [Teller(str(i).zfill(3), employee_id=i) for i in range(n_tellers)]
+        self.customers = ReceptionQueue(discipline)
         self.operating = False
+        self.clock = 0
+        
+        # idle tellers by index and busy tellers by completion time, so
+        # handing out and taking back a teller is O(log T), not O(T)
+        self.free = list(range(n_tellers))
+        heapify(self.free)
+        self.busy = []
+        
+        # impatient customers by the time they give up; entries for customers
+        # who were served first are dropped when they reach the top, or swept
+        # out once they outnumber the customers in line
+        self.balk_at = balk_at
+        self.deadlines = []
+        self._joined = 0
+        self.balked = 0
+        self.reneged = 0
+        self.reneged_wait = 0
     
     def update(self):
-        # Tellers finish servicing after 1 time step
-        for teller in self.tellers:
-            if not teller.is_available(): teller.set_available(True)
-        
+        # Tellers finish servicing once the clock reaches their completion time
+        while self.busy and self.busy[0][0] <= self.clock:
+            _, i = heappop(self.busy)
+            if i < len(self.tellers):
+                self.tellers[i].set_available(True)
+                heappush(self.free, i)
+    
+    def has_free_teller(self):
+        return len(self.free) > 0
+    
+    def can_serve(self):
+        # whether serve_next has someone to serve and a teller to serve them
+        return len(self.free) > 0 and len(self.customers) > 0
+    
+    def set_tellers(self, n_tellers):
+        # New tellers start idle. When there are too many, the highest-numbered
+        # ones leave, finishing any customer they are serving first; one who
+        # is rehired before finishing starts idle once they do
+        assert type(n_tellers) == int
+        assert n_tellers > 0
+        finishing = {i for _, i in self.busy} if n_tellers > len(self.tellers) else ()
+        for i in range(len(self.tellers), n_tellers):
+            teller = Teller(str(i).zfill(3), employee_id=i)
+            self.tellers.append(teller)
+            if i in finishing:
+                teller.set_available(False)
+            else:
+                heappush(self.free, i)
+        if n_tellers < len(self.tellers):
+            del self.tellers[n_tellers:]
+            self.free = [i for i in self.free if i < n_tellers]
+            heapify(self.free)
+    
+    def utilization(self):
+        # The busy fraction of the tellers at work: those on duty, plus any
+        # who were let go and are still finishing a customer
+        n = len(self.tellers)
+        leaving = sum(1 for _, i in self.busy if i >= n)
+        return len(self.busy) / (n + leaving)
+    
+    def serve_next(self):
+        # The lowest-numbered idle teller serves the next customer in line
+        # until clock + the customer's service time
+        assert self.has_free_teller()
+        i = heappop(self.free)
+        teller = self.tellers[i]
+        cust = self.customers.get_next_customer()
+        teller.serve(cust, self.clock)
+        heappush(self.busy, (self.clock + cust.service_time, i))
+        return teller, cust
+    
     def is_open(self):
         return self.operating == True
     
@@ -53,12 +147,58 @@ class Bank(object):
     def close(self):
         self.operating = False
     
+    def tick(self, td=1):
+        assert td >= 0
+        self.clock += td
+    
     def receive_customer(self, cust):
+        # Customers who would have balk_at or more people ahead of them once
+        # the idle tellers are taken leave straight away (balking); the rest
+        # join the line, and those with a patience get a deadline
         assert isinstance(cust, Customer)
         if not self.is_open():
             raise Exception("Cannot visit a bank that is closed.")
         else:
+            cust.arrived_at = self.clock
+            if self.balk_at is not None and len(self.customers) - len(self.free) >= self.balk_at:
+                cust.left_at = self.clock
+                self.balked += 1
+                return False
             self.customers.insert_customer(cust)
+            if cust.patience is not None:
+                self._joined += 1
+                heappush(self.deadlines, (self.clock + cust.patience, self._joined, cust))
+                if len(self.deadlines) > 2 * len(self.customers) + 32:
+                    self.deadlines = [e for e in self.deadlines if not e[2].was_served()]
+                    heapify(self.deadlines)
+            return True
+    
+    def renege(self):
+        """
+        `renege()`
+        Removes every customer whose patience ran out before the current time
+        from the line. Each deadline is pushed and popped once, so expiring
+        customers costs O(log n) each instead of a scan of the line per step;
+        deadlines of customers already served are skipped when they surface.
+        A customer whose deadline is exactly now is still in line, so a
+        teller who frees up at that moment serves them.
+        
+        @pre    : the line must support withdraw_customer
+        
+        @param  : self  : the Bank object to operate upon
+        @return : Customer[]    : the customers who left, by deadline
+        """
+        gone = []
+        deadlines = self.deadlines
+        while deadlines and deadlines[0][0] < self.clock:
+            t, _, cust = heappop(deadlines)
+            if cust.was_served():
+                continue
+            self.customers.withdraw_customer(cust, t)
+            self.reneged += 1
+            self.reneged_wait += t - cust.arrived_at
+            gone.append(cust)
+        return gone
     
 def main():
     pass
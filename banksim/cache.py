@@ -0,0 +1,248 @@
+#
+# `cache.py`
+# A content-addressed store of simulation results on disk
+#
+# Written by Joshua Paul A. Chan
+
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+from .service import ServiceTime
+
+# where the command line keeps its results unless told otherwise
+DEFAULT_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'banksim')
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+_code_versions = {}
+
+def code_version(*sources):
+    """
+    `code_version(*sources)`
+    A digest of the simulator's source, so results from older code are never
+    mistaken for current ones. Code outside the package that shapes a result,
+    such as the command line's report, is passed in as sources. Computed once
+    per process for each set of sources.
+    
+    @param  : sources   : str   : paths of other files the result depends on
+    @return : str   : a hex digest of every module in the package and of the
+    sources
+    """
+    sources = tuple(os.path.abspath(path) for path in sources)
+    if sources not in _code_versions:
+        h = hashlib.sha256()
+        root = os.path.dirname(os.path.abspath(__file__))
+        paths = [os.path.join(root, name) for name in sorted(os.listdir(root))
+            if name.endswith('.py')]
+        for path in paths + list(sources):
+            h.update(os.path.basename(path).encode())
+            with open(path, 'rb') as f:
+                h.update(f.read())
+        _code_versions[sources] = h.hexdigest()
+    return _code_versions[sources]
+
+def canonical(value):
+    """
+    `canonical(value)`
+    Rewrites a configuration as plain JSON values that compare equal exactly
+    when the configurations do: tuples and lists alike become lists, numbers
+    with integer values become ints (so 2 and 2.0 agree) and distributions
+    become their type and parameters
+    
+    @pre    : value must be built from numbers, strings, None, lists, tuples,
+    dicts and ServiceTimes
+    
+    @param  : value : the configuration
+    @return : the canonical form, for json.dumps(..., sort_keys=True)
+    """
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, ServiceTime):
+        return {'type': type(value).__name__, 'params': canonical(value.params())}
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    raise TypeError("cannot key a result on {!r}".format(value))
+
+def result_key(kind, config, sources=(), **details):
+    """
+    `result_key(kind, config, sources, **details)`
+    The address of a result: a hash of what was computed, the scenario it was
+    computed for, anything else it depends on (seed, options) and the code
+    version
+    
+    @param  : kind      : str   : what the result is, e.g. 'replication'
+    @param  : config    : dict  : Scenario.config()
+    @param  : sources   : str[] : files outside the package the result
+    depends on [default none]
+    @param  : details   : the other inputs the result depends on
+    @return : str       : a hex digest
+    """
+    text = json.dumps({
+        'kind': kind,
+        'config': canonical(config),
+        'details': canonical(details),
+        'code': code_version(*sources),
+    }, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode()).hexdigest()
+
+class ResultCache(object):
+    """
+    `ResultCache`
+    Summary results kept as one small JSON file per key in a directory, with
+    the least recently used files deleted once the directory grows past
+    max_bytes. The files are the only state, so separate runs (and separate
+    processes) share the cache; each instance keeps an in-memory LRU index
+    of the files, so a lookup or store touches one file rather than listing
+    the directory.
+    
+    Writes go to a temporary file that is then renamed, so a reader never
+    sees half a result.
+    
+    @attr   : path      : str   : the directory results are stored in
+    @attr   : max_bytes : int   : the most the stored results may take up
+    @attr   : hits      : int   : lookups answered from the cache
+    @attr   : misses    : int   : lookups that were not
+    
+    @method : get       : object    : a stored result, or None
+    @method : put       : none      : stores a result
+    @method : clear     : none      : deletes every stored result
+    """
+    
+    def __init__(self, path=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        `ResultCache(path, max_bytes)`
+        Opens (creating if needed) a result cache
+        
+        @pre    : max_bytes must be positive
+        
+        @param  : self      : the ResultCache object to operate upon
+        @param  : path      : str   : the directory [default ~/.cache/banksim]
+        @param  : max_bytes : int   : the size bound [default 64 MiB]
+        @return : none
+        """
+        assert max_bytes > 0
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        
+        # key -> size, least recently used first, recovered from file times
+        entries = []
+        for name in os.listdir(path):
+            if name.endswith('.json'):
+                try:
+                    st = os.stat(os.path.join(path, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, name[:-5], st.st_size))
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._bytes = sum(self._index.values())
+    
+    def _file(self, key):
+        return os.path.join(self.path, key + '.json')
+    
+    def get(self, key):
+        """
+        `get(key)`
+        Looks up a result, marking it as recently used
+        
+        @param  : self  : the ResultCache object to operate upon
+        @param  : key   : str   : the result's key (see result_key)
+        @return : object    : the stored result, or None if there is none
+        """
+        try:
+            with open(self._file(key)) as f:
+                value = json.load(f)['value']
+            os.utime(self._file(key))
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        if key in self._index:
+            self._index.move_to_end(key)
+        else:
+            # stored by another process since this index was read
+            self._index[key] = os.path.getsize(self._file(key))
+            self._bytes += self._index[key]
+        self.hits += 1
+        return value
+    
+    def put(self, key, value):
+        """
+        `put(key, value)`
+        Stores a result, then evicts the least recently used results until
+        the cache fits in max_bytes
+        
+        @pre    : value must be JSON-serializable
+        
+        @param  : self  : the ResultCache object to operate upon
+        @param  : key   : str   : the result's key (see result_key)
+        @param  : value : object    : the result
+        @return : none
+        """
+        data = json.dumps({'value': value}, separators=(',', ':'))
+        tmp = '{}.{}.tmp'.format(self._file(key), os.getpid())
+        with open(tmp, 'w') as f:
+            f.write(data)
+        os.replace(tmp, self._file(key))
+        
+        self._bytes += len(data) - self._index.pop(key, 0)
+        self._index[key] = len(data)
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            old, size = self._index.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._file(old))
+            except FileNotFoundError:
+                pass
+    
+    def clear(self):
+        for key in self._index:
+            try:
+                os.remove(self._file(key))
+            except FileNotFoundError:
+                pass
+        self._index.clear()
+        self._bytes = 0
+    
+    def __len__(self):
+        return len(self._index)
+    
+    def __str__(self):
+        return "<ResultCache path='{}' entries='{}' bytes='{}' />".format(
+            self.path, len(self._index), self._bytes)
+    
+    def __repr__(self):
+        return str(self)
+
+def cached_map(run, jobs, keys, cache):
+    """
+    `cached_map(run, jobs, keys, cache)`
+    Computes the results of jobs, taking every result the cache has and
+    running only the rest (together, so they can still share a process pool)
+    before storing them
+    
+    @param  : run   : callable  : run(jobs) -> their results, in job order
+    @param  : jobs  : list      : the jobs
+    @param  : keys  : str[]     : each job's result key, or None without a
+    cache
+    @param  : cache : ResultCache   : the cache, or None to run every job
+    @return : list  : every job's result, in job order
+    """
+    if cache is None:
+        return run(jobs)
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, r in enumerate(results) if r is None]
+    if missing:
+        for i, r in zip(missing, run([jobs[i] for i in missing])):
+            cache.put(keys[i], r)
+            results[i] = r
+    return results
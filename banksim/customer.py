@@ -4,23 +4,43 @@
 # 
 # Written by Joshua Paul A. Chan
 
-from uuid import uuid4 as gen_id
+from uuid import UUID, uuid4 as gen_id
 
 class Customer(object):
     """
     `Customer`
     A Customer class used to serve customers. Inherits from Customer
     
+    Customers declare __slots__ rather than carrying a __dict__, which keeps
+    each instance small when millions of them are alive at once.
+    
     # overrided/defined in-class
-    @attr   : customer_id   : str   : the unique customer id 
+    @attr   : customer_id   : UUID/int  : the unique customer id; a random
+    UUID by default, or a sequential int when one is given
     @attr   : name          : str   : the user-friendly name of the Customer
     object
     @attr   : visit_purpose : str   : indicates the user's purpose for visiting
+    @attr   : priority      : int   : the customer's priority (lower is served
+    first by a 'priority' ReceptionQueue)
+    @attr   : service_time  : float : how long the customer takes to serve
     @attr   : served        : bool  : indicates whether the user was served or
     not
+    @attr   : arrived_at    : float : the time the customer was admitted to a
+    bank (None until admitted)
+    @attr   : served_at     : float : the time the customer started being
+    served (None until served)
+    @attr   : preemptions   : int   : how many times the customer's service
+    was interrupted by a higher-priority customer
+    @attr   : patience      : float : how long the customer will wait in line
+    before giving up, or None to wait as long as it takes
+    @attr   : left_at       : float : the time the customer gave up on the
+    line, or None if they stayed
     
     @method : was_served    : bool  : checks whether this Customer has been served or not
     @method : serve         : None  : marks this Customer as having been served
+    @method : wait_time     : float : how long this Customer waited to be served
+    @method : uuid          : UUID  : a UUID for this Customer, generated on
+    demand for customers with integer ids
     
     @method : __str__       : str   : returns a string representation of the
     Customer instance
@@ -28,9 +48,17 @@ class Customer(object):
     Customer instance (wraps __str__)
     """
     
-    def __init__(self, name, visit_purpose='other'):
+    __slots__ = (
+        'customer_id', 'name', 'visit_purpose', 'priority', 'service_time',
+        'served', 'has_waited', 'arrived_at', 'served_at', 'preemptions',
+        'patience', 'left_at', '_uuid',
+    )
+    
+    def __init__(self, name, visit_purpose='other', priority=0, service_time=1,
+                 customer_id=None, patience=None):
         """
-        `Customer(name, salary)`
+        `Customer(name, visit_purpose, priority, service_time, customer_id,
+        patience)`
         Constructs a new Customer instance from the Customer class. Inherits
         directly from Customer's constructor
         
@@ -40,15 +68,32 @@ class Customer(object):
         upon
         @param  : name          : str       : the name to give the customer
         @param  : visit_purpose : str       : the customer's purpose for visiting [default 'other']
+        @param  : priority      : int       : the customer's priority [default 0]
+        @param  : service_time  : int/float : the time it takes to serve the
+        customer [default 1]
+        @param  : customer_id   : int       : a sequential id to use instead of
+        generating a UUID [default None]
+        @param  : patience      : int/float : how long the customer will wait
+        before leaving the line [default None]
         @return : none 
         """
         assert len(name) >= 3
+        assert service_time >= 0
+        assert patience is None or patience >= 0
         
-        self.customer_id = gen_id()
+        self.customer_id = gen_id() if customer_id is None else customer_id
+        self._uuid = None
         self.name = name[:64]
         self.visit_purpose = visit_purpose
+        self.priority = priority
+        self.service_time = service_time
         self.served = False
         self.has_waited = 0
+        self.arrived_at = None
+        self.served_at = None
+        self.preemptions = 0
+        self.patience = patience
+        self.left_at = None
     
     def was_served(self):
         """
@@ -65,21 +110,41 @@ class Customer(object):
         """
         return self.served == True
     
-    def serve(self):
+    def serve(self, t=None):
         """
-        `serve()`
+        `serve(t)`
         Marks this Customer as having been served
         
         @pre    : the given Customer object must be initialized
         @pre    : the given Customer object must not have been served before
         this operation takes place (.was_served() should return False)
         @post   : the Customer's served attribute will be changed to True
+        @post   : if given, t will be recorded as the time service started
         
         @param  : self  : Customer  : the customer object to operate upon
+        @param  : t     : int/float : the time service started [default None]
         @return : bool  : whether this particular Customer object has been
         served or not will be returned
         """
         self.served = True
+        self.served_at = t
+    
+    def wait_time(self):
+        """
+        `wait_time()`
+        Returns how long this customer waited in line before being served
+        
+        @pre    : the given Customer object must be initialized
+        @post   : if both the arrival and service times were recorded, their
+        difference is returned; otherwise the time accumulated through
+        wait_a_little is returned
+        
+        @param  : self  : Customer  : the customer object to operate upon
+        @return : int/float : the time this customer spent waiting
+        """
+        if self.arrived_at is None or self.served_at is None:
+            return self.has_waited
+        return self.served_at - self.arrived_at
     
     def wait_a_little(self, td=1):
         """
@@ -99,6 +164,25 @@ class Customer(object):
         assert td >= 0
         self.has_waited += td
     
+    @property
+    def uuid(self):
+        """
+        `uuid`
+        A UUID for this customer. Customers created with a sequential id only
+        pay for generating one the first time it is asked for.
+        
+        @pre    : the given Customer object must be initialized
+        @post   : the same UUID is returned on every call
+        
+        @param  : self  : Customer  : the customer object to operate upon
+        @return : UUID  : this customer's UUID
+        """
+        if isinstance(self.customer_id, UUID):
+            return self.customer_id
+        if self._uuid is None:
+            self._uuid = gen_id()
+        return self._uuid
+    
     def __str__(self):
         """
         `__str__`
@@ -0,0 +1,122 @@
+#
+# `customer_pool.py`
+# An array-backed, column-oriented store of customers that have not arrived yet
+#
+# Written by Joshua Paul A. Chan
+
+from array import array
+
+from .customer import Customer
+
+class CustomerPool(object):
+    """
+    `CustomerPool`
+    Stores customers as typed columns rather than as Customer objects. Each
+    customer costs 25 bytes (an id, an arrival time, a service time and a
+    one-byte visit purpose code) instead of a full object, and a Customer is
+    only built when it is needed, e.g. as it walks into the bank.
+    
+    # defined in-class
+    @attr   : ids           : array('q')    : sequential customer ids
+    @attr   : arrivals      : array('d')    : arrival times
+    @attr   : service_times : array('d')    : service times
+    @attr   : purposes      : array('B')    : visit purpose codes
+    @attr   : purpose_names : str[]         : visit purpose for each code
+    
+    @method : append        : int       : adds a customer, returns its index
+    @method : customer      : Customer  : builds the Customer at an index
+    @method : stream        : generator : yields (time, Customer) pairs
+    @method : __len__       : int       : the number of stored customers
+    """
+    
+    def __init__(self, first_id=0):
+        """
+        `CustomerPool(first_id)`
+        Constructs a new, empty CustomerPool
+        
+        @param  : self      : the CustomerPool object to operate upon
+        @param  : first_id  : int   : the id given to the first customer
+        [default 0]
+        @return : none
+        """
+        self.ids = array('q')
+        self.arrivals = array('d')
+        self.service_times = array('d')
+        self.purposes = array('B')
+        self.purpose_names = []
+        self._purpose_codes = {}
+        self._next_id = first_id
+    
+    def _purpose_code(self, purpose):
+        code = self._purpose_codes.get(purpose)
+        if code is None:
+            assert len(self.purpose_names) < 256
+            code = self._purpose_codes[purpose] = len(self.purpose_names)
+            self.purpose_names.append(purpose)
+        return code
+    
+    def append(self, arrival, service_time=1, visit_purpose='other'):
+        """
+        `append(arrival, service_time, visit_purpose)`
+        Adds a customer to the pool
+        
+        @pre    : arrival and service_time must be non-negative
+        @pre    : at most 256 distinct visit purposes may be used
+        
+        @param  : self          : the CustomerPool object to operate upon
+        @param  : arrival       : float : when the customer arrives
+        @param  : service_time  : float : how long they take to serve
+        [default 1]
+        @param  : visit_purpose : str   : why they are visiting [default
+        'other']
+        @return : int   : the customer's index in the pool
+        """
+        assert arrival >= 0
+        assert service_time >= 0
+        
+        self.ids.append(self._next_id)
+        self.arrivals.append(arrival)
+        self.service_times.append(service_time)
+        self.purposes.append(self._purpose_code(visit_purpose))
+        self._next_id += 1
+        return len(self.ids) - 1
+    
+    def customer(self, i):
+        """
+        `customer(i)`
+        Builds a Customer object for the customer at an index
+        
+        @pre    : i must be a valid index into the pool
+        
+        @param  : self  : the CustomerPool object to operate upon
+        @param  : i     : int       : the index of the customer
+        @return : Customer  : a new, unserved Customer
+        """
+        customer_id = self.ids[i]
+        return Customer(str(customer_id).zfill(3),
+            visit_purpose=self.purpose_names[self.purposes[i]],
+            service_time=self.service_times[i],
+            customer_id=customer_id)
+    
+    def stream(self):
+        """
+        `stream()`
+        Builds customers one at a time, in the order they were added, for
+        the next-event engine
+        
+        @pre    : customers must have been added in arrival order
+        
+        @param  : self  : the CustomerPool object to operate upon
+        @return : generator : (arrival time, Customer) pairs
+        """
+        for i in range(len(self)):
+            yield self.arrivals[i], self.customer(i)
+    
+    def __len__(self):
+        return len(self.ids)
+    
+    def __str__(self):
+        return "<CustomerPool customers='{}' />".format(len(self))
+    
+    def __repr__(self):
+        return str(self)
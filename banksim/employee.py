@@ -8,20 +8,29 @@ from uuid import uuid4 as gen_id
 
 from .customer import Customer
 
+# the hours a yearly salary pays for: 20 hrs/wk, 48 wks/yr
+HOURS_PER_YEAR = 960
+
 class Employee(object):
     """
     `Employee`
     An abstract Employee class.
     
     # defined in-class
-    @attr   : employee_id   : str   : the unique id of the employee
+    @attr   : employee_id   : UUID/int  : the unique id of the employee; a
+    random UUID by default, or a sequential int when one is given
     @attr   : name          : str   : the user-friendly name of the employee
     @attr   : salary        : str   : a string of the user's yearly salary
     @attr   : available     : bool  : whether the user is available or not 
+    @attr   : skills        : frozenset : the visit purposes the employee can
+    help with, or None for every purpose
     
     @method : is_available  : bool  : checks whether or not the employee is
     free to service a customer
     @method : set_available : none  : sets an employee's availability
+    @method : can_help      : bool  : checks whether the employee can help
+    with a visit purpose
+    @method : hourly_wage   : float : the salary per hour worked
     @method : serve         : bool  : serve a customer
     @method : __str__       : str   : returns a string representation of the
     Employee instance
@@ -29,9 +38,9 @@ class Employee(object):
     Employee instance (wraps __str__)
     """
     
-    def __init__(self, name, salary=None):
+    def __init__(self, name, salary=None, employee_id=None, skills=None):
         """
-        `Employee(name, salary)`
+        `Employee(name, salary, employee_id, skills)`
         Constructs a new Employee instance from the Employee class.
         
         @pre    : name must be a properly-formatted UTF-8 string
@@ -44,15 +53,20 @@ class Employee(object):
         @param  : self      : the Employee object to operate upon
         @param  : name      : the name to give the employee
         @param  : salary    : the salary of the employee [default '9600.00']
+        @param  : employee_id   : a sequential id to use instead of generating
+        a UUID [default None]
+        @param  : skills    : the visit purposes the employee can help with
+        [default None, every purpose]
         @return : none 
         """
         assert type(name) == str
         assert len(name) >= 2
         assert type(salary) == str or salary == None
         
-        self.employee_id = gen_id()
+        self.employee_id = gen_id() if employee_id is None else employee_id
         self.name = name[:64]
         self.available = True
+        self.skills = frozenset(skills) if skills is not None else None
         self.salary = salary or '9600.00' # roughly $10 hr, 20 hrs/wk, 48 wks/yr
     
     def is_available(self):
@@ -86,9 +100,30 @@ class Employee(object):
         assert type(av) is bool
         self.available = av
     
-    def serve(self, cust):
+    def can_help(self, visit_purpose):
+        """
+        `can_help(visit_purpose)`
+        Checks whether this employee can help with a visit purpose
+        
+        @param  : self          : the Employee object to operate upon
+        @param  : visit_purpose : str   : why a customer is visiting
+        @return : bool  : whether the purpose is one of the employee's skills
+        """
+        return self.skills is None or visit_purpose in self.skills
+    
+    def hourly_wage(self):
+        """
+        `hourly_wage()`
+        The employee's yearly salary spread over the hours it pays for
+        
+        @param  : self  : the Employee object to operate upon
+        @return : float : the salary per hour worked
+        """
+        return float(self.salary) / HOURS_PER_YEAR
+    
+    def serve(self, cust, t=None):
         """
-        `serve(av)`
+        `serve(cust, t)`
         "Serve" a customer by attempting to resolve his or her purpose for
         visiting
         
@@ -100,6 +135,7 @@ class Employee(object):
                         
         @param  : self  : the Employee object to operate upon
         @param  : cust  : the customer to "service"
+        @param  : t     : the time service starts at [default None]
         @return : bool  : whether an employee was successful in servicing the
         given customer  
         """
@@ -109,12 +145,13 @@ class Employee(object):
             raise Exception("{} is currently busy.".format(self))
         
         # check customer purpose
-        can_help_with_purpose = True
+        can_help_with_purpose = self.can_help(cust.visit_purpose)
         
         # if applicable, make busy
         if can_help_with_purpose:
             self.set_available(False)
-            cust.serve()
+            cust.serve(t)
+        return can_help_with_purpose
     
     def __str__(self):
         """
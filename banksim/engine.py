@@ -0,0 +1,310 @@
+#
+# `engine.py`
+# A next-event simulation engine that drives a Bank from an event calendar
+#
+# Written by Joshua Paul A. Chan
+
+from heapq import heappush, heappop
+
+from .bank import Bank
+from .instrumentation import clock
+from . import trace as tr
+
+# event kinds, in the order they are handled when they share a timestamp:
+# tellers are freed first, then shifts change, then the doors close, then new
+# customers arrive
+DEPARTURE = 0
+SHIFT = 1
+CLOSE = 2
+ARRIVAL = 3
+
+# the phase each kind of event is timed under when a Simulation has stats
+PHASES = ('departure', 'shift', 'close', 'arrival')
+
+class Simulation(object):
+    """
+    `Simulation`
+    A discrete-event simulation of a Bank. Rather than stepping the clock one
+    unit at a time, the clock jumps straight to the next scheduled event, so
+    the cost of a run grows with the number of events instead of the
+    simulated horizon.
+    
+    Customers waiting in line are handed to free tellers once all of the
+    events at the current time have been handled, which reproduces the
+    tick-based loop in `main.py` when every service takes one unit of time.
+    Before that, customers whose patience ran out since the last event leave
+    the line (see Bank.renege); nobody can be served in between, so they need
+    no events of their own.
+    
+    @attr   : bank          : Bank      : the bank being simulated
+    @attr   : calendar      : tuple[]   : heap of pending (time, kind, seq,
+    payload) events
+    @attr   : close_at      : float     : the time the doors close to new
+    customers, or None to admit every arrival
+    @attr   : shifts        : tuple     : (start time, number of tellers)
+    shift changes, or None to keep the bank's tellers
+    @attr   : served        : int       : the number of customers served
+    @attr   : wait_time     : float     : the total time customers spent waiting
+    @attr   : turned_away   : int       : customers that arrived after closing
+    @attr   : last_service  : float     : the time the last service started
+    @attr   : events        : int       : the number of events handled
+    @attr   : waits         : float[]   : every served customer's wait, in
+    service order, or None unless record_waits was set
+    @attr   : wait_stats    : WaitStats : fed every served customer's wait,
+    or None
+    @attr   : period_waits  : PeriodWaits   : fed every served customer's
+    wait by the period they arrived in, or None
+    @attr   : trace         : TraceWriter   : records every arrival, service,
+    departure and abandonment, or None
+    @attr   : stats         : Stats     : times each kind of event and the
+    dispatch step, or None to run uninstrumented
+    
+    @method : schedule      : none      : adds an event to the calendar
+    @method : run           : Simulation: runs the simulation to completion,
+    or until a given time
+    @method : is_finished   : bool      : whether the run has completed
+    @method : average_wait_time : float : the mean wait of served customers
+    """
+    
+    def __init__(self, bank, arrivals, close_at=None, record_waits=False,
+            wait_stats=None, trace=None, stats=None, shifts=None,
+            period_waits=None):
+        """
+        `Simulation(bank, arrivals, close_at, record_waits, wait_stats, trace,
+        stats, shifts, period_waits)`
+        Constructs a new Simulation over the given bank
+        
+        @pre    : bank must be a Bank
+        @pre    : arrivals must yield (time, Customer) pairs in non-decreasing
+        time order
+        @post   : arrivals are pulled lazily, one at a time, as the clock
+        reaches them
+        
+        @param  : self      : the Simulation object to operate upon
+        @param  : bank      : Bank      : the bank to simulate
+        @param  : arrivals  : iterable  : the (time, Customer) arrival stream
+        @param  : close_at  : int/float : the time the doors close [default
+        None]
+        @param  : record_waits  : bool  : keep every customer's wait time
+        [default False]
+        @param  : wait_stats    : WaitStats : summarizes wait times in constant
+        memory [default None]
+        @param  : trace     : TraceWriter   : logs events in binary [default
+        None]
+        @param  : stats     : Stats     : collects per-phase timings [default
+        None]
+        @param  : shifts    : list      : (start time, number of tellers)
+        pairs; at each start the bank is staffed with that many tellers
+        [default None]
+        @param  : period_waits  : PeriodWaits   : summarizes waits per period
+        [default None]
+        @return : none
+        """
+        assert isinstance(bank, Bank)
+        assert shifts is None or all(n > 0 for _, n in shifts)
+        
+        self.bank = bank
+        self.calendar = []
+        self.close_at = close_at
+        self.shifts = tuple(map(tuple, shifts)) if shifts else None
+        self.doors_open = True
+        
+        self.served = 0
+        self.wait_time = 0
+        self.turned_away = 0
+        self.last_service = 0
+        self.events = 0
+        self.waits = [] if record_waits else None
+        self.wait_stats = wait_stats
+        self.period_waits = period_waits
+        self.trace = trace
+        self.stats = stats
+        
+        self._arrivals = iter(arrivals)
+        self._seq = 0
+        self._started = False
+    
+    def schedule(self, t, kind, payload=None):
+        """
+        `schedule(t, kind, payload)`
+        Adds an event to the calendar
+        
+        @pre    : t must not be earlier than the bank's clock
+        
+        @param  : self      : the Simulation object to operate upon
+        @param  : t         : int/float : when the event happens
+        @param  : kind      : int       : DEPARTURE, SHIFT, CLOSE or ARRIVAL
+        @param  : payload   : object    : the Teller or Customer involved (a
+        traced departure that may be interrupted carries (Teller, Customer,
+        preemptions so far)), or the number of tellers for a SHIFT
+        @return : none
+        """
+        assert t >= self.bank.clock
+        self._seq += 1
+        heappush(self.calendar, (t, kind, self._seq, payload))
+    
+    def _next_arrival(self):
+        # keep exactly one pending arrival on the calendar
+        for t, cust in self._arrivals:
+            self.schedule(t, ARRIVAL, cust)
+            return
+    
+    def _handle(self, kind, payload):
+        if kind == DEPARTURE:
+            self.bank.update()
+            if self.trace is not None and type(payload) == tuple:
+                # a service that could have been interrupted is logged when it
+                # ends, unless it was (the customer then has more preemptions)
+                teller, cust, preemptions = payload
+                if cust.preemptions == preemptions:
+                    self.trace.write(tr.DEPARTURE, self.bank.clock,
+                        tr.trace_id(cust.customer_id), teller.employee_id)
+        elif kind == SHIFT:
+            self.bank.set_tellers(payload)
+        elif kind == CLOSE:
+            self.doors_open = False
+        else:
+            self._next_arrival()
+            if self.doors_open:
+                kind = tr.ARRIVAL if self.bank.receive_customer(payload) else tr.BALKED
+            else:
+                self.turned_away += 1
+                kind = tr.TURNED_AWAY
+            if self.trace is not None:
+                self.trace.write(kind, self.bank.clock, tr.trace_id(payload.customer_id))
+                interrupted = getattr(self.bank, 'last_preempted', None)
+                if interrupted is not None:
+                    cust, i = interrupted
+                    self.trace.write(tr.PREEMPTED, self.bank.clock,
+                        tr.trace_id(cust.customer_id), self.bank.tellers[i].employee_id)
+    
+    def _renege(self):
+        for cust in self.bank.renege():
+            if self.trace is not None:
+                self.trace.write(tr.RENEGED, cust.left_at, tr.trace_id(cust.customer_id))
+    
+    def _depart(self, t, teller, cust):
+        # services that may be interrupted carry their customer, so their
+        # departure is traced when (and if) it happens
+        if self.trace is not None and getattr(self.bank, 'preemptive', False):
+            self.schedule(t, DEPARTURE, (teller, cust, cust.preemptions))
+            return False
+        self.schedule(t, DEPARTURE, teller)
+        return True
+    
+    def _dispatch(self):
+        bank = self.bank
+        t = bank.clock
+        while bank.can_serve():
+            teller, cust = bank.serve_next()
+            if cust.preemptions:
+                # resuming an interrupted service; the customer was counted
+                # when they were first served
+                self._depart(t + cust.service_time, teller, cust)
+                if self.trace is not None:
+                    self.trace.write(tr.SERVICE, t, tr.trace_id(cust.customer_id),
+                        teller.employee_id)
+                continue
+            
+            wait = cust.wait_time()
+            self.served += 1
+            self.wait_time += wait
+            if self.waits is not None:
+                self.waits.append(wait)
+            if self.wait_stats is not None:
+                self.wait_stats.add(wait)
+            if self.period_waits is not None:
+                self.period_waits.add(cust.arrived_at, wait)
+            self.last_service = t
+            known = self._depart(t + cust.service_time, teller, cust)
+            if self.trace is not None:
+                # the departure is logged as soon as it is known, so each
+                # customer's records sit together rather than in time order
+                cid = tr.trace_id(cust.customer_id)
+                self.trace.write(tr.SERVICE, t, cid, teller.employee_id)
+                if known:
+                    self.trace.write(tr.DEPARTURE, t + cust.service_time, cid,
+                        teller.employee_id)
+    
+    def run(self, until=None):
+        """
+        `run(until)`
+        Runs the simulation until every admitted customer has been served and
+        every teller has finished, or pauses it once every event up to a given
+        time has been handled. A paused simulation can be snapshotted (see
+        snapshot.py) and resumed by calling run again; resuming gives exactly
+        the same results as never having paused.
+        
+        @post   : unless paused, the bank will be closed and its clock left at
+        the time of the final event
+        
+        @param  : self  : the Simulation object to operate upon
+        @param  : until : int/float : the time to pause at, or None to run to
+        completion [default None]
+        @return : Simulation    : this simulation, for chaining
+        """
+        bank = self.bank
+        calendar = self.calendar
+        stats = self.stats
+        
+        if not self._started:
+            self._started = True
+            bank.open()
+            self._next_arrival()
+            if self.close_at is not None:
+                self.schedule(self.close_at, CLOSE)
+            for start, n_tellers in self.shifts or ():
+                self.schedule(start, SHIFT, n_tellers)
+        
+        while calendar:
+            t = calendar[0][0]
+            if until is not None and t > until:
+                return self
+            bank.clock = t
+            if bank.deadlines:
+                self._renege()
+            
+            # handle every event at this instant before serving anyone
+            while calendar and calendar[0][0] == t:
+                _, kind, _, payload = heappop(calendar)
+                if stats is None:
+                    self._handle(kind, payload)
+                else:
+                    t0 = clock()
+                    self._handle(kind, payload)
+                    stats.add_time(PHASES[kind], clock() - t0)
+                self.events += 1
+            
+            if stats is None:
+                self._dispatch()
+            else:
+                served = self.served
+                t0 = clock()
+                self._dispatch()
+                stats.add_time('dispatch', clock() - t0, self.served - served)
+                stats.count('instants')
+                stats.gauge('queue_length', len(bank.customers))
+                stats.gauge('utilization', bank.utilization())
+        
+        bank.close()
+        return self
+    
+    def is_finished(self):
+        return self._started and not self.calendar
+    
+    def __getstate__(self):
+        # an open trace file cannot travel with a snapshot; attach a new one
+        # after restoring
+        state = self.__dict__.copy()
+        state['trace'] = None
+        return state
+    
+    def average_wait_time(self):
+        """
+        `average_wait_time()`
+        Returns the mean time served customers spent waiting in line
+        
+        @param  : self  : the Simulation object to operate upon
+        @return : float : the average wait time, or 0 if nobody was served
+        """
+        return self.wait_time / self.served if self.served else 0
@@ -0,0 +1,142 @@
+#
+# `erlang.py`
+# Closed-form steady-state results for M/M/c banks (Erlang C)
+#
+# Written by Joshua Paul A. Chan
+
+import math
+
+def erlang_b(c, load):
+    """
+    `erlang_b(c, load)`
+    The probability that an arrival finds all c servers busy in a loss
+    system, by the recursion B(k) = load B(k-1) / (k + load B(k-1)). Every
+    step stays between 0 and 1, so unlike the textbook formula with load^c / c!
+    it neither overflows nor loses precision for thousands of tellers.
+    
+    @pre    : c must be a non-negative int and load non-negative
+    
+    @param  : c     : int   : the number of servers
+    @param  : load  : float : the offered load, arrival rate / service rate
+    @return : float : the blocking probability
+    """
+    assert type(c) == int and c >= 0
+    assert load >= 0
+    b = 1.0
+    for k in range(1, c + 1):
+        b = load * b / (k + load * b)
+    return b
+
+def erlang_c(c, load):
+    """
+    `erlang_c(c, load)`
+    The probability that an arrival has to wait in an M/M/c queue
+    
+    @pre    : c must be a positive int
+    
+    @param  : c     : int   : the number of tellers
+    @param  : load  : float : the offered load, arrival rate / service rate
+    @return : float : the probability of waiting; 1 if the queue is unstable
+    """
+    assert type(c) == int and c > 0
+    if load >= c:
+        return 1.0
+    b = erlang_b(c, load)
+    return c * b / (c - load * (1 - b))
+
+class MMc(object):
+    """
+    `MMc`
+    A bank with Poisson arrivals, exponential service times, c tellers and a
+    single first-come, first-served line, in steady state. Waits are zero
+    with probability 1 - C and otherwise exponential with rate c mu - lambda,
+    where C is the Erlang C probability of waiting.
+    
+    @attr   : arrival_rate  : float : lambda, mean arrivals per unit time
+    @attr   : service_rate  : float : mu, mean services per teller per unit time
+    @attr   : c             : int   : the number of tellers
+    
+    @method : load              : float : the offered load lambda / mu
+    @method : utilization       : float : the fraction of time a teller is busy
+    @method : is_stable         : bool  : whether the line stays finite
+    @method : wait_probability  : float : the chance an arrival has to wait
+    @method : mean_wait         : float : the mean wait in line
+    @method : wait_quantile     : float : a quantile of the wait in line
+    @method : mean_queue_length : float : the mean number waiting in line
+    @method : metrics           : dict  : waits keyed like staffing.METRICS
+    """
+    
+    def __init__(self, arrival_rate, service_rate, c):
+        assert arrival_rate > 0
+        assert service_rate > 0
+        assert type(c) == int and c > 0
+        self.arrival_rate = arrival_rate
+        self.service_rate = service_rate
+        self.c = c
+        self._c = erlang_c(c, self.load())
+    
+    def load(self):
+        return self.arrival_rate / self.service_rate
+    
+    def utilization(self):
+        return min(self.load() / self.c, 1.0)
+    
+    def is_stable(self):
+        return self.load() < self.c
+    
+    def wait_probability(self):
+        return self._c
+    
+    def mean_wait(self):
+        if not self.is_stable():
+            return math.inf
+        return self._c / (self.c * self.service_rate - self.arrival_rate)
+    
+    def wait_quantile(self, q):
+        """
+        `wait_quantile(q)`
+        The time within which a fraction q of customers start service
+        
+        @pre    : q must be between 0 and 1
+        
+        @param  : self  : the MMc object to operate upon
+        @param  : q     : float : the quantile
+        @return : float : the q-quantile of the wait in line
+        """
+        assert 0 <= q <= 1
+        if not self.is_stable():
+            return math.inf
+        if q <= 1 - self._c:
+            return 0.0
+        if q == 1:
+            return math.inf
+        return math.log(self._c / (1 - q)) / (self.c * self.service_rate - self.arrival_rate)
+    
+    def mean_queue_length(self):
+        # Little's law
+        return self.arrival_rate * self.mean_wait()
+    
+    def metrics(self):
+        """
+        `metrics()`
+        The steady-state wait metrics. The longest wait is unbounded, so
+        'max' is infinite.
+        
+        @param  : self  : the MMc object to operate upon
+        @return : dict  : metric name -> value
+        """
+        return {
+            'mean': self.mean_wait(),
+            'p50': self.wait_quantile(0.50),
+            'p90': self.wait_quantile(0.90),
+            'p95': self.wait_quantile(0.95),
+            'p99': self.wait_quantile(0.99),
+            'max': math.inf,
+        }
+    
+    def __str__(self):
+        return "<MMc lambda='{}' mu='{}' c='{}' />".format(
+            self.arrival_rate, self.service_rate, self.c)
+    
+    def __repr__(self):
+        return str(self)
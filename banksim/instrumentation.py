@@ -0,0 +1,115 @@
+#
+# `instrumentation.py`
+# Per-phase timers, counters and gauges for the simulation loops
+#
+# Written by Joshua Paul A. Chan
+
+from time import perf_counter as clock
+
+class Stats(object):
+    """
+    `Stats`
+    Collects where a simulation spends its time. The tick loop and the
+    next-event engine take an optional Stats object; when none is given they
+    skip every measurement behind a single `is not None` check, so leaving
+    instrumentation off costs next to nothing.
+    
+    Phases are timed a block at a time (e.g. every receive_customer call in
+    a tick together) and told how many calls the block made, so timing does
+    not add a clock read per customer.
+    
+    @attr   : timers    : dict  : phase -> [total seconds, calls]
+    @attr   : counters  : dict  : name -> count
+    @attr   : gauges    : dict  : name -> [samples, sum, max, last value]
+    
+    @method : add_time  : none  : adds time spent in a phase
+    @method : count     : none  : increments a counter
+    @method : gauge     : none  : records a sample of a gauge
+    @method : breakdown : list  : per-phase totals, largest first
+    @method : report    : str   : a printable summary
+    """
+    
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.gauges = {}
+    
+    def add_time(self, phase, seconds, calls=1):
+        """
+        `add_time(phase, seconds, calls)`
+        Adds time spent in a phase
+        
+        @param  : self      : the Stats object to operate upon
+        @param  : phase     : str   : the name of the phase
+        @param  : seconds   : float : the time spent
+        @param  : calls     : int   : how many calls that time covers [default 1]
+        @return : none
+        """
+        timer = self.timers.get(phase)
+        if timer is None:
+            timer = self.timers[phase] = [0.0, 0]
+        timer[0] += seconds
+        timer[1] += calls
+    
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+    
+    def gauge(self, name, value):
+        """
+        `gauge(name, value)`
+        Records one sample of a quantity that goes up and down, such as the
+        length of the line
+        
+        @param  : self  : the Stats object to operate upon
+        @param  : name  : str       : the name of the gauge
+        @param  : value : int/float : the current value
+        @return : none
+        """
+        g = self.gauges.get(name)
+        if g is None:
+            g = self.gauges[name] = [0, 0, value, value]
+        g[0] += 1
+        g[1] += value
+        if value > g[2]:
+            g[2] = value
+        g[3] = value
+    
+    def breakdown(self):
+        """
+        `breakdown()`
+        Totals for every timed phase, the most expensive first
+        
+        @param  : self  : the Stats object to operate upon
+        @return : list  : (phase, seconds, calls, share of timed seconds)
+        """
+        total = sum(t for t, _ in self.timers.values()) or 1
+        return sorted(
+            ((phase, t, calls, t / total) for phase, (t, calls) in self.timers.items()),
+            key=lambda row: -row[1]
+        )
+    
+    def report(self):
+        """
+        `report()`
+        A printable summary of every phase, counter and gauge
+        
+        @param  : self  : the Stats object to operate upon
+        @return : str   : the summary
+        """
+        lines = ["{:<24} {:>10} {:>12} {:>10} {:>7}".format(
+            "phase", "seconds", "calls", "ns/call", "share")]
+        for phase, t, calls, share in self.breakdown():
+            lines.append("{:<24} {:>10.4f} {:>12} {:>10.0f} {:>6.1%}".format(
+                phase, t, calls, 1e9 * t / calls if calls else 0, share))
+        for name, n in sorted(self.counters.items()):
+            lines.append("{:<24} {:>10}".format(name, n))
+        for name, (n, total, peak, last) in sorted(self.gauges.items()):
+            lines.append("{:<24} mean={:<12.4g} max={:<12.4g} samples={}".format(
+                name, total / n, peak, n))
+        return "\n".join(lines)
+    
+    def __str__(self):
+        return "<Stats phases='{}' />".format(sorted(self.timers))
+    
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,332 @@
+#
+# `lines.py`
+# A bank where every teller has their own line, as at a row of windows
+#
+# Written by Joshua Paul A. Chan
+
+import random
+from itertools import chain
+from heapq import heappush, heappop
+
+from .bank import Bank
+from .customer import Customer
+from .teller import Teller
+from .reception_queue import ReceptionQueue, FIFO
+
+# how arriving customers pick a line
+SHORTEST = 'shortest'
+RANDOM = 'random'
+TWO_CHOICES = 'two'
+
+POLICIES = (SHORTEST, RANDOM, TWO_CHOICES)
+
+# a customer at the back of a line moves once another window has this many
+# fewer customers at it
+JOCKEY_GAP = 2
+
+class LoadIndex(object):
+    """
+    `LoadIndex`
+    The number of customers at each window (waiting or being served), with
+    the least and most loaded windows kept at the root of a tournament tree.
+    Changing one window's count replays the O(log T) matches above it, so
+    finding the shortest line stays cheap with hundreds of windows. Ties go
+    to the lowest-numbered window.
+    
+    @attr   : values    : int[] : the number of customers at each window
+    
+    @method : add       : none  : changes a window's count
+    @method : shortest  : int   : the least loaded window
+    @method : longest   : int   : the most loaded window
+    """
+    
+    def __init__(self, values):
+        self.values = list(values)
+        size = 1
+        while size < len(self.values):
+            size *= 2
+        self._size = size
+        
+        # leaves hold window numbers; those past the last window are padding
+        self._min = [0] * size + list(range(size))
+        self._max = list(self._min)
+        for k in range(size - 1, 0, -1):
+            self._pull(k)
+    
+    def _pull(self, k):
+        v = self.values
+        n = len(v)
+        a, b = self._min[2 * k], self._min[2 * k + 1]
+        self._min[k] = a if b >= n or (a < n and v[a] <= v[b]) else b
+        a, b = self._max[2 * k], self._max[2 * k + 1]
+        self._max[k] = a if b >= n or (a < n and v[a] >= v[b]) else b
+    
+    def add(self, i, d):
+        self.values[i] += d
+        k = (i + self._size) // 2
+        while k:
+            self._pull(k)
+            k //= 2
+    
+    def shortest(self):
+        return self._min[1]
+    
+    def longest(self):
+        return self._max[1]
+    
+    def __getitem__(self, i):
+        return self.values[i]
+    
+    def __len__(self):
+        return len(self.values)
+
+class Lines(object):
+    """
+    `Lines`
+    One ReceptionQueue per teller. Stands in for a Bank's single line, so
+    len() counts everyone waiting and set_discipline() reorders every line.
+    
+    @attr   : discipline    : str               : the discipline of every line
+    @attr   : lines         : ReceptionQueue[]  : the line at each window
+    
+    @method : insert_customer   : none      : adds a customer to a line
+    @method : get_next_customer : Customer  : takes the next customer in a line
+    @method : get_last_customer : Customer  : takes the last customer in a line
+    @method : set_discipline    : none      : reorders every line
+    @method : resize            : Customer[]: adds or removes lines
+    """
+    
+    def __init__(self, n_lines, discipline=FIFO):
+        self.discipline = discipline
+        self.lines = [ReceptionQueue(discipline) for _ in range(n_lines)]
+        self._waiting = 0
+    
+    def insert_customer(self, cust, i):
+        self.lines[i].insert_customer(cust)
+        self._waiting += 1
+    
+    def get_next_customer(self, i):
+        cust = self.lines[i].get_next_customer()
+        self._waiting -= 1
+        return cust
+    
+    def get_last_customer(self, i):
+        cust = self.lines[i].get_last_customer()
+        self._waiting -= 1
+        return cust
+    
+    def set_discipline(self, discipline):
+        for line in self.lines:
+            line.set_discipline(discipline)
+        self.discipline = discipline
+    
+    def resize(self, n_lines):
+        """
+        `resize(n_lines)`
+        Opens new, empty lines or closes the highest-numbered ones
+        
+        @param  : self      : the Lines object to operate upon
+        @param  : n_lines   : int   : the number of lines to keep
+        @return : Customer[]    : the customers from closed lines, in the
+        order they would have been served
+        """
+        displaced = []
+        for line in self.lines[n_lines:]:
+            while len(line) > 0:
+                displaced.append(line.get_next_customer())
+        del self.lines[n_lines:]
+        self.lines.extend(ReceptionQueue(self.discipline)
+            for _ in range(len(self.lines), n_lines))
+        self._waiting -= len(displaced)
+        return displaced
+    
+    def __getitem__(self, i):
+        return self.lines[i]
+    
+    def __iter__(self):
+        return chain.from_iterable(self.lines)
+    
+    def __len__(self):
+        return self._waiting
+    
+    def __str__(self):
+        return "<Lines lengths='{}' />".format([len(line) for line in self.lines])
+    
+    def __repr__(self):
+        return str(self)
+
+class MultiLineBank(Bank):
+    """
+    `MultiLineBank`
+    A Bank where each teller serves only their own line. Arriving customers
+    pick a line by a policy:
+        
+        'shortest'  the window with the fewest customers at it (join the
+                    shortest queue), found in O(1) from a LoadIndex
+        'random'    any window, uniformly
+        'two'       the less loaded of two random windows (power of two
+                    choices), which gets most of the benefit of 'shortest'
+                    while only looking at two lines
+    
+    With jockeying, whenever one window has JOCKEY_GAP more customers than
+    another, the customer at the back of the longer line moves to the back of
+    the shorter one, keeping their original arrival time.
+    
+    # inherited from Bank
+    @attr   : tellers   : Teller[]  : List of tellers
+    @attr   : operating : bool      : Whether this bank is open
+    @attr   : clock     : int/float : The current simulation time
+    @attr   : busy      : tuple[]   : Min-heap of (completion time, teller
+    index) for tellers serving a customer
+    
+    # overrided/defined in-class
+    @attr   : customers : Lines     : The line at each teller
+    @attr   : free      : set       : The indices of idle tellers
+    @attr   : policy    : str       : How customers choose a line, one of
+    POLICIES
+    @attr   : jockey    : bool      : Whether customers change lines
+    @attr   : rng       : random.Random : The source of randomness for choosing
+    lines
+    @attr   : load      : LoadIndex : Customers waiting or in service at each
+    window
+    @attr   : jockeyed  : int       : How many times a customer changed lines
+    
+    @method : choose_line   : int   : Picks the line for an arriving customer
+    """
+    
+    def __init__(self, n_tellers=1, discipline=FIFO, policy=SHORTEST,
+            jockey=False, rng=None):
+        """
+        `MultiLineBank(n_tellers, discipline, policy, jockey, rng)`
+        Constructs a new MultiLineBank
+        
+        @pre    : policy must be one of POLICIES
+        
+        @param  : self      : the MultiLineBank object to operate upon
+        @param  : n_tellers : int   : the number of tellers [default 1]
+        @param  : discipline: str   : the discipline of every line [default
+        'fifo']
+        @param  : policy    : str   : how customers choose a line [default
+        'shortest']
+        @param  : jockey    : bool  : let customers change lines [default
+        False]
+        @param  : rng       : random.Random : the source of randomness for the
+        'random' and 'two' policies [default None, a fresh Random]
+        @return : none
+        """
+        assert policy in POLICIES
+        super().__init__(n_tellers, discipline)
+        
+        self.customers = Lines(n_tellers, discipline)
+        self.free = set(range(n_tellers))
+        self.policy = policy
+        self.jockey = jockey
+        self.rng = rng if rng is not None else random.Random()
+        self.load = LoadIndex([0] * n_tellers)
+        self.jockeyed = 0
+        
+        # tellers that are idle with someone in their line, lowest first; an
+        # entry may have gone stale and is checked before it is used
+        self._ready = []
+    
+    def choose_line(self):
+        n = len(self.tellers)
+        if self.policy == SHORTEST or n == 1:
+            return self.load.shortest()
+        i = int(self.rng.random() * n)
+        if self.policy == RANDOM:
+            return i
+        j = int(self.rng.random() * (n - 1))
+        if j >= i:
+            j += 1
+        return i if (self.load[i], i) <= (self.load[j], j) else j
+    
+    def _join(self, i, cust):
+        self.customers.insert_customer(cust, i)
+        self.load.add(i, 1)
+        if i in self.free:
+            heappush(self._ready, i)
+    
+    def _rebalance(self):
+        # move customers from the back of the longest line until no window is
+        # JOCKEY_GAP customers ahead of another
+        load = self.load
+        while True:
+            j, i = load.longest(), load.shortest()
+            if load[j] - load[i] < JOCKEY_GAP:
+                return
+            cust = self.customers.get_last_customer(j)
+            load.add(j, -1)
+            self._join(i, cust)
+            self.jockeyed += 1
+    
+    def receive_customer(self, cust):
+        assert isinstance(cust, Customer)
+        if not self.is_open():
+            raise Exception("Cannot visit a bank that is closed.")
+        else:
+            cust.arrived_at = self.clock
+            self._join(self.choose_line(), cust)
+            if self.jockey:
+                self._rebalance()
+            return True
+    
+    def update(self):
+        # Tellers finish servicing once the clock reaches their completion
+        # time, and may then draw customers over from longer lines
+        while self.busy and self.busy[0][0] <= self.clock:
+            _, i = heappop(self.busy)
+            if i < len(self.tellers):
+                self.tellers[i].set_available(True)
+                self.free.add(i)
+                self.load.add(i, -1)
+                if len(self.customers[i]) > 0:
+                    heappush(self._ready, i)
+        if self.jockey:
+            self._rebalance()
+    
+    def can_serve(self):
+        ready = self._ready
+        while ready:
+            i = ready[0]
+            if i in self.free and len(self.customers[i]) > 0:
+                return True
+            heappop(ready)
+        return False
+    
+    def serve_next(self):
+        # The lowest-numbered idle teller with someone in their line serves
+        # the next customer in it
+        assert self.can_serve()
+        i = heappop(self._ready)
+        self.free.discard(i)
+        teller = self.tellers[i]
+        cust = self.customers.get_next_customer(i)
+        teller.serve(cust, self.clock)
+        heappush(self.busy, (self.clock + cust.service_time, i))
+        return teller, cust
+    
+    def set_tellers(self, n_tellers):
+        # New tellers open new lines. Customers in the lines of tellers who
+        # leave choose a line again, in the order they would have been served
+        assert type(n_tellers) == int
+        assert n_tellers > 0
+        finishing = {i for _, i in self.busy} if n_tellers > len(self.tellers) else ()
+        for i in range(len(self.tellers), n_tellers):
+            teller = Teller(str(i).zfill(3), employee_id=i)
+            self.tellers.append(teller)
+            if i in finishing:
+                teller.set_available(False)
+            else:
+                self.free.add(i)
+        displaced = self.customers.resize(n_tellers)
+        if n_tellers < len(self.tellers):
+            del self.tellers[n_tellers:]
+            self.free = {i for i in self.free if i < n_tellers}
+        
+        self.load = LoadIndex(len(self.customers[i]) + (i not in self.free)
+            for i in range(n_tellers))
+        for cust in displaced:
+            self._join(self.choose_line(), cust)
+        if self.jockey:
+            self._rebalance()
@@ -0,0 +1,362 @@
+#
+# `priority.py`
+# Priority classes derived from why customers visit the bank
+#
+# Written by Joshua Paul A. Chan
+
+from collections import deque
+from heapq import heapify, heappush, heappop
+from itertools import chain
+
+from .bank import Bank
+from .customer import Customer
+from .streaming import WaitStats
+
+class ClassQueue(object):
+    """
+    `ClassQueue`
+    A waiting line split into priority classes by visit purpose. Each class
+    is its own FIFO line, and a bitmap records which classes have anyone
+    waiting, so the best waiting class is its lowest set bit. Joining and
+    leaving are O(1) however many customers are waiting.
+    
+    With aging, waiting `aging` time units is worth one class: a class k
+    customer who arrived at time a ranks as a + k * aging, and the lowest
+    rank is served first. A customer's rank does not change as they wait,
+    so only the head of each class needs comparing (O(classes)), and nobody
+    is overtaken by a customer who arrived more than (classes - 1) * aging
+    after them.
+    
+    @attr   : classes   : tuple     : the visit purposes in each class, best
+    first; purposes not listed are in the last class
+    @attr   : aging     : float     : time waited that is worth one class, or
+    None for strict priority
+    
+    @method : class_of          : int       : the class a customer is in
+    @method : rank              : float     : where a customer is served
+    relative to others, lowest first
+    @method : insert_customer   : none      : adds a customer to their class
+    @method : requeue           : none      : puts a customer back at the
+    front of their class
+    @method : get_next_customer : Customer  : takes the next customer to serve
+    @method : get_last_customer : Customer  : takes the customer who would be
+    served last
+    """
+    
+    def __init__(self, classes, aging=None):
+        """
+        `ClassQueue(classes, aging)`
+        Constructs a new, empty ClassQueue
+        
+        @pre    : there must be at least one class
+        @pre    : aging, if given, must be positive
+        
+        @param  : self      : the ClassQueue object to operate upon
+        @param  : classes   : list  : lists of visit purposes, best class first
+        @param  : aging     : float : time waited that is worth one class
+        [default None]
+        @return : none
+        """
+        assert len(classes) > 0
+        assert aging is None or aging > 0
+        
+        self.classes = tuple(tuple(c) for c in classes)
+        self.aging = aging
+        self._rank = {p: k for k, purposes in enumerate(self.classes) for p in purposes}
+        self._lines = [deque() for _ in self.classes]
+        self._bitmap = 0
+        self._waiting = 0
+    
+    def class_of(self, cust):
+        return self._rank.get(cust.visit_purpose, len(self.classes) - 1)
+    
+    def rank(self, cust):
+        # the order customers are served in: by class, or with aging by
+        # arrival time plus aging per class
+        k = self.class_of(cust)
+        return k if self.aging is None else cust.arrived_at + k * self.aging
+    
+    def insert_customer(self, cust):
+        """
+        `insert_customer(cust)`
+        Adds a customer to the back of their class
+        
+        @pre    : cust must be a Customer that has not been served
+        
+        @param  : self  : the ClassQueue object to operate upon
+        @param  : cust  : Customer  : the customer
+        @return : none
+        """
+        assert isinstance(cust, Customer)
+        assert not cust.was_served()
+        
+        k = self.class_of(cust)
+        self._lines[k].append(cust)
+        self._bitmap |= 1 << k
+        self._waiting += 1
+    
+    def requeue(self, cust):
+        # a preempted customer goes back to the front of their class
+        k = self.class_of(cust)
+        self._lines[k].appendleft(cust)
+        self._bitmap |= 1 << k
+        self._waiting += 1
+    
+    def _take(self, k, last=False):
+        line = self._lines[k]
+        cust = line.pop() if last else line.popleft()
+        if not line:
+            self._bitmap &= ~(1 << k)
+        self._waiting -= 1
+        return cust
+    
+    def get_next_customer(self):
+        """
+        `get_next_customer()`
+        Takes the next customer to serve: the head of the best waiting class,
+        or with aging the class head with the lowest rank
+        
+        @pre    : the queue must have customers in it, otherwise an IndexError
+        will be raised
+        
+        @param  : self      : the ClassQueue object to operate upon
+        @return : Customer  : the next customer
+        """
+        bitmap = self._bitmap
+        if not bitmap:
+            raise IndexError("get_next_customer from an empty queue")
+        k = (bitmap & -bitmap).bit_length() - 1
+        if self.aging is not None:
+            aging = self.aging
+            best = self._lines[k][0].arrived_at + k * aging
+            rest = bitmap & (bitmap - 1)
+            while rest:
+                j = (rest & -rest).bit_length() - 1
+                rank = self._lines[j][0].arrived_at + j * aging
+                if rank < best:
+                    k, best = j, rank
+                rest &= rest - 1
+        return self._take(k)
+    
+    def get_last_customer(self):
+        """
+        `get_last_customer()`
+        Takes the newest customer in the worst waiting class
+        
+        @pre    : the queue must have customers in it, otherwise an IndexError
+        will be raised
+        
+        @param  : self      : the ClassQueue object to operate upon
+        @return : Customer  : the customer at the back of the line
+        """
+        if not self._bitmap:
+            raise IndexError("get_last_customer from an empty queue")
+        return self._take(self._bitmap.bit_length() - 1, last=True)
+    
+    def __iter__(self):
+        return chain.from_iterable(self._lines)
+    
+    def __len__(self):
+        return self._waiting
+    
+    def __str__(self):
+        return "<ClassQueue lengths='{}' />".format([len(line) for line in self._lines])
+    
+    def __repr__(self):
+        return str(self)
+
+class PriorityBank(Bank):
+    """
+    `PriorityBank`
+    A Bank whose line is a ClassQueue, reporting waits per class
+    
+    In preemptive mode a customer who arrives to find every teller busy takes
+    over the teller serving the worst-ranked customer (see ClassQueue), if
+    they rank below the new arrival; among equals the most recently started
+    service is interrupted. Tellers finishing at the moment of arrival are
+    freed first, so nobody is bumped while a teller is free. The interrupted
+    service's entry in `busy` is skipped when it surfaces rather than
+    searched for, so an interruption costs O(log tellers).
+    The interrupted customer goes back to the front of their class and later
+    finishes the rest of their service (preemptive resume). Their wait is the
+    time before they were first served; the time they spend back in line is
+    added to their class's `interrupted` total.
+    
+    # inherited from Bank
+    @attr   : tellers   : Teller[]  : List of tellers
+    @attr   : free      : int[]     : Min-heap of the indices of idle tellers
+    @attr   : busy      : tuple[]   : Min-heap of (completion time, teller
+    index) for tellers serving a customer
+    
+    # overrided/defined in-class
+    @attr   : customers     : ClassQueue    : the line, split into classes
+    @attr   : preemptive    : bool          : whether arrivals interrupt
+    worse classes
+    @attr   : class_stats   : WaitStats[]   : the waits of each class
+    @attr   : preempted     : int[]         : services interrupted, per class
+    @attr   : interrupted   : float[]       : time interrupted customers spent
+    back in line, per class
+    @attr   : last_preempted    : tuple     : (customer, teller index) whose
+    service the latest arrival interrupted, or None
+    
+    @method : class_metrics : dict  : class name -> wait metrics
+    """
+    
+    def __init__(self, n_tellers=1, classes=(('other',),), preemptive=False,
+            aging=None):
+        """
+        `PriorityBank(n_tellers, classes, preemptive, aging)`
+        Constructs a new PriorityBank
+        
+        @param  : self          : the PriorityBank object to operate upon
+        @param  : n_tellers     : int   : the number of tellers [default 1]
+        @param  : classes       : list  : lists of visit purposes, best class
+        first [default one class]
+        @param  : preemptive    : bool  : let arrivals interrupt worse classes
+        [default False]
+        @param  : aging         : float : time waited that is worth one class
+        [default None]
+        @return : none
+        """
+        super().__init__(n_tellers)
+        
+        self.customers = ClassQueue(classes, aging)
+        self.preemptive = preemptive
+        n_classes = len(self.customers.classes)
+        self.class_stats = [WaitStats() for _ in range(n_classes)]
+        self.preempted = [0] * n_classes
+        self.interrupted = [0] * n_classes
+        
+        # who each teller is serving, and a lazy max-heap of (-rank,
+        # -order started, completion time, teller index, customer) to find who
+        # to interrupt; entries for finished services are skipped
+        self._serving = [None] * n_tellers
+        self.last_preempted = None
+        self._services = []
+        self._started = 0
+        self._bumped = {}
+        # busy entries of interrupted services, by how many copies to skip;
+        # they are dropped as they surface rather than searched for
+        self._stale = {}
+    
+    def serve_next(self):
+        # The lowest-numbered idle teller serves the next customer by class.
+        # A preempted customer resumes with the service time they had left
+        assert self.has_free_teller()
+        i = heappop(self.free)
+        teller = self.tellers[i]
+        cust = self.customers.get_next_customer()
+        k = self.customers.class_of(cust)
+        if cust.preemptions:
+            first = cust.served_at
+            teller.serve(cust, self.clock)
+            cust.served_at = first
+            self.interrupted[k] += self.clock - self._bumped.pop(cust)
+        else:
+            teller.serve(cust, self.clock)
+            self.class_stats[k].add(cust.wait_time())
+        
+        until = self.clock + cust.service_time
+        heappush(self.busy, (until, i))
+        if self.preemptive:
+            self._serving[i] = cust
+            self._started += 1
+            heappush(self._services, (-self.customers.rank(cust), -self._started,
+                until, i, cust))
+            if len(self._services) > 2 * len(self.tellers) + 16:
+                self._services = [s for s in self._services if self._in_service(s)]
+                heapify(self._services)
+        return teller, cust
+    
+    def _in_service(self, service):
+        _, _, until, i, cust = service
+        return (i < len(self.tellers) and self._serving[i] is cust
+            and not self.tellers[i].is_available() and until > self.clock)
+    
+    def _preempt(self, cust):
+        services = self._services
+        while services and not self._in_service(services[0]):
+            heappop(services)
+        if not services or -services[0][0] <= self.customers.rank(cust):
+            return
+        _, _, until, i, victim = heappop(services)
+        self._stale[(until, i)] = self._stale.get((until, i), 0) + 1
+        self._serving[i] = None
+        self.tellers[i].set_available(True)
+        heappush(self.free, i)
+        
+        self.last_preempted = (victim, i)
+        victim.served = False
+        victim.service_time = until - self.clock
+        victim.preemptions += 1
+        self.preempted[self.customers.class_of(victim)] += 1
+        self._bumped[victim] = self.clock
+        self.customers.requeue(victim)
+    
+    def receive_customer(self, cust):
+        # tellers finishing at this moment are free before anyone is bumped
+        self.last_preempted = None
+        super().receive_customer(cust)
+        if self.preemptive:
+            self.update()
+            if not self.free:
+                self._preempt(cust)
+        return True
+    
+    def update(self):
+        # Tellers finish servicing once the clock reaches their completion
+        # time; entries left behind by interrupted services are skipped
+        stale = self._stale
+        while self.busy and self.busy[0][0] <= self.clock:
+            entry = heappop(self.busy)
+            if entry in stale:
+                stale[entry] -= 1
+                if not stale[entry]:
+                    del stale[entry]
+                continue
+            i = entry[1]
+            if i < len(self.tellers):
+                self.tellers[i].set_available(True)
+                heappush(self.free, i)
+    
+    def utilization(self):
+        # the busy fraction of the tellers at work, not counting interrupted
+        # services that have yet to surface
+        n = len(self.tellers)
+        busy = len(self.busy) - sum(self._stale.values())
+        leaving = (sum(1 for _, i in self.busy if i >= n)
+            - sum(c for (_, i), c in self._stale.items() if i >= n))
+        return busy / (n + leaving)
+    
+    def set_tellers(self, n_tellers):
+        # drop interrupted services first, so they do not count as finishing
+        if self._stale:
+            stale, live = self._stale, []
+            for entry in self.busy:
+                if stale.get(entry):
+                    stale[entry] -= 1
+                else:
+                    live.append(entry)
+            heapify(live)
+            self.busy = live
+            self._stale = {}
+        super().set_tellers(n_tellers)
+        self._serving = (self._serving + [None] * n_tellers)[:n_tellers]
+    
+    def class_metrics(self):
+        """
+        `class_metrics()`
+        The wait metrics of every class, named by their visit purposes
+        
+        @param  : self  : the PriorityBank object to operate upon
+        @return : dict  : class name -> WaitStats.metrics() plus 'n' customers
+        served, 'preempted' services and 'interrupted' time
+        """
+        out = {}
+        for k, purposes in enumerate(self.customers.classes):
+            m = self.class_stats[k].metrics()
+            m['n'] = self.class_stats[k].n
+            m['preempted'] = self.preempted[k]
+            m['interrupted'] = self.interrupted[k]
+            out[",".join(purposes)] = m
+        return out
@@ -3,29 +3,87 @@
 # 
 # Written by Joshua Paul A. Chan
 
+from collections import deque
+from heapq import heapify, heappush, heappop
+
 from .customer import Customer
 
+# queue disciplines understood by ReceptionQueue
+FIFO = 'fifo'
+LIFO = 'lifo'
+PRIORITY = 'priority'
+SJF = 'sjf'
+
+DISCIPLINES = (FIFO, LIFO, PRIORITY, SJF)
+
 class ReceptionQueue(object):
     """
     `ReceptionQueue`
     A queue-like object that models the waiting line for the bank
     
     # overrided/defined in-class
-    @attr   : customers         : Customer[]   : A non-capped list of customers
-    waiting to be served
+    @attr   : discipline        : str           : The order customers are served
+    in, one of 'fifo', 'lifo', 'priority' or 'sjf' (shortest job first)
+    @attr   : customers         : deque         : A non-capped FIFO line of
+    customers waiting to be served (only used by the 'fifo' discipline)
 
     @method : insert_customer   : None          : Inserts a customer into the
     waiting line
     @method : get_next_customer : Customer      : Gets the next customer that needs
     to be served
+    @method : get_last_customer : Customer      : Takes the customer at the
+    back of the line out of it
+    @method : withdraw_customer : None          : Marks a waiting customer as
+    having left the line
+    @method : set_discipline    : None          : Reorders the line under a new
+    discipline
     @method : __str__           : str           : returns a string
     representation of the ReceptionQueue instance
     @method : __repr__          : str           : returns a string
     representation of the ReceptionQueue instance (wraps __str__)
     """
     
-    def __init__(self):
-        self.customers = []
+    def __init__(self, discipline=FIFO):
+        """
+        `ReceptionQueue(discipline)`
+        Constructs a new, empty ReceptionQueue
+        
+        @pre    : discipline must be one of DISCIPLINES
+        @post   : 'fifo' lines are backed by a deque; 'lifo', 'priority' and
+        'sjf' lines are backed by a binary heap. Insertion and retrieval are
+        O(1) and O(log n) respectively.
+        
+        @param  : self          : the ReceptionQueue object to operate upon
+        @param  : discipline    : str   : the queue discipline [default 'fifo']
+        @return : none
+        """
+        assert discipline in DISCIPLINES
+        
+        self.discipline = discipline
+        self.customers = deque()
+        self._heap = []
+        self._seq = 0
+        
+        # customers who left the line but have not reached its front yet
+        self._gone = 0
+    
+    def _key(self, cust):
+        """
+        `_key(cust)`
+        Computes the heap ordering key of a customer under this queue's
+        discipline. Ties are broken by arrival order.
+        
+        @param  : self  : ReceptionQueue    : the ReceptionQueue object
+        @param  : cust  : Customer          : the customer to compute a key for
+        @return : tuple : the heap key
+        """
+        self._seq += 1
+        if self.discipline == LIFO:
+            return (-self._seq,)
+        elif self.discipline == PRIORITY:
+            return (cust.priority, self._seq)
+        else:
+            return (cust.service_time, self._seq)
     
     def insert_customer(self, cust):
         """
@@ -36,7 +94,7 @@ class ReceptionQueue(object):
         into the queue
         @pre    : The Customer object must not have been served previously
         @post   : [success] The Customer will be inserted into the customer list
-        following some criteria (tending towards FIFO behavior)
+        following the queue's discipline
         @post   : [error] AssertionErrors will be rasied
         
         @param  : self  : ReceptionQueue    : The ReceptionQueue instance to add
@@ -47,8 +105,10 @@ class ReceptionQueue(object):
         assert isinstance(cust, Customer)
         assert not cust.was_served()
         
-        # FIFO
-        self.customers.append(cust)
+        if self.discipline == FIFO:
+            self.customers.append(cust)
+        else:
+            heappush(self._heap, (self._key(cust), cust))
     
     def get_next_customer(self):
         """
@@ -64,8 +124,112 @@ class ReceptionQueue(object):
         @param  : self      : the ReceptionQueue object to operate upon
         @return : Customer  : the next customer waiting to be served
         """
-        # FIFO
-        return self.customers.pop(0)
+        if len(self) == 0:
+            raise IndexError("get_next_customer from an empty queue")
+        while True:
+            if self.discipline == FIFO:
+                cust = self.customers.popleft()
+            else:
+                cust = heappop(self._heap)[1]
+            if cust.left_at is None:
+                return cust
+            self._gone -= 1
+    
+    def get_last_customer(self):
+        """
+        `get_last_customer()`
+        Takes the customer who would be served last out of the line, e.g. to
+        move them to a shorter line
+        
+        @pre    : The ReceptionQueue object must have customers in it, otherwise
+        an IndexError will be raised
+        @post   : 'fifo' lines give up their newest customer in O(1); heap-backed
+        lines search for their last customer in O(n)
+        
+        @param  : self      : the ReceptionQueue object to operate upon
+        @return : Customer  : the customer at the back of the line
+        """
+        if len(self) == 0:
+            raise IndexError("get_last_customer from an empty queue")
+        if self.discipline == FIFO:
+            while True:
+                cust = self.customers.pop()
+                if cust.left_at is None:
+                    return cust
+                self._gone -= 1
+        else:
+            if self._gone:
+                self._purge()
+            heap = self._heap
+            i = max(range(len(heap)), key=lambda k: heap[k][0])
+            heap[i], heap[-1] = heap[-1], heap[i]
+            cust = heap.pop()[1]
+            heapify(heap)
+            return cust
+    
+    def withdraw_customer(self, cust, t):
+        """
+        `withdraw_customer(cust, t)`
+        Marks a waiting customer as having left the line, e.g. because they
+        ran out of patience. They keep their place until they reach the front
+        and are skipped there (lazy deletion), so leaving is O(1) instead of a
+        search through the line. Once they outnumber the customers still
+        waiting they are swept out all at once, so the line never holds more
+        than about twice as many customers as are waiting in it.
+        
+        @pre    : cust must be waiting in this line
+        @post   : cust.left_at will be t, and len() will no longer count them
+        
+        @param  : self  : the ReceptionQueue object to operate upon
+        @param  : cust  : Customer  : the customer who left
+        @param  : t     : int/float : the time they left
+        @return : none
+        """
+        assert cust.left_at is None and not cust.was_served()
+        cust.left_at = t
+        self._gone += 1
+        if self._gone >= 32 and self._gone > len(self):
+            self._purge()
+    
+    def _purge(self):
+        # drop the customers who left; O(n), but only after O(n) withdrawals
+        if self.discipline == FIFO:
+            self.customers = deque(c for c in self.customers if c.left_at is None)
+        else:
+            self._heap = [e for e in self._heap if e[1].left_at is None]
+            heapify(self._heap)
+        self._gone = 0
+    
+    def set_discipline(self, discipline):
+        """
+        `set_discipline(discipline)`
+        Switches the line to a different queue discipline, e.g. for a what-if
+        branch. Customers already waiting keep their place in the order they
+        joined the line, which later ties are broken by.
+        
+        @pre    : discipline must be one of DISCIPLINES
+        
+        @param  : self          : the ReceptionQueue object to operate upon
+        @param  : discipline    : str   : the new queue discipline
+        @return : none
+        """
+        assert discipline in DISCIPLINES
+        
+        if self.discipline == FIFO:
+            waiting = list(self.customers)
+        else:
+            # recover the order customers joined in from their sequence numbers
+            joined = (lambda key: -key[0]) if self.discipline == LIFO else (lambda key: key[-1])
+            waiting = [c for _, c in sorted(self._heap, key=lambda e: joined(e[0]))]
+        
+        self.discipline = discipline
+        self.customers = deque()
+        self._heap = []
+        self._seq = 0
+        self._gone = 0
+        waiting = [c for c in waiting if c.left_at is None]
+        for cust in waiting:
+            self.insert_customer(cust)
     
     def __iter__(self):
         """
@@ -73,12 +237,19 @@ class ReceptionQueue(object):
         Allow the ReceptionQueue to be iterated upon in a pythonic way
         
         @pre    : The ReceptionQueue object must be initialized
-        @post   : A iterable object will be returned
+        @post   : A iterable object will be returned. Heap-backed queues are
+        not iterated in service order. Customers who left are skipped.
         
         @param  : self  : the ReceptionQueue object to operate upon
         @return : iter  : an iterable view over the ReceptionQueue's customers
         """
-        return self.customers.__iter__()    
+        if self.discipline == FIFO:
+            waiting = self.customers
+        else:
+            waiting = (cust for _, cust in self._heap)
+        if self._gone:
+            return (cust for cust in waiting if cust.left_at is None)
+        return iter(waiting)
     
     def __len__(self):
         """
@@ -91,7 +262,7 @@ class ReceptionQueue(object):
         @param  : self  : the ReceptionQueue object to operate upon
         @return : int   : the number of Customers waiting in the queue
         """
-        return len(self.customers)
+        return len(self.customers) + len(self._heap) - self._gone
     
     def __str__(self):
         """
@@ -103,7 +274,7 @@ class ReceptionQueue(object):
         @param  : self  : the ReceptionQueue object to operate upon
         @return : str   : a string representation of the reception queue
         """
-        return "<ReceptionQueue>\n{}\n</ReceptionQueue>".format("\n".join(map(lambda c: "    " + str(c), self.customers)))
+        return "<ReceptionQueue>\n{}\n</ReceptionQueue>".format("\n".join(map(lambda c: "    " + str(c), self)))
     
     def __repr__(self):
         """
@@ -0,0 +1,297 @@
+#
+# `replication.py`
+# Runs independent, seeded replications of a Scenario across a process pool
+#
+# Written by Joshua Paul A. Chan
+
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from .cache import cached_map, result_key
+from .scenario import Scenario
+
+def replication_seeds(seed, n):
+    """
+    `replication_seeds(seed, n)`
+    Derives the seed of every replication from a master seed. Replication i
+    always gets the same seed, however the work is split between workers.
+    
+    @param  : seed  : int   : the master seed
+    @param  : n     : int   : the number of replications
+    @return : int[] : one 64-bit seed per replication
+    """
+    rng = random.Random(seed)
+    return [rng.getrandbits(64) for _ in range(n)]
+
+# Acklam's rational approximation to the normal quantile: numerator and
+# denominator coefficients for the central region and for the tails
+_CENTRAL = ((-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+        1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00),
+    (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+        6.680131188771972e+01, -1.328068155288572e+01))
+_TAIL = ((-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+        -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00),
+    (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+        3.754408661907416e+00))
+
+def _poly(coeffs, x):
+    # Horner's rule, highest power first
+    total = 0.0
+    for c in coeffs:
+        total = total * x + c
+    return total
+
+def normal_quantile(p):
+    """
+    `normal_quantile(p)`
+    Returns the p-quantile of the standard normal distribution. Acklam's
+    rational approximation (relative error below 1.2e-9) is refined with one
+    Halley step on math.erfc, which brings it to about machine precision.
+    
+    @pre    : p must be strictly between 0 and 1
+    
+    @param  : p     : float : the probability
+    @return : float : the quantile
+    """
+    assert 0 < p < 1
+    if 0.02425 <= p <= 1 - 0.02425:
+        q = p - 0.5
+        r = q * q
+        z = q * _poly(_CENTRAL[0], r) / (_poly(_CENTRAL[1], r) * r + 1)
+    else:
+        q = math.sqrt(-2 * math.log(min(p, 1 - p)))
+        z = _poly(_TAIL[0], q) / (_poly(_TAIL[1], q) * q + 1)
+        if p > 0.5:
+            z = -z
+    e = 0.5 * math.erfc(-z / math.sqrt(2)) - p
+    u = e * math.sqrt(2 * math.pi) * math.exp(z * z / 2)
+    return z - u / (1 + z * u / 2)
+
+# below this many degrees of freedom t_quantile is exact
+EXACT_DF = 30
+
+def t_quantile(p, df):
+    """
+    `t_quantile(p, df)`
+    Returns the p-quantile of Student's t distribution with df degrees of
+    freedom. Up to EXACT_DF degrees of freedom the distribution function's
+    closed form (Abramowitz and Stegun 26.7.3-4) is inverted by bisection,
+    which is exact to rounding; beyond that a Cornish-Fisher expansion about
+    the normal quantile is accurate to about 1e-5.
+    
+    @pre    : df must be a positive int
+    
+    @param  : p     : float : the probability, between 0 and 1
+    @param  : df    : int   : the degrees of freedom
+    @return : float : the quantile
+    """
+    assert df > 0
+    if df <= EXACT_DF:
+        if p == 0.5:
+            return 0.0
+        # bisect on the angle theta = atan(t / sqrt(df)), over which the
+        # probability of |T| <= t rises from 0 to 1
+        target = abs(2 * p - 1)
+        lo, hi = 0.0, math.pi / 2
+        for _ in range(100):
+            mid = (lo + hi) / 2
+            if _t_central(mid, df) < target:
+                lo = mid
+            else:
+                hi = mid
+        t = math.sqrt(df) * math.tan((lo + hi) / 2)
+        return t if p > 0.5 else -t
+    z = normal_quantile(p)
+    z3, z5, z7 = z ** 3, z ** 5, z ** 7
+    return (z
+        + (z3 + z) / (4 * df)
+        + (5 * z5 + 16 * z3 + 3 * z) / (96 * df ** 2)
+        + (3 * z7 + 19 * z5 + 17 * z3 - 15 * z) / (384 * df ** 3))
+
+def _t_central(theta, df):
+    # P(|T| <= sqrt(df) tan(theta)) for T with df degrees of freedom
+    c2 = math.cos(theta) ** 2
+    term = total = 1.0
+    if df % 2:
+        for k in range(1, (df - 1) // 2):
+            term *= 2 * k / (2 * k + 1) * c2
+            total += term
+        if df == 1:
+            return 2 * theta / math.pi
+        return 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    for k in range(1, df // 2):
+        term *= (2 * k - 1) / (2 * k) * c2
+        total += term
+    return math.sin(theta) * total
+
+class ReplicationSummary(object):
+    """
+    `ReplicationSummary`
+    Aggregates the average wait time of several independent replications
+    
+    @attr   : samples       : float[]   : each replication's average wait time
+    @attr   : n             : int       : the number of replications
+    @attr   : mean          : float     : the mean of the samples
+    @attr   : variance      : float     : the unbiased sample variance
+    @attr   : confidence    : float     : the confidence level of ci
+    @attr   : ci            : tuple     : (low, high) confidence interval for
+    the mean
+    
+    @method : half_width    : float     : half the width of the interval
+    """
+    
+    def __init__(self, samples, confidence=0.95):
+        """
+        `ReplicationSummary(samples, confidence)`
+        Summarizes the given per-replication averages
+        
+        @pre    : samples must not be empty
+        @pre    : confidence must be strictly between 0 and 1
+        
+        @param  : self          : the ReplicationSummary to operate upon
+        @param  : samples       : float[]   : per-replication average waits
+        @param  : confidence    : float     : the confidence level [default 0.95]
+        @return : none
+        """
+        assert len(samples) > 0
+        assert 0 < confidence < 1
+        
+        self.samples = list(samples)
+        self.n = len(self.samples)
+        self.confidence = confidence
+        self.mean = sum(self.samples) / self.n
+        
+        if self.n > 1:
+            self.variance = sum((x - self.mean) ** 2 for x in self.samples) / (self.n - 1)
+            t = t_quantile(0.5 + confidence / 2, self.n - 1)
+            h = t * math.sqrt(self.variance / self.n)
+        else:
+            self.variance = 0.0
+            h = float('inf')
+        self.ci = (self.mean - h, self.mean + h)
+    
+    def half_width(self):
+        return (self.ci[1] - self.ci[0]) / 2
+    
+    def __str__(self):
+        return "<ReplicationSummary n='{}' mean='{}' variance='{}' ci='{}' />".format(
+            self.n, self.mean, self.variance, self.ci)
+    
+    def __repr__(self):
+        return str(self)
+
+def _replicate(args):
+    scenario, seed, crn, antithetic = args
+    return scenario.run(seed, crn, antithetic).average_wait_time()
+
+def _run(jobs, workers):
+    # run jobs in this process or across a pool, keeping their order
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= 1:
+        return list(map(_replicate, jobs))
+    # a few chunks per worker keeps them busy without much IPC
+    chunksize = max(1, len(jobs) // (4 * workers))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_replicate, jobs, chunksize=chunksize))
+
+def _map(jobs, workers, cache=None):
+    # as _run, answering the jobs the cache has seen from it
+    keys = None
+    if cache is not None:
+        keys = [result_key('average_wait', scenario.config(), seed=seed, crn=crn,
+            antithetic=antithetic) for scenario, seed, crn, antithetic in jobs]
+    return cached_map(lambda todo: _run(todo, workers), jobs, keys, cache)
+
+def _jobs(scenario, seeds, crn, antithetic):
+    # with antithetic pairs every seed is run twice, plainly and mirrored
+    if antithetic:
+        return [(scenario, s, crn, a) for s in seeds for a in (False, True)]
+    return [(scenario, s, crn, False) for s in seeds]
+
+def _pair_means(samples, antithetic):
+    # the two halves of an antithetic pair are one sample between them
+    if antithetic:
+        return [(samples[i] + samples[i + 1]) / 2 for i in range(0, len(samples), 2)]
+    return samples
+
+def run_replications(scenario, n, seed=0, workers=None, confidence=0.95,
+        crn=False, antithetic=False, cache=None):
+    """
+    `run_replications(scenario, n, seed, workers, confidence, crn, antithetic,
+    cache)`
+    Runs n independent replications of a scenario and summarizes their
+    average wait times
+    
+    @pre    : scenario must be a Scenario
+    @pre    : n must be a positive int
+    @post   : the result only depends on (scenario, n, seed, crn, antithetic),
+    not on workers
+    
+    @param  : scenario  : Scenario  : the scenario to replicate
+    @param  : n         : int       : the number of replications, or of
+    antithetic pairs
+    @param  : seed      : int       : the master seed [default 0]
+    @param  : workers   : int       : the number of worker processes; 1 runs
+    in this process and None uses every core [default None]
+    @param  : confidence: float     : the confidence level [default 0.95]
+    @param  : crn       : bool      : use per-customer substreams [default
+    False]
+    @param  : antithetic: bool      : run each seed as an antithetic pair and
+    treat the pair's mean as one sample [default False]
+    @param  : cache     : ResultCache   : where to look up and store each
+    replication's result [default None]
+    @return : ReplicationSummary    : the aggregated results
+    """
+    assert isinstance(scenario, Scenario)
+    assert type(n) == int and n > 0
+    
+    jobs = _jobs(scenario, replication_seeds(seed, n), crn, antithetic)
+    samples = _pair_means(_map(jobs, workers, cache), antithetic)
+    return ReplicationSummary(samples, confidence)
+
+def run_paired(baseline, alternative, n, seed=0, workers=None, confidence=0.95,
+        crn=True, antithetic=False, cache=None):
+    """
+    `run_paired(baseline, alternative, n, seed, workers, confidence, crn,
+    antithetic, cache)`
+    Estimates how much an alternative changes the average wait compared with
+    a baseline. Both are run with the same seeds, so each replication of the
+    alternative meets the same customers as its twin; the interval is built
+    from the per-seed differences, whose variance is far smaller than that of
+    either scenario alone when the two runs are positively correlated.
+    
+    @pre    : baseline and alternative must be Scenarios
+    @pre    : n must be a positive int
+    
+    @param  : baseline      : Scenario  : the scenario to compare against
+    @param  : alternative   : Scenario  : the changed scenario
+    @param  : n             : int       : the number of paired replications
+    (or pairs of antithetic pairs)
+    @param  : seed          : int       : the master seed [default 0]
+    @param  : workers       : int       : worker processes [default None]
+    @param  : confidence    : float     : the confidence level [default 0.95]
+    @param  : crn           : bool      : use per-customer substreams
+    [default True]
+    @param  : antithetic    : bool      : run each seed as an antithetic pair
+    [default False]
+    @param  : cache         : ResultCache   : where to look up and store each
+    replication's result [default None]
+    @return : tuple : ReplicationSummary of alternative - baseline, and
+    ReplicationSummary of each scenario on its own
+    """
+    assert isinstance(baseline, Scenario)
+    assert isinstance(alternative, Scenario)
+    assert type(n) == int and n > 0
+    
+    seeds = replication_seeds(seed, n)
+    jobs = _jobs(baseline, seeds, crn, antithetic) + _jobs(alternative, seeds, crn, antithetic)
+    samples = _map(jobs, workers, cache)
+    a = _pair_means(samples[:len(samples) // 2], antithetic)
+    b = _pair_means(samples[len(samples) // 2:], antithetic)
+    
+    differences = [y - x for x, y in zip(a, b)]
+    return (ReplicationSummary(differences, confidence),
+        ReplicationSummary(a, confidence),
+        ReplicationSummary(b, confidence))
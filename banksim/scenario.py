@@ -0,0 +1,435 @@
+#
+# `scenario.py`
+# A picklable description of a bank simulation that can be run from a seed
+#
+# Written by Joshua Paul A. Chan
+
+from bisect import bisect_right
+
+from . import arrivals
+from .bank import Bank
+from .customer import Customer
+from .engine import Simulation
+from .lines import POLICIES, MultiLineBank
+from .priority import PriorityBank
+from .skills import SkillBank, staff_skills
+from .reception_queue import FIFO
+from .service import ServiceTime, Deterministic, Exponential
+from .streams import ROUTING, CustomerStreams, Substream, generator
+
+class Scenario(object):
+    """
+    `Scenario`
+    Everything needed to build and run one bank simulation. A Scenario only
+    holds plain numbers, strings and service distributions so it can be
+    shipped to worker processes; all randomness comes from the seed handed
+    to `run`, so the same (Scenario, seed) pair always gives the same result.
+    
+    @attr   : n_customers   : int   : how many customers visit the bank
+    @attr   : n_tellers     : int   : how many tellers are working
+    @attr   : arrival_process   : str   : one of arrivals.PROCESSES
+    @attr   : arrival_rate  : float : mean arrivals (or, for 'batch', groups)
+    per unit time
+    @attr   : rate_schedule : tuple : (start time, rate) pairs for 'nhpp'
+    @attr   : batch_size    : int   : customers per group for 'batch'
+    @attr   : service_rate  : float : services per unit time of an
+    exponential service time, or None for a fixed service_time
+    @attr   : service_time  : float : the fixed service time used when
+    service_rate is None
+    @attr   : service       : ServiceTime   : the service time distribution;
+    built from service_rate/service_time when not given
+    @attr   : purpose_mix   : tuple : (visit purpose, weight) pairs customers'
+    purposes are drawn from, or None for every customer visiting for 'other'
+    @attr   : ticks         : int   : how many ticks the square wave spreads
+    customers over
+    @attr   : discipline    : str   : the ReceptionQueue discipline
+    @attr   : lines         : str   : how customers choose between one line
+    per teller, one of lines.POLICIES, or None for a single shared line
+    @attr   : jockey        : bool  : whether customers change lines
+    @attr   : classes       : tuple : visit purposes grouped into priority
+    classes, best first, or None for no classes
+    @attr   : preemptive    : bool  : whether better classes interrupt
+    service
+    @attr   : aging         : float : time waited that is worth one class, or
+    None
+    @attr   : staff         : tuple : (number of tellers, visit purposes they
+    can help with) groups, or None for tellers who can help with anything
+    @attr   : balk_at       : int   : how many customers waiting beyond the
+    idle tellers make arrivals leave at once, or None
+    @attr   : patience      : ServiceTime   : how long customers wait before
+    leaving the line, drawn like a service time, or None to wait forever
+    @attr   : shifts        : tuple : (start time, number of tellers) shift
+    changes; n_tellers work until the first, or None to keep n_tellers all day
+    
+    @method : config        : dict      : the arguments this was built with
+    @method : replace       : Scenario  : a copy with some arguments changed
+    @method : arrival_times : generator : yields arrival times
+    @method : visits        : generator : yields (purpose, service time)
+    @method : arrivals      : generator : yields (time, Customer) pairs
+    @method : build_bank    : Bank      : builds the bank, closed and empty
+    @method : build         : Simulation: builds a fresh, unrun simulation
+    @method : run           : Simulation: builds and runs a simulation
+    """
+    
+    def __init__(self, n_customers, n_tellers=1, arrival_rate=None,
+                 service_rate=None, service_time=1, ticks=10,
+                 discipline=FIFO, arrival_process=None, rate_schedule=None,
+                 batch_size=1, service=None, purpose_mix=None, lines=None,
+                 jockey=False, classes=None, preemptive=False, aging=None,
+                 staff=None, balk_at=None, patience=None, shifts=None):
+        """
+        `Scenario(n_customers, n_tellers, arrival_rate, service_rate,
+        service_time, ticks, discipline, arrival_process, rate_schedule,
+        batch_size, service, purpose_mix, lines, jockey, classes, preemptive,
+        aging, staff, balk_at, patience, shifts)`
+        Constructs a new Scenario
+        
+        @pre    : n_customers and n_tellers must be positive ints
+        @pre    : rates, if given, must be positive
+        @pre    : 'constant', 'poisson' and 'batch' arrivals need an
+        arrival_rate, and 'nhpp' arrivals need a rate_schedule whose last
+        rate is positive, or the last customers would never arrive
+        @pre    : priority classes need a single 'fifo' line
+        @pre    : staff must add up to n_tellers, and between them help with
+        every visit purpose in the mix; skill-based routing needs a single
+        'fifo' line without priority classes
+        @pre    : balking and patience need a single shared line without
+        priority classes or skills
+        @pre    : shifts must start in increasing order with a positive
+        number of tellers each, and cannot be combined with staff
+        @post   : when arrival_process is not given it is 'wave' without an
+        arrival_rate and 'poisson' with one
+        
+        @param  : self          : the Scenario object to operate upon
+        @param  : n_customers   : int   : how many customers visit the bank
+        @param  : n_tellers     : int   : how many tellers work [default 1]
+        @param  : arrival_rate  : float : Poisson arrival rate [default None]
+        @param  : service_rate  : float : exponential service rate [default
+        None]
+        @param  : service_time  : float : fixed service time [default 1]
+        @param  : ticks         : int   : square wave width [default 10]
+        @param  : discipline    : str   : the queue discipline [default 'fifo']
+        @param  : arrival_process   : str   : how customers arrive [default
+        None]
+        @param  : rate_schedule : list  : (start time, rate) pairs [default
+        None]
+        @param  : batch_size    : int   : customers per group [default 1]
+        @param  : service       : ServiceTime   : the service time
+        distribution [default None]
+        @param  : purpose_mix   : list  : (visit purpose, weight) pairs
+        [default None]
+        @param  : lines         : str   : the line choice policy for one line
+        per teller [default None, one shared line]
+        @param  : jockey        : bool  : let customers change lines [default
+        False]
+        @param  : classes       : list  : lists of visit purposes, best class
+        first; unlisted purposes join the last class [default None]
+        @param  : preemptive    : bool  : let better classes interrupt service
+        [default False]
+        @param  : aging         : float : time waited that is worth one class
+        [default None]
+        @param  : staff         : list  : (number of tellers, visit purposes)
+        groups [default None]
+        @param  : balk_at       : int   : the line length arrivals balk at
+        [default None]
+        @param  : patience      : ServiceTime   : the patience distribution
+        [default None]
+        @param  : shifts        : list  : (start time, number of tellers)
+        pairs [default None]
+        @return : none
+        """
+        if arrival_process is None:
+            arrival_process = arrivals.WAVE if arrival_rate is None else arrivals.POISSON
+        assert type(n_customers) == int and n_customers > 0
+        assert type(n_tellers) == int and n_tellers > 0
+        assert arrival_rate is None or arrival_rate > 0
+        assert service_rate is None or service_rate > 0
+        assert service_time >= 0
+        assert type(ticks) == int and ticks > 0
+        assert arrival_process in arrivals.PROCESSES
+        assert arrival_process in (arrivals.WAVE, arrivals.NHPP) or arrival_rate is not None
+        assert arrival_process != arrivals.NHPP or rate_schedule
+        assert not rate_schedule or arrivals.PiecewiseRate(rate_schedule).end() is None
+        assert type(batch_size) == int and batch_size > 0
+        assert service is None or isinstance(service, ServiceTime)
+        assert purpose_mix is None or all(w >= 0 for _, w in purpose_mix)
+        assert lines is None or lines in POLICIES
+        assert lines is not None or not jockey
+        assert classes is None or (lines is None and discipline == FIFO)
+        assert classes is not None or not (preemptive or aging)
+        assert aging is None or aging > 0
+        if staff:
+            staff = tuple((n, tuple(purposes)) for n, purposes in staff)
+            purposes = [p for p, _ in purpose_mix] if purpose_mix else ['other']
+            assert sum(n for n, _ in staff) == n_tellers
+            assert set(purposes) <= set(staff_skills(staff))
+            assert lines is None and classes is None and discipline == FIFO
+        assert balk_at is None or (type(balk_at) == int and balk_at >= 0)
+        assert patience is None or isinstance(patience, ServiceTime)
+        if balk_at is not None or patience is not None:
+            assert lines is None and classes is None and not staff
+        if shifts:
+            shifts = tuple((start, n) for start, n in shifts)
+            starts = [start for start, _ in shifts]
+            assert starts[0] >= 0 and starts == sorted(set(starts))
+            assert all(type(n) == int and n > 0 for _, n in shifts)
+            assert not staff
+        
+        self.n_customers = n_customers
+        self.n_tellers = n_tellers
+        self.arrival_rate = arrival_rate
+        self.service_rate = service_rate
+        self.service_time = service_time
+        self.ticks = ticks
+        self.discipline = discipline
+        self.arrival_process = arrival_process
+        self.rate_schedule = tuple(map(tuple, rate_schedule)) if rate_schedule else None
+        self.batch_size = batch_size
+        self.purpose_mix = tuple(map(tuple, purpose_mix)) if purpose_mix else None
+        self.lines = lines
+        self.jockey = jockey
+        self.classes = tuple(map(tuple, classes)) if classes else None
+        self.preemptive = preemptive
+        self.aging = aging
+        self.staff = staff or None
+        self.balk_at = balk_at
+        self.patience = patience
+        self.shifts = shifts or None
+        
+        if service is None and service_rate is not None:
+            service = Exponential(service_rate)
+        self.service = service or Deterministic(service_time)
+    
+    def config(self):
+        """
+        `config()`
+        Returns the constructor arguments that describe this scenario. The
+        service distribution stands in for service_rate and service_time.
+        
+        @param  : self  : the Scenario object to operate upon
+        @return : dict  : keyword arguments for Scenario(...)
+        """
+        return {
+            'n_customers': self.n_customers,
+            'n_tellers': self.n_tellers,
+            'arrival_rate': self.arrival_rate,
+            'ticks': self.ticks,
+            'discipline': self.discipline,
+            'arrival_process': self.arrival_process,
+            'rate_schedule': self.rate_schedule,
+            'batch_size': self.batch_size,
+            'service': self.service,
+            'purpose_mix': self.purpose_mix,
+            'lines': self.lines,
+            'jockey': self.jockey,
+            'classes': self.classes,
+            'preemptive': self.preemptive,
+            'aging': self.aging,
+            'staff': self.staff,
+            'balk_at': self.balk_at,
+            'patience': self.patience,
+            'shifts': self.shifts,
+        }
+    
+    def replace(self, **changes):
+        """
+        `replace(**changes)`
+        Returns a copy of this scenario with some of its arguments changed
+        
+        @param  : self      : the Scenario object to operate upon
+        @param  : changes   : the constructor arguments to change
+        @return : Scenario  : the new scenario
+        """
+        config = self.config()
+        if 'service' not in changes and ('service_rate' in changes or 'service_time' in changes):
+            # rebuild the distribution from the new rate or time
+            config['service'] = None
+        config.update(changes)
+        return Scenario(**config)
+    
+    def arrival_times(self, rng):
+        """
+        `arrival_times(rng)`
+        Lazily generates the arrival times of this scenario's customers
+        
+        @param  : self  : the Scenario object to operate upon
+        @param  : rng   : random.Random : the source of randomness
+        @return : generator : arrival times in non-decreasing order
+        """
+        n = self.n_customers
+        process = self.arrival_process
+        if process == arrivals.WAVE:
+            return arrivals.square_wave(n, self.ticks)
+        elif process == arrivals.CONSTANT:
+            return arrivals.constant(self.arrival_rate, n=n)
+        elif process == arrivals.POISSON:
+            return arrivals.poisson(self.arrival_rate, rng, n=n)
+        elif process == arrivals.NHPP:
+            rate = arrivals.PiecewiseRate(self.rate_schedule)
+            return arrivals.nonhomogeneous_poisson(rate, rate.max_rate(), rng, n=n)
+        else:
+            return arrivals.batches(self.arrival_rate, self.batch_size, rng, n=n)
+    
+    def visits(self, rng):
+        """
+        `visits(rng)`
+        Lazily draws every customer's visit purpose and then their service
+        time, which may depend on that purpose
+        
+        @param  : self  : the Scenario object to operate upon
+        @param  : rng   : random.Random : the source of randomness
+        @return : Visits    : (visit purpose, service time) pairs, in customer
+        order
+        """
+        return Visits(self.service, self.purpose_mix, rng)
+    
+    def arrivals(self, rng):
+        """
+        `arrivals(rng)`
+        Lazily generates this scenario's customers and their arrival times
+        
+        @param  : self  : the Scenario object to operate upon
+        @param  : rng   : random.Random/CustomerStreams : the source of
+        randomness, shared by every customer or split per customer
+        @return : CustomerStream    : (time, Customer) pairs in arrival order
+        """
+        if isinstance(rng, CustomerStreams):
+            return CustomerStream(self.arrival_times(rng.arrival),
+                self.visits(rng.service), rng, self.patience)
+        return CustomerStream(self.arrival_times(rng), self.visits(rng),
+            patience=self.patience)
+    
+    def build_bank(self, seed=None):
+        """
+        `build_bank(seed)`
+        Builds the bank this scenario describes. Banks with a line per teller
+        choose lines from their own substream of the seed, so routing never
+        shifts the customers' draws.
+        
+        @param  : self  : the Scenario object to operate upon
+        @param  : seed  : int   : the seed for this run's randomness
+        @return : Bank  : the bank, closed and empty
+        """
+        if self.staff is not None:
+            return SkillBank(self.staff)
+        if self.classes is not None:
+            return PriorityBank(self.n_tellers, self.classes, self.preemptive,
+                self.aging)
+        if self.lines is None:
+            return Bank(self.n_tellers, self.discipline, self.balk_at)
+        return MultiLineBank(self.n_tellers, self.discipline, self.lines,
+            self.jockey, Substream(seed, ROUTING))
+    
+    def build(self, seed=None, crn=False, antithetic=False, **options):
+        """
+        `build(seed, crn, antithetic, **options)`
+        Builds a fresh simulation of this scenario
+        
+        @param  : self      : the Scenario object to operate upon
+        @param  : seed      : int   : the seed for this run's randomness
+        @param  : crn       : bool  : draw each customer's arrival and service
+        from their own substreams (common random numbers) [default False]
+        @param  : antithetic: bool  : mirror every uniform draw, for the
+        second run of an antithetic pair [default False]
+        @param  : options   : extra keyword arguments for Simulation
+        @return : Simulation    : a simulation that has not been run yet
+        """
+        rng = generator(seed, crn, antithetic)
+        bank = self.build_bank(seed)
+        return Simulation(bank, self.arrivals(rng), shifts=self.shifts, **options)
+    
+    def run(self, seed=None, crn=False, antithetic=False, **options):
+        """
+        `run(seed, crn, antithetic, **options)`
+        Builds and runs a simulation of this scenario
+        
+        @param  : self      : the Scenario object to operate upon
+        @param  : seed      : int   : the seed for this run's randomness
+        @param  : crn       : bool  : use per-customer substreams [default
+        False]
+        @param  : antithetic: bool  : mirror every uniform draw [default False]
+        @param  : options   : extra keyword arguments for Simulation
+        @return : Simulation    : the finished simulation
+        """
+        return self.build(seed, crn, antithetic, **options).run()
+    
+    def __str__(self):
+        return "<Scenario customers='{}' tellers='{}' arrival_rate='{}' service='{}' />".format(
+            self.n_customers, self.n_tellers, self.arrival_rate, self.service)
+    
+    def __repr__(self):
+        return str(self)
+
+class Visits(object):
+    """
+    `Visits`
+    An endless iterator of (visit purpose, service time) draws. Like the
+    arrival processes it keeps its state in attributes rather than in a
+    generator frame, so a half-finished run can be pickled.
+    
+    @attr   : service   : ServiceTime   : the service time distribution
+    @attr   : rng       : random.Random : the source of randomness
+    """
+    
+    def __init__(self, service, purpose_mix, rng):
+        self.service = service
+        self.rng = rng
+        self._names = None
+        if purpose_mix is not None:
+            self._names = [p for p, _ in purpose_mix]
+            self._cumulative = []
+            total = 0
+            for _, w in purpose_mix:
+                total += w
+                self._cumulative.append(total)
+            self._total = total
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self._names is None:
+            return 'other', self.service.draw(self.rng, 'other')
+        i = bisect_right(self._cumulative, self.rng.random() * self._total)
+        purpose = self._names[i]
+        return purpose, self.service.draw(self.rng, purpose)
+
+class CustomerStream(object):
+    """
+    `CustomerStream`
+    Pairs arrival times with visits and builds each Customer as it is pulled
+    
+    @attr   : times     : ArrivalProcess    : the arrival times
+    @attr   : visits    : Visits            : purposes and service times
+    @attr   : streams   : CustomerStreams   : per-customer substreams the two
+    draw from, or None when they share one generator
+    @attr   : patience  : ServiceTime       : each customer's patience, drawn
+    after their visit from the same generator, or None
+    @attr   : count     : int               : customers built so far
+    """
+    
+    def __init__(self, times, visits, streams=None, patience=None):
+        self.times = times
+        self.visits = visits
+        self.streams = streams
+        self.patience = patience
+        self.count = 0
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        if self.streams is not None:
+            self.streams.select(self.count)
+        t = next(self.times)
+        purpose, service_time = next(self.visits)
+        patience = None
+        if self.patience is not None:
+            patience = self.patience.draw(self.visits.rng, purpose)
+        i = self.count
+        self.count += 1
+        return t, Customer(str(i).zfill(3),
+            visit_purpose=purpose,
+            service_time=service_time,
+            customer_id=i,
+            patience=patience)
@@ -0,0 +1,200 @@
+#
+# `service.py`
+# Service time distributions that tellers draw from, one draw per customer
+#
+# Written by Joshua Paul A. Chan
+
+import math
+
+# service time distributions the command line can build
+DETERMINISTIC = 'deterministic'
+EXPONENTIAL = 'exponential'
+LOGNORMAL = 'lognormal'
+EMPIRICAL = 'empirical'
+
+DISTRIBUTIONS = (DETERMINISTIC, EXPONENTIAL, LOGNORMAL, EMPIRICAL)
+
+class ServiceTime(object):
+    """
+    `ServiceTime`
+    An abstract service time distribution. Distributions only hold numbers,
+    so they can be pickled into worker processes and compared for equality.
+    
+    @method : draw      : float : draws a service time for a customer
+    @method : mean      : float : the mean service time
+    @method : params    : tuple : the numbers that define the distribution
+    """
+    
+    def draw(self, rng, visit_purpose=None):
+        """
+        `draw(rng, visit_purpose)`
+        Draws a service time
+        
+        @param  : self          : the ServiceTime object to operate upon
+        @param  : rng           : random.Random : the source of randomness
+        @param  : visit_purpose : str   : why the customer is visiting
+        [default None]
+        @return : float : a non-negative service time
+        """
+        raise NotImplementedError
+    
+    def mean(self):
+        raise NotImplementedError
+    
+    def params(self):
+        raise NotImplementedError
+    
+    def __eq__(self, other):
+        return type(self) == type(other) and self.params() == other.params()
+    
+    def __hash__(self):
+        return hash((type(self).__name__, self.params()))
+    
+    def __str__(self):
+        return "<{} params='{}' />".format(type(self).__name__, self.params())
+    
+    def __repr__(self):
+        return str(self)
+
+class Deterministic(ServiceTime):
+    """
+    `Deterministic`
+    Every customer takes exactly the same time
+    
+    @attr   : value : float : the service time
+    """
+    
+    def __init__(self, value=1):
+        assert value >= 0
+        self.value = value
+    
+    def draw(self, rng, visit_purpose=None):
+        return self.value
+    
+    def mean(self):
+        return self.value
+    
+    def params(self):
+        return (self.value,)
+
+class Exponential(ServiceTime):
+    """
+    `Exponential`
+    Memoryless service times, as assumed by M/M/c queueing formulas
+    
+    @attr   : rate  : float : services per unit time (1 / mean)
+    """
+    
+    def __init__(self, rate):
+        assert rate > 0
+        self.rate = rate
+    
+    def draw(self, rng, visit_purpose=None):
+        return rng.expovariate(self.rate)
+    
+    def mean(self):
+        return 1 / self.rate
+    
+    def params(self):
+        return (self.rate,)
+
+class LogNormal(ServiceTime):
+    """
+    `LogNormal`
+    Right-skewed service times, parameterized by the mean and standard
+    deviation of the service time itself rather than of its logarithm
+    
+    @attr   : mu    : float : the mean of the log service time
+    @attr   : sigma : float : the standard deviation of the log service time
+    """
+    
+    def __init__(self, mean, sd):
+        assert mean > 0
+        assert sd >= 0
+        self.sigma = math.sqrt(math.log(1 + (sd / mean) ** 2))
+        self.mu = math.log(mean) - self.sigma ** 2 / 2
+        self._mean = mean
+        self._sd = sd
+    
+    def draw(self, rng, visit_purpose=None):
+        return rng.lognormvariate(self.mu, self.sigma)
+    
+    def mean(self):
+        return self._mean
+    
+    def params(self):
+        return (self._mean, self._sd)
+
+class Empirical(ServiceTime):
+    """
+    `Empirical`
+    Resamples service times observed at a real branch
+    
+    @attr   : samples   : tuple : the observed service times
+    """
+    
+    def __init__(self, samples):
+        self.samples = tuple(samples)
+        assert len(self.samples) > 0
+        assert all(s >= 0 for s in self.samples)
+    
+    def draw(self, rng, visit_purpose=None):
+        return self.samples[int(rng.random() * len(self.samples))]
+    
+    def mean(self):
+        return sum(self.samples) / len(self.samples)
+    
+    def params(self):
+        return self.samples
+
+class ByPurpose(ServiceTime):
+    """
+    `ByPurpose`
+    Draws from a different distribution depending on a customer's
+    visit_purpose, e.g. quick deposits and slow loan applications
+    
+    @attr   : by_purpose    : dict          : visit purpose -> ServiceTime
+    @attr   : default       : ServiceTime   : used for any other purpose
+    @attr   : weights       : dict          : visit purpose -> relative
+    frequency, used by mean(), or None to weigh the listed purposes equally
+    """
+    
+    def __init__(self, by_purpose, default=None, weights=None):
+        assert all(isinstance(d, ServiceTime) for d in by_purpose.values())
+        assert default is None or isinstance(default, ServiceTime)
+        assert weights is None or (weights and all(w >= 0 for w in weights.values())
+            and sum(weights.values()) > 0)
+        self.by_purpose = dict(by_purpose)
+        self.default = default or Deterministic(1)
+        self.weights = dict(weights) if weights is not None else None
+    
+    def draw(self, rng, visit_purpose=None):
+        return self.by_purpose.get(visit_purpose, self.default).draw(rng, visit_purpose)
+    
+    def mean(self):
+        # the mean over purposes depends on the purpose mix: the given weights
+        # if any, otherwise every listed purpose equally (see mixed_mean)
+        if self.weights is not None:
+            return self.mixed_mean(self.weights)
+        if not self.by_purpose:
+            return self.default.mean()
+        return self.mixed_mean(dict.fromkeys(self.by_purpose, 1))
+    
+    def mixed_mean(self, weights):
+        """
+        `mixed_mean(weights)`
+        The mean service time when purposes occur with the given weights
+        
+        @param  : self      : the ByPurpose object to operate upon
+        @param  : weights   : dict  : visit purpose -> relative frequency
+        @return : float     : the mean service time
+        """
+        total = sum(weights.values())
+        return sum(
+            w * self.by_purpose.get(p, self.default).mean()
+            for p, w in weights.items()
+        ) / total
+    
+    def params(self):
+        weights = None if self.weights is None else tuple(sorted(self.weights.items()))
+        return (tuple(sorted(self.by_purpose.items())), self.default, weights)
@@ -0,0 +1,345 @@
+#
+# `skills.py`
+# Routes customers to the tellers who can help with why they are visiting
+#
+# Written by Joshua Paul A. Chan
+
+from collections import deque
+from heapq import heapify, heappush, heappop
+from itertools import chain
+
+from .bank import Bank
+from .customer import Customer
+from .teller import Teller
+
+def staff_skills(staff):
+    """
+    `staff_skills(staff)`
+    The skill types (visit purposes) of a branch, in the order they first
+    appear in its staff
+    
+    @param  : staff : list  : (number of tellers, visit purposes) groups
+    @return : tuple : every visit purpose some teller can help with
+    """
+    skills = []
+    for _, purposes in staff:
+        for p in purposes:
+            if p not in skills:
+                skills.append(p)
+    return tuple(skills)
+
+class SkillQueue(object):
+    """
+    `SkillQueue`
+    The waiting line, split by visit purpose. Each purpose is its own FIFO
+    line, and the `waiting` bitmap records which purposes have anyone in
+    line. The longest-waiting customer a group of skills can help is the
+    earliest head among the purposes in (waiting & skills), found in
+    O(number of skills).
+    
+    @attr   : skills    : tuple : the visit purposes, one bit each
+    @attr   : waiting   : int   : bitmap of the purposes with someone in line
+    
+    @method : skill_of          : int       : the bit of a customer's purpose
+    @method : insert_customer   : none      : adds a customer to their line
+    @method : get_next_customer : Customer  : takes the longest-waiting
+    customer that some skills can help
+    """
+    
+    def __init__(self, skills):
+        assert len(skills) > 0
+        self.skills = tuple(skills)
+        self._bit = {p: k for k, p in enumerate(self.skills)}
+        self._lines = [deque() for _ in self.skills]
+        self.waiting = 0
+        self._count = 0
+    
+    def skill_of(self, cust):
+        return self._bit[cust.visit_purpose]
+    
+    def insert_customer(self, cust):
+        """
+        `insert_customer(cust)`
+        Adds a customer to the back of the line for their visit purpose
+        
+        @pre    : cust must be a Customer that has not been served
+        @pre    : some teller must be able to help with the customer's purpose
+        
+        @param  : self  : the SkillQueue object to operate upon
+        @param  : cust  : Customer  : the customer
+        @return : none
+        """
+        assert isinstance(cust, Customer)
+        assert not cust.was_served()
+        assert cust.visit_purpose in self._bit, \
+            "no teller can help with '{}'".format(cust.visit_purpose)
+        
+        k = self._bit[cust.visit_purpose]
+        self._lines[k].append(cust)
+        self.waiting |= 1 << k
+        self._count += 1
+    
+    def get_next_customer(self, mask=-1):
+        """
+        `get_next_customer(mask)`
+        Takes the customer who has waited longest among the purposes in a
+        mask; ties go to the purpose listed first
+        
+        @pre    : someone must be waiting for a purpose in the mask, otherwise
+        an IndexError will be raised
+        
+        @param  : self  : the SkillQueue object to operate upon
+        @param  : mask  : int   : bitmap of the purposes to consider [default
+        every purpose]
+        @return : Customer  : the next customer
+        """
+        bits = self.waiting & mask
+        if not bits:
+            raise IndexError("get_next_customer from an empty queue")
+        lines = self._lines
+        k = (bits & -bits).bit_length() - 1
+        first = lines[k][0].arrived_at
+        bits &= bits - 1
+        while bits:
+            j = (bits & -bits).bit_length() - 1
+            if lines[j][0].arrived_at < first:
+                k, first = j, lines[j][0].arrived_at
+            bits &= bits - 1
+        
+        line = lines[k]
+        cust = line.popleft()
+        if not line:
+            self.waiting &= ~(1 << k)
+        self._count -= 1
+        return cust
+    
+    def __iter__(self):
+        return chain.from_iterable(self._lines)
+    
+    def __len__(self):
+        return self._count
+    
+    def __str__(self):
+        return "<SkillQueue lengths='{}' />".format(
+            dict(zip(self.skills, map(len, self._lines))))
+    
+    def __repr__(self):
+        return str(self)
+
+class SkillBank(Bank):
+    """
+    `SkillBank`
+    A Bank whose tellers only help with some visit purposes, e.g. loan
+    officers and cash-only windows. A teller who frees up serves the
+    longest-waiting customer they can help, and an arriving customer goes to
+    an idle teller who can help them.
+    
+    Idle tellers are pooled by skill set: tellers with exactly the same
+    skills share a pool, a min-heap by teller number. Pools are numbered
+    specialists first (fewest skills), and a bitmap over pool numbers records
+    which pools have anyone idle. The best idle teller for a purpose is the
+    lowest set bit of (idle pools & pools with that skill), so matching costs
+    a few integer operations plus O(number of skills) bookkeeping, whatever
+    the size of the staff or the line. Preferring specialists keeps the
+    tellers who can do more free for customers only they can help.
+    
+    # inherited from Bank
+    @attr   : tellers   : Teller[]  : List of tellers, each with skills
+    @attr   : busy      : tuple[]   : Min-heap of (completion time, teller
+    index) for tellers serving a customer
+    
+    # overrided/defined in-class
+    @attr   : customers     : SkillQueue    : the line, split by purpose
+    @attr   : free          : set           : the indices of idle tellers
+    @attr   : skills        : tuple         : the skill types, one bit each
+    @attr   : idle_skills   : int           : bitmap of the skills some idle
+    teller has
+    @attr   : on_duty       : bool[]        : whether each teller is on duty;
+    tellers taken off duty stay in the tellers list, so the others keep
+    their numbers
+    
+    @method : set_tellers   : void  : Changes how many tellers of each skill
+    group are on duty
+    """
+    
+    def __init__(self, staff, skills=None):
+        """
+        `SkillBank(staff, skills)`
+        Constructs a new SkillBank
+        
+        @pre    : every group must have at least one teller and one skill
+        
+        @param  : self      : the SkillBank object to operate upon
+        @param  : staff     : list  : (number of tellers, visit purposes)
+        groups, e.g. [(2, ['loan']), (6, ['deposit', 'withdrawal'])]
+        @param  : skills    : list  : the order of the skill types [default
+        None, as they first appear in staff]
+        @return : none
+        """
+        assert all(type(n) == int and n > 0 and len(p) > 0 for n, p in staff)
+        super().__init__(sum(n for n, _ in staff))
+        
+        self.skills = tuple(skills) if skills is not None else staff_skills(staff)
+        self.customers = SkillQueue(self.skills)
+        self.free = set(range(len(self.tellers)))
+        bit = {p: k for k, p in enumerate(self.skills)}
+        
+        masks = []
+        for n, purposes in staff:
+            mask = 0
+            for p in purposes:
+                mask |= 1 << bit[p]
+            masks.extend([mask] * n)
+        for teller, mask in zip(self.tellers, masks):
+            teller.skills = frozenset(p for k, p in enumerate(self.skills) if mask >> k & 1)
+        self._masks = masks
+        self.on_duty = [True] * len(masks)
+        
+        # the tellers hired into each group, which set_tellers adds to
+        self._group_masks = []
+        self._members = []
+        self._all_skills = 0
+        for mask in masks:
+            self._all_skills |= mask
+        first = 0
+        for n, _ in staff:
+            self._group_masks.append(masks[first])
+            self._members.append(list(range(first, first + n)))
+            first += n
+        
+        # one pool per distinct skill set, specialists first
+        kinds = sorted(set(masks), key=lambda m: (bin(m).count('1'), m))
+        pool_of = {m: j for j, m in enumerate(kinds)}
+        self._pool = [pool_of[m] for m in masks]
+        self._pools = [[] for _ in kinds]
+        self._eligible = [0] * len(self.skills)
+        for j, m in enumerate(kinds):
+            for k in range(len(self.skills)):
+                if m >> k & 1:
+                    self._eligible[k] |= 1 << j
+        self._idle_pools = 0
+        self._idle_count = [0] * len(self.skills)
+        self.idle_skills = 0
+        for i in range(len(self.tellers)):
+            self._release(i)
+    
+    def _release(self, i):
+        j = self._pool[i]
+        heappush(self._pools[j], i)
+        self._idle_pools |= 1 << j
+        mask = self._masks[i]
+        while mask:
+            k = (mask & -mask).bit_length() - 1
+            self._idle_count[k] += 1
+            self.idle_skills |= 1 << k
+            mask &= mask - 1
+    
+    def _claim(self, k):
+        # the lowest-numbered teller in the first idle pool with skill k
+        candidates = self._idle_pools & self._eligible[k]
+        j = (candidates & -candidates).bit_length() - 1
+        pool = self._pools[j]
+        i = heappop(pool)
+        if not pool:
+            self._idle_pools &= ~(1 << j)
+        self._unidle(i)
+        return i
+    
+    def _unidle(self, i):
+        # take teller i's skills out of the idle counts
+        mask = self._masks[i]
+        while mask:
+            b = (mask & -mask).bit_length() - 1
+            self._idle_count[b] -= 1
+            if not self._idle_count[b]:
+                self.idle_skills &= ~(1 << b)
+            mask &= mask - 1
+    
+    def can_serve(self):
+        return (self.idle_skills & self.customers.waiting) != 0
+    
+    def serve_next(self):
+        # The longest-waiting customer some idle teller can help is served by
+        # the most specialised such teller
+        assert self.can_serve()
+        cust = self.customers.get_next_customer(self.idle_skills)
+        i = self._claim(self.customers.skill_of(cust))
+        self.free.discard(i)
+        teller = self.tellers[i]
+        teller.serve(cust, self.clock)
+        heappush(self.busy, (self.clock + cust.service_time, i))
+        return teller, cust
+    
+    def update(self):
+        # Tellers finish servicing once the clock reaches their completion
+        # time and go back to the pool for their skills, unless they have
+        # been taken off duty
+        while self.busy and self.busy[0][0] <= self.clock:
+            _, i = heappop(self.busy)
+            self.tellers[i].set_available(True)
+            if self.on_duty[i]:
+                self.free.add(i)
+                self._release(i)
+    
+    def set_tellers(self, staff):
+        """
+        `set_tellers(staff)`
+        Changes how many tellers of each skill group are on duty. A group
+        that shrinks takes its highest-numbered tellers off duty; those
+        serving a customer finish first. A group that grows brings back its
+        lowest-numbered tellers who are off duty, then hires new ones, who
+        are numbered after every teller so far.
+        
+        @pre    : staff must give a non-negative number of tellers for every
+        group the bank was built with, in the same order
+        @pre    : every skill the bank was built with must keep a teller on
+        duty, or customers needing it would wait forever
+        
+        @param  : self  : the SkillBank object to operate upon
+        @param  : staff : int[] : the number of tellers on duty in each group
+        @return : none
+        """
+        assert type(staff) != int, "a skill-based bank is staffed by skill group"
+        assert len(staff) == len(self._members)
+        assert all(type(n) == int and n >= 0 for n in staff)
+        covered = 0
+        for n, mask in zip(staff, self._group_masks):
+            if n:
+                covered |= mask
+        assert covered == self._all_skills, "some skill would have no teller on duty"
+        busy = {i for _, i in self.busy}
+        for g, n in enumerate(staff):
+            members = self._members[g]
+            working = [i for i in members if self.on_duty[i]]
+            for i in working[n:]:
+                self.on_duty[i] = False
+                if i in self.free:
+                    self.free.discard(i)
+                    pool = self._pools[self._pool[i]]
+                    pool.remove(i)
+                    heapify(pool)
+                    if not pool:
+                        self._idle_pools &= ~(1 << self._pool[i])
+                    self._unidle(i)
+            returning = [i for i in members if not self.on_duty[i]][:max(0, n - len(working))]
+            for i in returning:
+                self.on_duty[i] = True
+                if i not in busy:
+                    self.free.add(i)
+                    self._release(i)
+            for _ in range(n - len(working) - len(returning)):
+                i = len(self.tellers)
+                teller = Teller(str(i).zfill(3), employee_id=i)
+                teller.skills = self.tellers[members[0]].skills
+                self.tellers.append(teller)
+                self._masks.append(self._group_masks[g])
+                self._pool.append(self._pool[members[0]])
+                self.on_duty.append(True)
+                members.append(i)
+                self.free.add(i)
+                self._release(i)
+    
+    def utilization(self):
+        # the busy fraction of the tellers on duty or finishing a customer
+        working = sum(self.on_duty) + sum(1 for _, i in self.busy if not self.on_duty[i])
+        return len(self.busy) / working
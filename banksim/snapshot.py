@@ -0,0 +1,71 @@
+#
+# `snapshot.py`
+# Saves a paused simulation to disk and brings it back exactly as it was
+#
+# Written by Joshua Paul A. Chan
+
+import os
+import pickle
+
+from .engine import Simulation
+
+def snapshot(sim):
+    """
+    `snapshot(sim)`
+    Serializes a simulation: its bank (tellers, line and clock), its event
+    calendar, the rest of its arrival stream and the state of its random
+    number generator. Customers that have already left are not kept, so the
+    size of a snapshot grows with how busy the bank is, not with how long it
+    has been open (unless the simulation was built with record_waits).
+
+    @pre    : sim must be a Simulation, typically paused with run(until)
+
+    @param  : sim   : Simulation    : the simulation to save
+    @return : bytes : the snapshot
+    """
+    assert isinstance(sim, Simulation)
+    return pickle.dumps(sim, pickle.HIGHEST_PROTOCOL)
+
+def restore(data, trace=None):
+    """
+    `restore(data, trace)`
+    Rebuilds a simulation from a snapshot. Running it on gives exactly the
+    same results as the original simulation would have.
+
+    @param  : data  : bytes         : a snapshot from snapshot()
+    @param  : trace : TraceWriter   : a trace to continue logging to, as open
+    trace files are not saved [default None]
+    @return : Simulation    : the simulation, paused where it was saved
+    """
+    sim = pickle.loads(data)
+    assert isinstance(sim, Simulation)
+    sim.trace = trace
+    return sim
+
+def save(sim, path):
+    """
+    `save(sim, path)`
+    Writes a snapshot of a simulation to a file. The file is replaced in one
+    step, so a crash part way through never leaves a truncated snapshot.
+
+    @param  : sim   : Simulation    : the simulation to save
+    @param  : path  : str           : the file to write
+    @return : none
+    """
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(snapshot(sim))
+    os.replace(tmp, path)
+
+def load(path, trace=None):
+    """
+    `load(path, trace)`
+    Reads a simulation back from a file written by save()
+
+    @param  : path  : str           : the snapshot file
+    @param  : trace : TraceWriter   : a trace to continue logging to
+    [default None]
+    @return : Simulation    : the simulation, paused where it was saved
+    """
+    with open(path, 'rb') as f:
+        return restore(f.read(), trace)
@@ -0,0 +1,548 @@
+#
+# `staffing.py`
+# Finds the smallest number of tellers, or the cheapest shift schedule, that
+# meets a wait-time target
+#
+# Written by Joshua Paul A. Chan
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from . import arrivals
+from .cache import cached_map, result_key
+from .erlang import MMc
+from .replication import replication_seeds
+from .reception_queue import FIFO
+from .scenario import Scenario
+from .service import Exponential
+from .streaming import PeriodWaits, quantile
+from .teller import Teller
+
+# wait-time metrics a target can be placed on
+METRICS = ('mean', 'p50', 'p90', 'p95', 'p99', 'max')
+
+# how a StaffingOptimizer evaluates teller counts: by M/M/c formulas when
+# the scenario allows it and by simulation otherwise, or always one way
+AUTO = 'auto'
+ANALYTIC = 'analytic'
+SIMULATE = 'simulate'
+
+METHODS = (AUTO, ANALYTIC, SIMULATE)
+
+def markovian(scenario):
+    """
+    `markovian(scenario)`
+    Checks whether a scenario is an M/M/c queue: Poisson arrivals,
+    exponential service and a single first-come, first-served line without
+    priority classes, served by the same tellers who can help with anything
+    all day, and customers who neither balk nor renege
+    
+    @param  : scenario  : Scenario  : the scenario to check
+    @return : bool      : whether erlang.MMc describes it
+    """
+    return (scenario.arrival_process == arrivals.POISSON
+        and type(scenario.service) == Exponential
+        and scenario.discipline == FIFO
+        and scenario.lines is None
+        and scenario.classes is None
+        and scenario.staff is None
+        and scenario.balk_at is None
+        and scenario.patience is None
+        and scenario.shifts is None)
+
+def wait_metrics(waits):
+    """
+    `wait_metrics(waits)`
+    Summarizes a list of wait times by every metric in METRICS
+    
+    @param  : waits : float[]   : the wait times of served customers
+    @return : dict  : metric name -> value
+    """
+    waits = sorted(waits) or [0]
+    return {
+        'mean': sum(waits) / len(waits),
+        'p50': quantile(waits, 0.50),
+        'p90': quantile(waits, 0.90),
+        'p95': quantile(waits, 0.95),
+        'p99': quantile(waits, 0.99),
+        'max': waits[-1],
+    }
+
+def _evaluate(args):
+    scenario, seed = args
+    return wait_metrics(scenario.run(seed, record_waits=True).waits)
+
+class StaffingOptimizer(object):
+    """
+    `StaffingOptimizer`
+    Answers "how many tellers do we need?" for a scenario. Teller counts are
+    searched by doubling and then bisection, on the assumption that waits
+    never get worse when a teller is added, so only O(log n) counts are ever
+    simulated. Every count that is simulated is remembered, so later queries
+    with a different target reuse earlier runs.
+    
+    Each count is run with the same replication seeds, so the counts being
+    compared see the same customers.
+    
+    When the scenario is Markovian (see markovian()) the M/M/c formulas in
+    erlang.py answer every metric but 'max' in microseconds instead. They
+    describe the bank in steady state, whereas a simulation of n_customers
+    starts with an empty line, so the two only agree for long runs;
+    cross_check() compares them.
+    
+    @attr   : scenario      : Scenario  : the scenario to staff; its
+    n_tellers is ignored
+    @attr   : replications  : int       : replications per teller count
+    @attr   : seed          : int       : the master seed
+    @attr   : workers       : int       : worker processes per evaluation
+    @attr   : method        : str       : one of METHODS
+    @attr   : cache         : ResultCache   : where simulated results are
+    looked up and stored, or None
+    @attr   : evaluations   : dict      : n_tellers -> averaged simulated wait
+    metrics
+    
+    @method : evaluate          : dict  : the simulated wait metrics for a
+    teller count
+    @method : analytic          : dict  : the M/M/c wait metrics for a count
+    @method : value             : float : a wait metric, however it is found
+    @method : cross_check       : dict  : simulated against M/M/c metrics
+    @method : meets             : bool  : whether a teller count meets a target
+    @method : minimum_tellers   : int   : the fewest tellers meeting a target
+    """
+    
+    def __init__(self, scenario, replications=1, seed=0, workers=1, method=AUTO,
+            cache=None):
+        """
+        `StaffingOptimizer(scenario, replications, seed, workers, method, cache)`
+        Constructs a new StaffingOptimizer
+        
+        @pre    : scenario must be a Scenario
+        @pre    : replications must be a positive int
+        @pre    : method must be one of METHODS, and may only be 'analytic' for
+        a Markovian scenario
+        
+        @param  : self          : the StaffingOptimizer to operate upon
+        @param  : scenario      : Scenario  : the scenario to staff
+        @param  : replications  : int       : replications per count [default 1]
+        @param  : seed          : int       : the master seed [default 0]
+        @param  : workers       : int       : worker processes; None uses every
+        core [default 1]
+        @param  : method        : str       : how to evaluate teller counts
+        [default 'auto']
+        @param  : cache         : ResultCache   : a result cache [default None]
+        @return : none
+        """
+        assert isinstance(scenario, Scenario)
+        assert type(replications) == int and replications > 0
+        assert method in METHODS
+        assert method != ANALYTIC or markovian(scenario)
+        
+        self.scenario = scenario
+        self.replications = replications
+        self.seed = seed
+        self.workers = workers
+        self.method = method
+        self.cache = cache
+        self.evaluations = {}
+    
+    def evaluate(self, n_tellers):
+        """
+        `evaluate(n_tellers)`
+        Returns the wait metrics for a teller count, averaged over the
+        replications, simulating it only the first time it is asked for
+        
+        @param  : self      : the StaffingOptimizer to operate upon
+        @param  : n_tellers : int   : the number of tellers
+        @return : dict      : metric name -> value
+        """
+        if n_tellers not in self.evaluations:
+            scenario = self.scenario.replace(n_tellers=n_tellers)
+            jobs = [(scenario, s) for s in replication_seeds(self.seed, self.replications)]
+            keys = None
+            if self.cache is not None:
+                config = scenario.config()
+                keys = [result_key('wait_metrics', config, seed=s) for _, s in jobs]
+            results = cached_map(self._run, jobs, keys, self.cache)
+            
+            self.evaluations[n_tellers] = {
+                m: sum(r[m] for r in results) / len(results) for m in METRICS
+            }
+        return self.evaluations[n_tellers]
+    
+    def _run(self, jobs):
+        workers = self.workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) <= 1:
+            return list(map(_evaluate, jobs))
+        with ProcessPoolExecutor(workers) as pool:
+            return list(pool.map(_evaluate, jobs))
+    
+    def analytic(self, n_tellers):
+        """
+        `analytic(n_tellers)`
+        Returns the steady-state M/M/c wait metrics for a teller count
+        
+        @pre    : the scenario must be Markovian
+        
+        @param  : self      : the StaffingOptimizer to operate upon
+        @param  : n_tellers : int   : the number of tellers
+        @return : dict      : metric name -> value
+        """
+        assert markovian(self.scenario)
+        return MMc(self.scenario.arrival_rate, self.scenario.service.rate,
+            n_tellers).metrics()
+    
+    def uses_analytic(self, metric='mean'):
+        if self.method == SIMULATE or metric == 'max':
+            return False
+        return self.method == ANALYTIC or markovian(self.scenario)
+    
+    def value(self, n_tellers, metric='mean'):
+        """
+        `value(n_tellers, metric)`
+        Returns one wait metric for a teller count, from the M/M/c formulas
+        when they apply and from simulation otherwise
+        
+        @param  : self      : the StaffingOptimizer to operate upon
+        @param  : n_tellers : int   : the number of tellers
+        @param  : metric    : str   : one of METRICS [default 'mean']
+        @return : float     : the metric
+        """
+        assert metric in METRICS
+        if self.uses_analytic(metric):
+            return self.analytic(n_tellers)[metric]
+        return self.evaluate(n_tellers)[metric]
+    
+    def cross_check(self, n_tellers):
+        """
+        `cross_check(n_tellers)`
+        Simulates a teller count and sets the result beside the M/M/c
+        formulas, e.g. to check that a run is long enough to reach steady
+        state, or to check the simulator itself
+        
+        @pre    : the scenario must be Markovian
+        
+        @param  : self      : the StaffingOptimizer to operate upon
+        @param  : n_tellers : int   : the number of tellers
+        @return : dict      : metric name -> (simulated, analytic, relative
+        difference), for every metric but 'max'
+        """
+        simulated = self.evaluate(n_tellers)
+        analytic = self.analytic(n_tellers)
+        check = {}
+        for m in METRICS:
+            if m == 'max':
+                continue
+            s, a = simulated[m], analytic[m]
+            if a == s:
+                diff = 0.0
+            elif a == 0 or math.isinf(a):
+                diff = math.inf
+            else:
+                diff = (s - a) / a
+            check[m] = (s, a, diff)
+        return check
+    
+    def meets(self, n_tellers, limit, metric='mean'):
+        """
+        `meets(n_tellers, limit, metric)`
+        Checks whether a teller count keeps a wait metric within a limit
+        
+        @param  : self      : the StaffingOptimizer to operate upon
+        @param  : n_tellers : int   : the number of tellers
+        @param  : limit     : float : the largest acceptable value
+        @param  : metric    : str   : one of METRICS [default 'mean']
+        @return : bool      : whether the target is met
+        """
+        return self.value(n_tellers, metric) <= limit
+    
+    def minimum_tellers(self, limit, metric='mean'):
+        """
+        `minimum_tellers(limit, metric)`
+        Finds the smallest number of tellers for which the given wait metric
+        is at most limit, e.g. minimum_tellers(5, 'p95') for "95% of customers
+        wait 5 or less"
+        
+        @pre    : limit must be non-negative
+        @post   : the answer is at most n_customers, since nobody waits when
+        every customer has their own teller
+        
+        @param  : self      : the StaffingOptimizer to operate upon
+        @param  : limit     : float : the largest acceptable value
+        @param  : metric    : str   : one of METRICS [default 'mean']
+        @return : int       : the minimum number of tellers
+        """
+        assert metric in METRICS
+        assert limit >= 0
+        ceiling = self.scenario.n_customers
+        
+        # double until the target is met, then bisect the last gap
+        lo, hi = 0, 1
+        while hi < ceiling and not self.meets(hi, limit, metric):
+            lo, hi = hi, min(2 * hi, ceiling)
+        
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.meets(mid, limit, metric):
+                hi = mid
+            else:
+                lo = mid
+        return hi
+
+def hourly_shifts(schedule, period=60):
+    """
+    `hourly_shifts(schedule, period)`
+    Turns a headcount per hour into Scenario arguments
+    
+    @param  : schedule  : int[] : the number of tellers on duty each hour
+    @param  : period    : float : the simulated time in an hour [default 60]
+    @return : tuple     : (n_tellers for the first hour, shifts for the
+    hours after it that change the headcount)
+    """
+    shifts = [(h * period, n) for h, n in enumerate(schedule)
+        if h > 0 and n != schedule[h - 1]]
+    return schedule[0], shifts or None
+
+def _covers(a, b):
+    # whether schedule a has at least as many tellers as b every hour
+    return all(x >= y for x, y in zip(a, b))
+
+def _evaluate_schedule(args):
+    scenario, seed, period, hours = args
+    waits = PeriodWaits(period, hours)
+    scenario.run(seed, period_waits=waits)
+    return waits.metrics()
+
+class ScheduleOptimizer(object):
+    """
+    `ScheduleOptimizer`
+    Finds the cheapest schedule of tellers per hour that keeps a wait-time
+    metric within a limit in every hour, where an hour's waits are those of
+    the customers who arrived in it. Customers who arrive after the last
+    hour count towards it. A schedule costs each teller's hourly wage for
+    every hour they are on duty.
+    
+    Like StaffingOptimizer this assumes waits never get worse when a teller
+    is added to any hour. So a schedule with no more tellers in any hour than
+    one that missed the target misses it too, and a schedule with at least
+    as many tellers every hour as one that met it meets it too (at no lower
+    cost). Both are answered from earlier results without simulating them.
+    
+    The search starts with every hour at max_tellers and takes the hours in
+    order, finding the fewest tellers for each while later hours stay where
+    they are. The candidates for an hour are simulated side by side, one per
+    worker, which narrows each hour by a factor of (workers + 1) per round.
+    Every schedule is checked over all of its hours, so the answer meets the
+    target even though lowering a later hour can lengthen an earlier hour's
+    waits. Finally single tellers are dropped while any hour can spare one.
+    Taking the hours one at a time is a heuristic: it misses the optimum only
+    when an extra teller in one hour saves more than one teller later on.
+    
+    @attr   : scenario      : Scenario  : the scenario to staff; its
+    n_tellers and shifts are ignored
+    @attr   : hours         : int       : the number of hours to schedule
+    @attr   : period        : float     : the simulated time in an hour
+    @attr   : max_tellers   : int       : the most tellers on duty in any hour
+    @attr   : wage          : float     : what a teller is paid per hour
+    @attr   : replications  : int       : replications per schedule
+    @attr   : seed          : int       : the master seed
+    @attr   : workers       : int       : worker processes
+    @attr   : cache         : ResultCache   : where simulated results are
+    looked up and stored, or None
+    @attr   : evaluations   : dict      : schedule -> each hour's averaged
+    wait metrics
+    @attr   : met           : tuple[]   : simulated schedules that met a
+    target
+    @attr   : missed        : tuple[]   : simulated schedules that missed it
+    @attr   : pruned        : int       : schedules answered without being
+    simulated
+    
+    @method : cost          : float : the wages paid for a schedule
+    @method : scenario_for  : Scenario  : the scenario run for a schedule
+    @method : evaluate      : dict  : each hour's wait metrics for schedules
+    @method : meets         : bool  : whether a schedule meets a target
+    @method : optimize      : tuple : the cheapest schedule meeting a target
+    """
+    
+    def __init__(self, scenario, hours, max_tellers, period=60, salary=None,
+            replications=1, seed=0, workers=1, cache=None):
+        """
+        `ScheduleOptimizer(scenario, hours, max_tellers, period, salary,
+        replications, seed, workers, cache)`
+        Constructs a new ScheduleOptimizer
+        
+        @pre    : scenario must be a Scenario without skill-based staff
+        @pre    : hours, max_tellers and replications must be positive ints
+        
+        @param  : self          : the ScheduleOptimizer to operate upon
+        @param  : scenario      : Scenario  : the scenario to staff
+        @param  : hours         : int       : the number of hours to schedule
+        @param  : max_tellers   : int       : the most tellers in any hour
+        @param  : period        : float     : the simulated time in an hour
+        [default 60]
+        @param  : salary        : str       : a teller's yearly salary [default
+        None, the Employee default]
+        @param  : replications  : int       : replications per schedule
+        [default 1]
+        @param  : seed          : int       : the master seed [default 0]
+        @param  : workers       : int       : worker processes; None uses every
+        core [default 1]
+        @param  : cache         : ResultCache   : a result cache [default None]
+        @return : none
+        """
+        assert isinstance(scenario, Scenario) and scenario.staff is None
+        assert type(hours) == int and hours > 0
+        assert type(max_tellers) == int and max_tellers > 0
+        assert period > 0
+        assert type(replications) == int and replications > 0
+        
+        self.scenario = scenario
+        self.hours = hours
+        self.max_tellers = max_tellers
+        self.period = period
+        self.wage = Teller('000', salary).hourly_wage()
+        self.replications = replications
+        self.seed = seed
+        self.workers = workers
+        self.cache = cache
+        self.evaluations = {}
+        self.met = []
+        self.missed = []
+        self.pruned = 0
+        self._target = None
+    
+    def cost(self, schedule):
+        return self.wage * sum(schedule)
+    
+    def scenario_for(self, schedule):
+        n_tellers, shifts = hourly_shifts(schedule, self.period)
+        return self.scenario.replace(n_tellers=n_tellers, shifts=shifts)
+    
+    def evaluate(self, schedules):
+        """
+        `evaluate(schedules)`
+        Returns each hour's wait metrics, averaged over the replications, for
+        several schedules at once. Schedules not seen before (nor cached) are
+        simulated together, spread over the workers.
+        
+        @param  : self      : the ScheduleOptimizer to operate upon
+        @param  : schedules : tuple[]   : tellers on duty each hour
+        @return : dict      : schedule -> list of each hour's metrics
+        """
+        schedules = [tuple(s) for s in schedules]
+        new = [s for s in dict.fromkeys(schedules) if s not in self.evaluations]
+        seeds = replication_seeds(self.seed, self.replications)
+        jobs = [(self.scenario_for(s), seed, self.period, self.hours)
+            for s in new for seed in seeds]
+        keys = None
+        if self.cache is not None:
+            keys = [result_key('period_metrics', scenario.config(), seed=seed,
+                period=period, hours=hours) for scenario, seed, period, hours in jobs]
+        results = cached_map(self._run, jobs, keys, self.cache)
+        
+        r = len(seeds)
+        for k, s in enumerate(new):
+            runs = results[k * r:(k + 1) * r]
+            self.evaluations[s] = [
+                {m: sum(run[h][m] for run in runs) / r for m in METRICS}
+                for h in range(self.hours)
+            ]
+        return {s: self.evaluations[s] for s in schedules}
+    
+    def _run(self, jobs):
+        workers = self.workers or os.cpu_count() or 1
+        if workers == 1 or len(jobs) <= 1:
+            return list(map(_evaluate_schedule, jobs))
+        with ProcessPoolExecutor(min(workers, len(jobs))) as pool:
+            return list(pool.map(_evaluate_schedule, jobs))
+    
+    def _known(self, schedule):
+        # whether a schedule meets the target, if earlier results decide it
+        if any(_covers(bad, schedule) for bad in self.missed):
+            return False
+        if any(_covers(schedule, good) for good in self.met):
+            return True
+        return None
+    
+    def _record(self, schedule, limit, metric):
+        ok = all(hour[metric] <= limit for hour in self.evaluations[schedule])
+        (self.met if ok else self.missed).append(schedule)
+        return ok
+    
+    def meets(self, schedules, limit, metric='mean'):
+        """
+        `meets(schedules, limit, metric)`
+        Checks whether schedules keep a wait metric within a limit in every
+        hour, simulating only those that earlier results do not decide
+        
+        @param  : self      : the ScheduleOptimizer to operate upon
+        @param  : schedules : tuple[]   : tellers on duty each hour
+        @param  : limit     : float : the largest acceptable value
+        @param  : metric    : str   : one of METRICS [default 'mean']
+        @return : bool[]    : whether each schedule meets the target
+        """
+        assert metric in METRICS
+        if self._target != (limit, metric):
+            # results for another target cannot decide this one
+            self._target = (limit, metric)
+            self.met, self.missed = [], []
+        
+        answers = [self._known(tuple(s)) for s in schedules]
+        unknown = [tuple(s) for s, a in zip(schedules, answers) if a is None]
+        self.pruned += len(schedules) - len(unknown)
+        self.evaluate(unknown)
+        decided = {s: self._record(s, limit, metric) for s in dict.fromkeys(unknown)}
+        return [a if a is not None else decided[tuple(s)]
+            for s, a in zip(schedules, answers)]
+    
+    def optimize(self, limit, metric='mean'):
+        """
+        `optimize(limit, metric)`
+        Finds the cheapest schedule keeping a wait metric within a limit in
+        every hour, e.g. optimize(5, 'p95') for "in every hour, 95% of
+        customers wait 5 or less"
+        
+        @pre    : limit must be non-negative
+        
+        @param  : self      : the ScheduleOptimizer to operate upon
+        @param  : limit     : float : the largest acceptable value
+        @param  : metric    : str   : one of METRICS [default 'mean']
+        @return : tuple     : (tellers on duty each hour, cost), or None if
+        even max_tellers every hour misses the target
+        """
+        assert metric in METRICS
+        assert limit >= 0
+        
+        best = [self.max_tellers] * self.hours
+        if not self.meets([best], limit, metric)[0]:
+            return None
+        
+        probes = max(1, self.workers or os.cpu_count() or 1)
+        for h in range(self.hours):
+            # best[h] meets the target and lo is known to miss it
+            lo, hi = 0, best[h]
+            while hi - lo > 1:
+                step = (hi - lo) / (probes + 1)
+                counts = sorted({lo + max(1, int(step * k)) for k in range(1, probes + 1)} - {hi})
+                candidates = [tuple(best[:h] + [n] + best[h + 1:]) for n in counts]
+                for n, ok in zip(counts, self.meets(candidates, limit, metric)):
+                    if ok:
+                        hi = min(hi, n)
+                    else:
+                        lo = max(lo, n)
+                lo = min(lo, hi - 1)
+            best[h] = hi
+        
+        # drop single tellers while any hour can spare one; lowering an hour
+        # below what its own search settled on is usually decided by the
+        # schedules that missed there, without simulating
+        while True:
+            candidates = [tuple(best[:h] + [best[h] - 1] + best[h + 1:])
+                for h in range(self.hours) if best[h] > 1]
+            cheaper = [c for c, ok in zip(candidates, self.meets(candidates, limit, metric)) if ok]
+            if not cheaper:
+                break
+            best = list(cheaper[0])
+        
+        schedule = tuple(best)
+        return schedule, self.cost(schedule)
@@ -0,0 +1,331 @@
+#
+# `streaming.py`
+# Constant-memory statistics over a stream of wait times
+#
+# Written by Joshua Paul A. Chan
+
+import math
+from bisect import bisect_right, insort
+
+def quantile(values, q):
+    """
+    `quantile(values, q)`
+    The q-quantile of some sorted values, interpolating between neighbours
+    
+    @pre    : values must be sorted and non-empty
+    @pre    : q must be between 0 and 1
+    
+    @param  : values    : float[]   : the sorted values
+    @param  : q         : float     : the quantile to find
+    @return : float     : the q-quantile
+    """
+    assert len(values) > 0
+    assert 0 <= q <= 1
+    pos = q * (len(values) - 1)
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(values) - 1)
+    return values[lo] + (values[hi] - values[lo]) * (pos - lo)
+
+class RunningMoments(object):
+    """
+    `RunningMoments`
+    The count, mean, variance, minimum and maximum of a stream of values,
+    updated one value at a time with Welford's algorithm, which stays
+    accurate where a running sum of squares would cancel catastrophically
+    
+    @attr   : n     : int   : the number of values seen
+    @attr   : mean  : float : their mean
+    @attr   : min   : float : the smallest value, or None
+    @attr   : max   : float : the largest value, or None
+    
+    @method : add       : none  : adds a value
+    @method : variance  : float : the sample variance
+    @method : stdev     : float : the sample standard deviation
+    """
+    
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.min = None
+        self.max = None
+        self._m2 = 0.0
+    
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+        if self.max is None or x > self.max:
+            self.max = x
+        if self.min is None or x < self.min:
+            self.min = x
+    
+    def variance(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+    
+    def stdev(self):
+        return math.sqrt(self.variance())
+    
+    def __str__(self):
+        return "<RunningMoments n='{}' mean='{}' />".format(self.n, self.mean)
+    
+    def __repr__(self):
+        return str(self)
+
+class P2Quantile(object):
+    """
+    `P2Quantile`
+    Estimates one quantile of a stream with five markers, using Jain and
+    Chlamtac's P-square algorithm. The markers are nudged towards their ideal
+    positions as values arrive and their heights adjusted by piecewise-
+    parabolic interpolation, so no values are ever stored.
+    
+    @attr   : p     : float : the quantile being estimated, between 0 and 1
+    @attr   : n     : int   : the number of values seen
+    
+    @method : add   : none  : adds a value
+    @method : value : float : the current estimate
+    """
+    
+    def __init__(self, p):
+        """
+        `P2Quantile(p)`
+        Constructs a new P2Quantile
+        
+        @pre    : p must be between 0 and 1
+        
+        @param  : self  : the P2Quantile object to operate upon
+        @param  : p     : float : the quantile to estimate
+        @return : none
+        """
+        assert 0 <= p <= 1
+        self.p = p
+        self.n = 0
+        self._heights = []
+        self._positions = [1, 2, 3, 4, 5]
+        self._desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+    
+    def add(self, x):
+        self.n += 1
+        q = self._heights
+        if self.n <= 5:
+            # the first five values are kept exactly and become the markers
+            insort(q, x)
+            return
+        
+        # find the cell the value falls in, stretching the ends if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect_right(q, x) - 1
+        
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self._desired
+        for i in range(5):
+            desired[i] += self._increments[i]
+        
+        # move each middle marker at most one position towards where it
+        # ought to be
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                h = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < h < q[i + 1]:
+                    h = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = h
+                n[i] += d
+    
+    def value(self):
+        """
+        `value()`
+        The current estimate of the quantile; exact until a sixth value
+        arrives
+        
+        @param  : self  : the P2Quantile object to operate upon
+        @return : float : the estimate, or 0 if no values have been seen
+        """
+        if self.n > 5:
+            return self._heights[2]
+        if self.n == 0:
+            return 0
+        return quantile(self._heights, self.p)
+    
+    def __str__(self):
+        return "<P2Quantile p='{}' value='{}' />".format(self.p, self.value())
+    
+    def __repr__(self):
+        return str(self)
+
+class Histogram(object):
+    """
+    `Histogram`
+    Counts values in equal-width bins starting at 0. Values past the last
+    bin are counted in it, so the memory used is fixed up front.
+    
+    @attr   : width     : float : the width of each bin
+    @attr   : counts    : int[] : the count in each bin
+    
+    @method : add       : none  : adds a value
+    @method : edges     : float[]   : the lower edge of each bin
+    """
+    
+    def __init__(self, width=1, bins=64):
+        assert width > 0
+        assert type(bins) == int and bins > 0
+        self.width = width
+        self.counts = [0] * bins
+    
+    def add(self, x):
+        i = int(x // self.width)
+        last = len(self.counts) - 1
+        self.counts[min(max(i, 0), last)] += 1
+    
+    def edges(self):
+        return [i * self.width for i in range(len(self.counts))]
+    
+    def __str__(self):
+        return "<Histogram width='{}' bins='{}' />".format(self.width, len(self.counts))
+    
+    def __repr__(self):
+        return str(self)
+
+class WaitStats(object):
+    """
+    `WaitStats`
+    Summarizes wait times as customers are served, in memory that does not
+    grow with the number of customers: moments, a P-square sketch per
+    quantile and a histogram. Its metrics() are keyed like
+    staffing.wait_metrics, so either can be used where wait metrics are
+    expected.
+    
+    @attr   : moments   : RunningMoments    : count, mean, variance, min, max
+    @attr   : quantiles : dict      : quantile -> P2Quantile
+    @attr   : histogram : Histogram : the distribution of waits
+    
+    @method : add       : none  : adds a wait time
+    @method : quantile  : float : the estimate of a tracked quantile
+    @method : metrics   : dict  : metric name -> value
+    """
+    
+    QUANTILES = (0.50, 0.90, 0.95, 0.99)
+    
+    def __init__(self, quantiles=QUANTILES, bin_width=1, bins=64):
+        """
+        `WaitStats(quantiles, bin_width, bins)`
+        Constructs a new, empty WaitStats
+        
+        @param  : self      : the WaitStats object to operate upon
+        @param  : quantiles : float[]   : the quantiles to track [default
+        0.5, 0.9, 0.95 and 0.99]
+        @param  : bin_width : float     : the histogram's bin width [default 1]
+        @param  : bins      : int       : the histogram's bin count [default 64]
+        @return : none
+        """
+        self.moments = RunningMoments()
+        self.quantiles = {q: P2Quantile(q) for q in quantiles}
+        self.histogram = Histogram(bin_width, bins)
+        self._sketches = list(self.quantiles.values())
+    
+    def add(self, wait):
+        self.moments.add(wait)
+        for sketch in self._sketches:
+            sketch.add(wait)
+        self.histogram.add(wait)
+    
+    @property
+    def n(self):
+        return self.moments.n
+    
+    def quantile(self, q):
+        """
+        `quantile(q)`
+        The estimate of a quantile that is being tracked
+        
+        @pre    : q must be one of the quantiles given at construction
+        
+        @param  : self  : the WaitStats object to operate upon
+        @param  : q     : float : the quantile
+        @return : float : its estimate
+        """
+        assert q in self.quantiles
+        return self.quantiles[q].value()
+    
+    def metrics(self):
+        """
+        `metrics()`
+        Summarizes the waits seen so far
+        
+        @param  : self  : the WaitStats object to operate upon
+        @return : dict  : 'mean', 'stdev', 'max' and 'p<percent>' for every
+        tracked quantile -> value
+        """
+        m = self.moments
+        out = {
+            'mean': m.mean,
+            'stdev': m.stdev(),
+            'max': m.max if m.max is not None else 0,
+        }
+        for q, sketch in self.quantiles.items():
+            out['p{:g}'.format(100 * q)] = sketch.value()
+        return out
+    
+    def __str__(self):
+        return "<WaitStats n='{}' mean='{}' />".format(self.n, self.moments.mean)
+    
+    def __repr__(self):
+        return str(self)
+
+class PeriodWaits(object):
+    """
+    `PeriodWaits`
+    Wait times split by the period customers arrived in, e.g. by hour, with a
+    WaitStats per period
+    
+    @attr   : period    : float         : the length of a period
+    @attr   : periods   : WaitStats[]   : the waits of each period, from time 0
+    @attr   : n_periods : int           : the number of periods, the last one
+    taking every later arrival, or None to add periods as they are needed
+    
+    @method : add       : none  : adds a wait time
+    @method : metrics   : dict[]: each period's metrics, plus 'n' waits
+    """
+    
+    def __init__(self, period, n_periods=None):
+        assert period > 0
+        assert n_periods is None or (type(n_periods) == int and n_periods > 0)
+        self.period = period
+        self.n_periods = n_periods
+        self.periods = [WaitStats() for _ in range(n_periods or 0)]
+    
+    def add(self, t, wait):
+        k = int(t // self.period)
+        if self.n_periods is not None:
+            k = min(k, self.n_periods - 1)
+        while len(self.periods) <= k:
+            self.periods.append(WaitStats())
+        self.periods[k].add(wait)
+    
+    def metrics(self):
+        out = []
+        for stats in self.periods:
+            m = stats.metrics()
+            m['n'] = stats.n
+            out.append(m)
+        return out
+    
+    def __str__(self):
+        return "<PeriodWaits period='{}' n='{}' />".format(
+            self.period, [stats.n for stats in self.periods])
+    
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,137 @@
+#
+# `streams.py`
+# Random number streams for variance reduction: common random numbers and
+# antithetic variates
+#
+# Written by Joshua Paul A. Chan
+
+import random
+
+MASK64 = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+# salts that keep a customer's arrival and service draws apart, and both
+# apart from the bank's own choices (e.g. of a line)
+ARRIVAL = 0x41
+SERVICE = 0x53
+ROUTING = 0x52
+
+def _mix(z):
+    # the splitmix64 finalizer: a bijective 64-bit hash with good avalanche
+    z = (z + GOLDEN) & MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+    return z ^ (z >> 31)
+
+class Antithetic(random.Random):
+    """
+    `Antithetic`
+    A random.Random whose uniforms are mirrored, u -> 1 - u. Run with the same
+    seed as a plain Random, every draw made by inversion (expovariate,
+    choices by random(), resampling) lands on the opposite side of its
+    distribution, so the two runs' errors tend to cancel when averaged.
+    """
+    
+    def random(self):
+        u = super().random()
+        return 1.0 - u if u else u
+
+class Substream(random.Random):
+    """
+    `Substream`
+    A counter-based random stream (splitmix64) that can jump straight to the
+    draws belonging to any customer. Selecting a customer costs a couple of
+    integer hashes, where seeding a new Mersenne Twister per customer would
+    cost several microseconds.
+    
+    Only random() is provided natively; random.Random builds expovariate,
+    lognormvariate, randint and the rest on top of it.
+    
+    @attr   : seed_value    : int   : the seed the stream was built from (a
+    random one when built from None)
+    @attr   : salt          : int   : separates streams built from one seed
+    @attr   : antithetic    : bool  : whether uniforms are mirrored
+    
+    @method : select    : none  : moves to the start of a customer's draws
+    """
+    
+    def __init__(self, seed, salt, antithetic=False):
+        # random.Random.__init__ would seed a Mersenne Twister we never use
+        if seed is None:
+            seed = random.getrandbits(64)
+        self.seed_value = seed
+        self.salt = salt
+        self.antithetic = antithetic
+        self.gauss_next = None
+        self._base = _mix(_mix(seed & MASK64) ^ salt)
+        self.select(0)
+    
+    def select(self, i):
+        self._key = _mix(self._base ^ i)
+        self._k = 0
+        self.gauss_next = None
+    
+    def seed(self, *args, **kwargs):
+        # substreams are keyed by select(), not reseeded
+        pass
+    
+    def random(self):
+        self._k += 1
+        u = (_mix((self._key + self._k * GOLDEN) & MASK64) >> 11) * (1.0 / (1 << 53))
+        return 1.0 - u if self.antithetic and u else u
+    
+    def __reduce__(self):
+        return (self.__class__, (self.seed_value, self.salt, self.antithetic),
+            self.__dict__.copy())
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+    
+    def __getstate__(self):
+        return self.__dict__.copy()
+
+class CustomerStreams(object):
+    """
+    `CustomerStreams`
+    Common random numbers: customer i's arrival and service draws come from
+    substreams keyed by (seed, i). Any two configurations run with the same
+    seed therefore see the same customers, even when one of them makes a
+    different number of draws for some customers (e.g. thinned arrivals).
+    
+    @attr   : arrival   : Substream : draws for arrival times
+    @attr   : service   : Substream : draws for visit purposes and service
+    times
+    
+    @method : select    : none  : moves both substreams to a customer
+    """
+    
+    def __init__(self, seed, antithetic=False):
+        self.arrival = Substream(seed, ARRIVAL, antithetic)
+        self.service = Substream(seed, SERVICE, antithetic)
+    
+    def select(self, i):
+        self.arrival.select(i)
+        self.service.select(i)
+    
+    def __str__(self):
+        return "<CustomerStreams seed='{}' antithetic='{}' />".format(
+            self.arrival.seed_value, self.arrival.antithetic)
+    
+    def __repr__(self):
+        return str(self)
+
+def generator(seed=None, crn=False, antithetic=False):
+    """
+    `generator(seed, crn, antithetic)`
+    Builds the source of randomness for one run
+    
+    @param  : seed          : int   : the seed, or None for a random one
+    [default None]
+    @param  : crn           : bool  : give every customer their own
+    substreams [default False]
+    @param  : antithetic    : bool  : mirror every uniform [default False]
+    @return : random.Random/CustomerStreams : the generator
+    """
+    if crn:
+        return CustomerStreams(seed, antithetic)
+    return Antithetic(seed) if antithetic else random.Random(seed)
@@ -17,9 +17,11 @@ class Teller(Employee):
     @attr   : name          : str
     @attr   : salary        : str
     @attr   : available     : bool
+    @attr   : skills        : frozenset
     
     @method : is_available  : bool
     @method : set_available : none
+    @method : can_help      : bool
     @method : serve         : bool
     
     # overrided/defined in-class
@@ -29,18 +31,22 @@ class Teller(Employee):
     Teller instance (wraps __str__)
     """
     
-    def __init__(self, name, salary=None):
+    def __init__(self, name, salary=None, employee_id=None, skills=None):
         """
-        `Teller(name, salary)`
+        `Teller(name, salary, employee_id, skills)`
         Constructs a new Teller instance from the Teller class. Inherits
         directly from Employee's constructor
         
         @param  : self      : the Employee object to operate upon
         @param  : name      : the name to give the employee
         @param  : salary    : the salary of the employee [default '9600.00']
+        @param  : employee_id   : a sequential id to use instead of generating
+        a UUID [default None]
+        @param  : skills    : the visit purposes the teller can help with
+        [default None, every purpose]
         @return : none 
         """
-        super().__init__(name, salary)
+        super().__init__(name, salary, employee_id, skills)
     
     def __str__(self):
         """
@@ -0,0 +1,163 @@
+#
+# `trace.py`
+# A compact binary log of every arrival, service and departure in a run
+#
+# Written by Joshua Paul A. Chan
+
+import mmap
+import struct
+
+# kinds of trace record
+ARRIVAL = 0
+SERVICE = 1
+DEPARTURE = 2
+TURNED_AWAY = 3
+BALKED = 4
+RENEGED = 5
+PREEMPTED = 6
+
+KINDS = ('arrival', 'service', 'departure', 'turned_away', 'balked', 'reneged',
+    'preempted')
+
+# a file starts with a header (magic, record count, record size) followed by
+# fixed-width little-endian records: time, customer id, teller id, kind
+HEADER = struct.Struct('<8sQQ')
+RECORD = struct.Struct('<dqiB3x')
+MAGIC = b'BANKTRC1'
+
+# ids written for customers without a sequential id and for events that do
+# not involve a teller
+NO_ID = -1
+
+def trace_id(obj_id):
+    # sequential ids are traced as they are; UUIDs do not fit in a record
+    return obj_id if type(obj_id) == int else NO_ID
+
+def record_dtype():
+    """
+    `record_dtype()`
+    The NumPy structured dtype matching one trace record
+    
+    @return : numpy.dtype   : fields time, customer, teller and kind
+    """
+    import numpy as np
+    return np.dtype({
+        'names': ['time', 'customer', 'teller', 'kind'],
+        'formats': ['<f8', '<i8', '<i4', 'u1'],
+        'offsets': [0, 8, 16, 20],
+        'itemsize': RECORD.size,
+    })
+
+class TraceWriter(object):
+    """
+    `TraceWriter`
+    Appends fixed-width binary records to a file through a memory map, so
+    writing an event is a single struct.pack_into with no formatting and no
+    system call. The file is preallocated and doubled whenever it fills,
+    then cut down to the records written when the writer is closed.
+    
+    @attr   : path      : str   : the trace file
+    @attr   : count     : int   : the number of records written
+    @attr   : capacity  : int   : the number of records the file has room for
+    
+    @method : write     : none  : appends a record
+    @method : flush     : none  : makes the records written so far readable
+    @method : close     : none  : finishes the file
+    """
+    
+    def __init__(self, path, capacity=1 << 16):
+        """
+        `TraceWriter(path, capacity)`
+        Creates (or replaces) a trace file
+        
+        @pre    : capacity must be a positive int
+        
+        @param  : self      : the TraceWriter object to operate upon
+        @param  : path      : str   : where to write the trace
+        @param  : capacity  : int   : records to preallocate room for [default
+        65536]
+        @return : none
+        """
+        assert type(capacity) == int and capacity > 0
+        self.path = path
+        self.count = 0
+        self.capacity = capacity
+        self._file = open(path, 'w+b')
+        self._map = None
+        self._allocate(capacity)
+    
+    def _allocate(self, capacity):
+        if self._map is not None:
+            self._map.close()
+        self._file.truncate(HEADER.size + capacity * RECORD.size)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self.capacity = capacity
+        HEADER.pack_into(self._map, 0, MAGIC, self.count, RECORD.size)
+    
+    def write(self, kind, t, customer_id, teller_id=NO_ID):
+        """
+        `write(kind, t, customer_id, teller_id)`
+        Appends a record
+        
+        @param  : self          : the TraceWriter object to operate upon
+        @param  : kind          : int       : ARRIVAL, SERVICE, DEPARTURE,
+        TURNED_AWAY, BALKED, RENEGED or PREEMPTED
+        @param  : t             : float     : when it happened
+        @param  : customer_id   : int       : the customer involved, or NO_ID
+        @param  : teller_id     : int       : the teller involved [default
+        NO_ID]
+        @return : none
+        """
+        if self.count == self.capacity:
+            self._allocate(2 * self.capacity)
+        RECORD.pack_into(self._map, HEADER.size + self.count * RECORD.size,
+            t, customer_id, teller_id, kind)
+        self.count += 1
+    
+    def flush(self):
+        HEADER.pack_into(self._map, 0, MAGIC, self.count, RECORD.size)
+        self._map.flush()
+    
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._map.close()
+        self._file.truncate(HEADER.size + self.count * RECORD.size)
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+    
+    def __str__(self):
+        return "<TraceWriter path='{}' records='{}' />".format(self.path, self.count)
+    
+    def __repr__(self):
+        return str(self)
+
+def read_trace(path):
+    """
+    `read_trace(path)`
+    Maps a trace file into memory as a NumPy structured array. Nothing is
+    copied: pages are read from disk as the array is used, so traces larger
+    than memory can still be sliced and filtered, e.g.
+    `trace[trace['kind'] == SERVICE]['time']`.
+    
+    @pre    : path must be a trace written by TraceWriter
+    
+    @param  : path  : str   : the trace file
+    @return : numpy.memmap  : one element per record, with fields time,
+    customer, teller and kind
+    """
+    import numpy as np
+    with open(path, 'rb') as f:
+        magic, count, size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or size != RECORD.size:
+        raise ValueError("{} is not a banksim trace".format(path))
+    if count == 0:
+        return np.zeros(0, dtype=record_dtype())
+    return np.memmap(path, dtype=record_dtype(), mode='r', offset=HEADER.size,
+        shape=(count,))
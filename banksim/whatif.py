@@ -0,0 +1,90 @@
+#
+# `whatif.py`
+# Compares changes to a bank from a point part way through the day
+#
+# Written by Joshua Paul A. Chan
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .engine import Simulation
+from .snapshot import snapshot, restore
+
+# the changes a branch can make
+CHANGES = ('n_tellers', 'discipline', 'arrival_rate')
+
+def branch(sim, n_tellers=None, discipline=None, arrival_rate=None):
+    """
+    `branch(sim, n_tellers, discipline, arrival_rate)`
+    Copies a paused simulation and changes the copy. Only the live state
+    (the line, busy tellers, the calendar and the rest of the arrival stream)
+    is copied, and the original is left as it was.
+    
+    @pre    : sim must be a Simulation that has been paused with run(until)
+    @pre    : arrival_rate can only be changed for arrivals built by a
+    Scenario
+    
+    @param  : sim           : Simulation    : the paused simulation
+    @param  : n_tellers     : int   : the number of tellers from now on, or
+    for a bank staffed by skill group, a list of the number in each group;
+    extra tellers start idle and dismissed ones finish their customer first
+    [default None, unchanged]
+    @param  : discipline    : str   : the queue discipline from now on
+    [default None, unchanged]
+    @param  : arrival_rate  : float : the arrival rate from the next arrival
+    drawn; the peak rate for nhpp arrivals [default None, unchanged]
+    @return : Simulation    : the changed copy, still paused
+    """
+    assert isinstance(sim, Simulation)
+    assert not sim.is_finished()
+    
+    return _change(restore(snapshot(sim)), n_tellers, discipline, arrival_rate)
+
+def _change(sim, n_tellers=None, discipline=None, arrival_rate=None):
+    if n_tellers is not None:
+        sim.bank.set_tellers(n_tellers)
+    if discipline is not None:
+        sim.bank.customers.set_discipline(discipline)
+    if arrival_rate is not None:
+        sim._arrivals.times.set_rate(arrival_rate)
+    return sim
+
+def _run_branch(args):
+    # a restored snapshot is already a private copy, so change it directly
+    data, changes = args
+    return _change(restore(data), **changes).run()
+
+def what_if(scenario, at, branches, seed=None, workers=1, **options):
+    """
+    `what_if(scenario, at, branches, seed, workers, **options)`
+    Runs a scenario once up to a time, then runs each branch on from there
+    with its own changes. The shared prefix is only simulated once, so
+    comparing k branches costs one prefix plus k remainders rather than k
+    full runs, and every branch sees the same customers up to that time.
+    
+    @pre    : branches must map names to dicts of changes, each one of CHANGES
+    
+    @param  : scenario  : Scenario  : the scenario to run
+    @param  : at        : int/float : the time the branches split at
+    @param  : branches  : dict      : branch name -> changes for branch(), e.g.
+    {'3 tellers': {}, '4 tellers': {'n_tellers': 4}}
+    @param  : seed      : int       : the seed for the run [default None]
+    @param  : workers   : int       : worker processes for the branches; 1
+    runs them in this process [default 1]
+    @param  : options   : extra keyword arguments for Simulation
+    @return : dict      : branch name -> finished Simulation
+    """
+    assert all(k in CHANGES for changes in branches.values() for k in changes)
+    
+    prefix = scenario.build(seed, **options).run(until=at)
+    data = snapshot(prefix)
+    names = list(branches)
+    jobs = [(data, branches[name]) for name in names]
+    
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        results = list(map(_run_branch, jobs))
+    else:
+        with ProcessPoolExecutor(min(workers, len(jobs))) as pool:
+            results = list(pool.map(_run_branch, jobs))
+    return dict(zip(names, results))
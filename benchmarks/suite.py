@@ -0,0 +1,280 @@
+#
+# `suite.py`
+# Times the simulator's hot paths over a grid of customer and teller counts
+#
+# Written by Joshua Paul A. Chan
+#
+# Usage:
+#   python -m benchmarks.suite                       # run the grid, print a table
+#   python -m benchmarks.suite -o benchmarks/baselines/mine.json
+#   python -m benchmarks.suite --compare old.json new.json
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from banksim.bank import Bank
+from banksim.customer import Customer
+from banksim.reception_queue import ReceptionQueue
+from banksim.scenario import Scenario
+from main import run_ticks
+
+CUSTOMERS = [10 ** k for k in range(2, 8)]
+TELLERS = [1, 10, 100, 1000]
+
+# regressions smaller than this fraction of ops/sec are treated as noise
+THRESHOLD = 0.10
+
+def bench_customer(n, n_tellers):
+    # building Customers with sequential ids, as Scenario does
+    for i in range(n):
+        Customer('abc', customer_id=i)
+
+def bench_customer_uuid(n, n_tellers):
+    # building Customers that each generate a uuid4
+    for i in range(n):
+        Customer('abc')
+
+def bench_reception_queue(n, n_tellers):
+    # n inserts followed by n removals from a FIFO line
+    q = ReceptionQueue()
+    cs = [Customer('abc', customer_id=i) for i in range(min(n, 1000))]
+    for i in range(n):
+        q.insert_customer(cs[i % len(cs)])
+    for _ in range(n):
+        q.get_next_customer()
+
+def bench_bank(n, n_tellers):
+    # n customers walk into an open bank at once and are served to completion
+    bank = Bank(n_tellers)
+    bank.open()
+    for i in range(n):
+        bank.receive_customer(Customer('abc', customer_id=i))
+    while len(bank.customers) > 0:
+        bank.update()
+        while bank.has_free_teller() and len(bank.customers) > 0:
+            bank.serve_next()
+        bank.tick()
+
+def bench_main_loop(n, n_tellers):
+    # main.py's tick loop over its default square-wave arrivals
+    scenario = Scenario(n, n_tellers)
+    bank = Bank(n_tellers)
+    bank.open()
+    run_ticks(bank, scenario.arrivals(random.Random(0)))
+
+CASES = {
+    'customer': (bench_customer, False),
+    'customer_uuid': (bench_customer_uuid, False),
+    'reception_queue': (bench_reception_queue, False),
+    'bank': (bench_bank, True),
+    'main_loop': (bench_main_loop, True),
+}
+
+def run_case(case, n, n_tellers):
+    """
+    `run_case(case, n, n_tellers)`
+    Runs one benchmark in this process and measures it
+    
+    @param  : case      : str   : the name of a benchmark in CASES
+    @param  : n         : int   : the number of customers
+    @param  : n_tellers : int   : the number of tellers
+    @return : dict      : the measurement
+    """
+    fn, _ = CASES[case]
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    fn(n, n_tellers)
+    seconds = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'case': case,
+        'customers': n,
+        'tellers': n_tellers,
+        'seconds': seconds,
+        'ops_per_sec': n / seconds if seconds > 0 else float('inf'),
+        # ru_maxrss is in KiB on Linux
+        'peak_mb': (after - before) / 1024,
+    }
+
+def measure(case, n, n_tellers, repeat=1):
+    """
+    `measure(case, n, n_tellers, repeat)`
+    Runs one benchmark in a fresh interpreter so that its peak memory is not
+    hidden by earlier cases, keeping the fastest of several runs
+    
+    @param  : case      : str   : the name of a benchmark in CASES
+    @param  : n         : int   : the number of customers
+    @param  : n_tellers : int   : the number of tellers
+    @param  : repeat    : int   : how many times to run it [default 1]
+    @return : dict      : the fastest measurement
+    """
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.check_output([
+            sys.executable, '-m', 'benchmarks.suite',
+            '--child', case, str(n), str(n_tellers),
+        ], cwd=os.path.join(os.path.dirname(__file__), '..'))
+        runs.append(json.loads(out.decode()))
+    return min(runs, key=lambda r: r['seconds'])
+
+def scaling_exponents(results):
+    """
+    `scaling_exponents(results)`
+    Fits time ~ customers ^ k for every (case, tellers) series by least
+    squares on a log-log scale. k close to 1 is linear, 2 is quadratic.
+    
+    @param  : results   : dict[]    : measurements from measure()
+    @return : dict      : "case/tellers" -> k
+    """
+    series = {}
+    for r in results:
+        if r['seconds'] > 0:
+            key = '{}/t={}'.format(r['case'], r['tellers'])
+            series.setdefault(key, []).append((math.log(r['customers']), math.log(r['seconds'])))
+    
+    exponents = {}
+    for key, points in series.items():
+        if len(points) < 2:
+            continue
+        mx = sum(x for x, _ in points) / len(points)
+        my = sum(y for _, y in points) / len(points)
+        sxx = sum((x - mx) ** 2 for x, _ in points)
+        sxy = sum((x - mx) * (y - my) for x, y in points)
+        exponents[key] = sxy / sxx if sxx else float('nan')
+    return exponents
+
+def run_grid(cases, customers, tellers, budget=None, log=print):
+    """
+    `run_grid(cases, customers, tellers, budget, log)`
+    Runs every case over the grid, smallest first
+    
+    @param  : cases     : str[]     : the benchmarks to run
+    @param  : customers : int[]     : customer counts
+    @param  : tellers   : int[]     : teller counts (for cases that use them)
+    @param  : budget    : float     : skip larger sizes of a series once one
+    run takes longer than this many seconds [default None]
+    @param  : log       : callable  : progress output [default print]
+    @return : dict      : the report, ready to be written as JSON
+    """
+    results = []
+    for case in cases:
+        _, uses_tellers = CASES[case]
+        for n_tellers in (tellers if uses_tellers else [1]):
+            for n in sorted(customers):
+                r = measure(case, n, n_tellers, repeat=3 if n <= 10 ** 4 else 1)
+                results.append(r)
+                log(format_row(r))
+                if budget is not None and r['seconds'] > budget:
+                    break
+    
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+        'scaling': scaling_exponents(results),
+    }
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def format_row(r):
+    return "{:<16} customers={:<9} tellers={:<5} {:>10.4f}s {:>14,.0f} ops/s {:>9.1f} MB".format(
+        r['case'], r['customers'], r['tellers'], r['seconds'], r['ops_per_sec'], r['peak_mb'])
+
+def compare(old, new, threshold=THRESHOLD):
+    """
+    `compare(old, new, threshold)`
+    Lines up two reports and flags every measurement whose ops/sec dropped by
+    more than threshold
+    
+    @param  : old       : dict  : the baseline report
+    @param  : new       : dict  : the report to check
+    @param  : threshold : float : the tolerated slowdown [default 0.10]
+    @return : tuple     : (lines of the diff table, number of regressions)
+    """
+    key = lambda r: (r['case'], r['customers'], r['tellers'])
+    before = {key(r): r for r in old['results']}
+    lines = []
+    regressions = 0
+    for r in new['results']:
+        b = before.get(key(r))
+        if b is None:
+            continue
+        ratio = r['ops_per_sec'] / b['ops_per_sec']
+        flag = ''
+        if ratio < 1 - threshold:
+            flag = 'REGRESSION'
+            regressions += 1
+        elif ratio > 1 + threshold:
+            flag = 'faster'
+        lines.append("{:<16} customers={:<9} tellers={:<5} {:>14,.0f} -> {:>14,.0f} ops/s  x{:<6.2f} {:>7.1f} -> {:>7.1f} MB  {}".format(
+            r['case'], r['customers'], r['tellers'], b['ops_per_sec'], r['ops_per_sec'],
+            ratio, b['peak_mb'], r['peak_mb'], flag).rstrip())
+    
+    for k, v in sorted(new.get('scaling', {}).items()):
+        if k in old.get('scaling', {}):
+            lines.append("scaling {:<28} {:>6.2f} -> {:>6.2f}".format(k, old['scaling'][k], v))
+    return lines, regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="banksim benchmark suite")
+    parser.add_argument("--cases", nargs="+", choices=sorted(CASES), default=sorted(CASES))
+    parser.add_argument("--customers", nargs="+", type=int, default=CUSTOMERS)
+    parser.add_argument("--tellers", nargs="+", type=int, default=TELLERS)
+    parser.add_argument("--max-customers", type=int, default=None, help="drop \
+customer counts above this from the grid")
+    parser.add_argument("--budget", type=float, default=None, help="stop growing \
+a series once one run takes longer than this many seconds")
+    parser.add_argument("-o", "--output", help="write the report to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="diff \
+two reports and exit non-zero on regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.child:
+        case, n, n_tellers = args.child
+        print(json.dumps(run_case(case, int(n), int(n_tellers))))
+        return
+    
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+        lines, regressions = compare(old, new, args.threshold)
+        print("\n".join(lines))
+        print("{} regression(s)".format(regressions))
+        sys.exit(1 if regressions else 0)
+    
+    customers = [n for n in args.customers if args.max_customers is None or n <= args.max_customers]
+    report = run_grid(args.cases, customers, args.tellers, args.budget)
+    for k, v in sorted(report['scaling'].items()):
+        print("scaling {:<28} time ~ customers^{:.2f}".format(k, v))
+    
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+if __name__ == '__main__':
+    main()
@@ -5,10 +5,31 @@
 # Written by Joshua Paul A. Chan
 
 import argparse
-import math
+import io
+import random
+import resource
+import sys
+from contextlib import redirect_stdout
 
-from banksim.customer import Customer
-from banksim.bank import Bank
+from banksim.arrivals import PROCESSES
+from banksim.cache import DEFAULT_DIR, ResultCache, result_key
+from banksim.customer_pool import CustomerPool
+from banksim.engine import Simulation
+from banksim.instrumentation import Stats, clock
+from banksim.lines import POLICIES, MultiLineBank
+from banksim.priority import PriorityBank
+from banksim.replication import run_paired, run_replications
+from banksim.scenario import Scenario
+from banksim.skills import staff_skills
+from banksim.snapshot import save, load
+from banksim.staffing import (METHODS, METRICS, ScheduleOptimizer,
+    StaffingOptimizer, hourly_shifts, markovian)
+from banksim.streaming import WaitStats
+from banksim.trace import TraceWriter
+from banksim.whatif import what_if
+from banksim import trace as tr
+from banksim import service
+from banksim.reception_queue import DISCIPLINES, FIFO
 
 # set up argument parsing
 parser = argparse.ArgumentParser()
@@ -16,106 +37,718 @@ parser.add_argument("c", type=int, help="the number of customers to visit the \
 bank")
 parser.add_argument("-t", type=int, default=1, help="the number of tellers at \
 the bank")
+parser.add_argument("-q", "--queue", choices=DISCIPLINES, default=FIFO,
+help="the order customers in line are served in")
+parser.add_argument("--lines", choices=POLICIES, default=None, help="give \
+every teller their own line, chosen by arriving customers by this policy \
+[default: one shared line]")
+parser.add_argument("--jockey", help="with --lines, let customers move to \
+the back of a shorter line", action="store_true")
+parser.add_argument("--purpose-mix", type=str, default=None, help="visit \
+purposes and their relative frequencies, e.g. 'business:1,deposit:3,other:4'")
+parser.add_argument("--classes", type=str, default=None, help="serve visit \
+purposes by priority class, best first, with classes separated by ';', e.g. \
+'business;deposit,withdrawal;other' (unlisted purposes join the last class)")
+parser.add_argument("--preemptive", help="with --classes, let a better class \
+interrupt the service of a worse one", action="store_true")
+parser.add_argument("--aging", type=float, default=None, help="with \
+--classes, the wait that moves a customer up by one class")
+parser.add_argument("--skills", type=str, default=None, help="tellers and \
+the visit purposes they can help with, as count:purposes groups separated by \
+';', e.g. '2:loan;6:deposit,withdrawal' (replaces -t)")
+parser.add_argument("--balk-at", type=int, default=None, help="arriving \
+customers leave at once if this many people would be ahead of them")
+parser.add_argument("--patience", type=float, default=None, help="customers \
+leave the line after waiting an exponential time with this mean")
+parser.add_argument("--shifts", type=str, default=None, help="change the \
+number of tellers on duty at given times, as start:tellers pairs, e.g. \
+'60:4,180:2' (-t tellers work until the first)")
+parser.add_argument("-e", "--event", help="use the next-event engine instead \
+of stepping through every unit time step", action="store_true")
+parser.add_argument("-r", "--replications", type=int, default=0, help="run \
+this many seeded replications and report a confidence interval")
+parser.add_argument("--seed", type=int, default=0, help="the master seed for \
+replications")
+parser.add_argument("--workers", type=int, default=None, help="the number of \
+worker processes for replications [default: one per core]")
+parser.add_argument("--crn", help="give every customer their own random \
+substreams, so replications of different setups see the same customers",
+action="store_true")
+parser.add_argument("--antithetic", help="run every replication seed as an \
+antithetic pair", action="store_true")
+parser.add_argument("--versus", type=int, default=None, help="with -r, \
+estimate how the average wait changes with this many tellers instead of -t")
+parser.add_argument("-a", "--arrivals", choices=PROCESSES, default=None,
+help="how customers arrive [default: wave, or poisson with --arrival-rate]")
+parser.add_argument("--arrival-rate", type=float, default=None, help="mean \
+arrivals (or groups, for batch arrivals) per unit time")
+parser.add_argument("--ticks", type=int, default=10, help="the number of ticks \
+wave arrivals are spread over")
+parser.add_argument("--rate-schedule", type=str, default=None, help="nhpp \
+arrival rates as start:rate pairs, e.g. '0:1,60:5,120:1'")
+parser.add_argument("--batch-size", type=int, default=1, help="the number of \
+customers in each group of batch arrivals")
+parser.add_argument("--service-rate", type=float, default=None, help="mean \
+exponential services per unit time [default: unit service times]")
+parser.add_argument("-s", "--service", choices=service.DISTRIBUTIONS,
+default=None, help="how long each customer takes to serve [default: \
+exponential with --service-rate, otherwise one unit]")
+parser.add_argument("--service-mean", type=float, default=1, help="the mean \
+service time")
+parser.add_argument("--service-sd", type=float, default=1, help="the standard \
+deviation of lognormal service times")
+parser.add_argument("--service-samples", type=str, default=None, help="observed \
+service times to resample for empirical service, e.g. '1,1,2,5'")
+parser.add_argument("--sla", type=float, default=None, help="find the fewest \
+tellers that keep the wait-time metric at or below this value")
+parser.add_argument("--sla-metric", choices=METRICS, default="mean",
+help="the wait-time metric the --sla target applies to")
+parser.add_argument("--sla-method", choices=METHODS, default="auto",
+help="evaluate teller counts with M/M/c formulas, by simulation, or with the \
+formulas whenever arrivals are poisson and service exponential (auto)")
+parser.add_argument("--sla-hours", type=int, default=None, help="with --sla, \
+find the cheapest number of tellers for each of this many hours that meets \
+the target in every hour, with at most -t tellers on duty")
+parser.add_argument("--hour-length", type=float, default=60, help="the \
+simulated time in an hour, for --sla-hours")
+parser.add_argument("--salary", type=str, default=None, help="a teller's \
+yearly salary, for --sla-hours [default: the Employee default]")
+parser.add_argument("--cross-check", help="compare a simulation against the \
+M/M/c formulas (poisson arrivals, exponential service)", action="store_true")
+parser.add_argument("--bounded-memory", help="keep memory proportional to \
+the customers in the bank rather than the customers simulated, for very long \
+runs, and report the peak", action="store_true")
+parser.add_argument("--compact", help="keep customers that have not arrived \
+yet in compact typed arrays instead of as Customer objects", action="store_true")
+parser.add_argument("--stats", help="time each phase of the simulation loop \
+and print where the run spent its time", action="store_true")
+parser.add_argument("--trace", type=str, default=None, help="write every \
+arrival, service and departure to this binary trace file")
+parser.add_argument("--snapshot", type=str, default=None, help="with -e, \
+save the simulation to this file at --snapshot-at and carry on")
+parser.add_argument("--snapshot-at", type=float, default=0, help="the time \
+to save the --snapshot at")
+parser.add_argument("--resume", type=str, default=None, help="finish the \
+simulation saved in this --snapshot file")
+parser.add_argument("--what-if", type=float, default=None, help="run up to \
+this time once, then carry on under each --branch and compare them")
+parser.add_argument("--branch", action="append", default=[], help="changes \
+for a --what-if branch, e.g. 'tellers=4' or 'queue=lifo,rate=2.5'")
+parser.add_argument("--no-cache", help="run everything afresh instead of \
+reusing (and storing) results of earlier identical runs", action="store_true")
+parser.add_argument("--cache-dir", type=str, default=DEFAULT_DIR, help="where \
+results are cached [default: ~/.cache/banksim]")
+parser.add_argument("--cache-size", type=float, default=64, help="the most \
+megabytes the cached results may take up")
 parser.add_argument("-v", "--verbose", help="increase the level of output \
 logging", action="store_true")
 
-def distribute(items, ticks):
-    """
-    `distribute(items, ticks)`
-    Groups the items over the specified number of ticks so that they're evenly
-    distributed
+def main():
+    args = parser.parse_args()
     
-    @param  : items : items to group together into buckets
-    @param  : ticks : the number of groups/buckets to group items into
-    @return : list  : a list of lists, with some items grouped into each
-    individual list
-    """
-    assert type(items) == list
-    assert type(ticks) == int
-    assert ticks > 0
+    N = args.c if args.c > 0 else 1
+    n_tellers = args.t if args.t > 0 else 1
+    if args.skills:
+        n_tellers = sum(n for n, _ in parse_staff(args.skills))
+    
+    if args.jockey and not args.lines:
+        parser.error("--jockey needs --lines")
+    if (args.preemptive or args.aging) and not args.classes:
+        parser.error("--preemptive and --aging need --classes")
+    if args.classes and (args.lines or args.queue != FIFO):
+        parser.error("--classes cannot be combined with --lines or -q")
+    if args.skills and (args.lines or args.classes or args.queue != FIFO):
+        parser.error("--skills cannot be combined with --lines, --classes or -q")
+    if args.skills:
+        purposes = [pair.split(":")[0] for pair in (args.purpose_mix or "other:1").split(",")]
+        missing = set(purposes) - set(staff_skills(parse_staff(args.skills)))
+        if missing:
+            parser.error("no teller can help with {}".format(", ".join(sorted(missing))))
+    if (args.balk_at is not None or args.patience) and (args.lines or args.classes or args.skills):
+        parser.error("--balk-at and --patience need one shared line, without \
+--classes or --skills")
+    if args.patience is not None and args.patience <= 0:
+        parser.error("--patience must be positive")
+    if args.cache_size <= 0:
+        parser.error("--cache-size must be positive")
+    if args.rate_schedule and max(
+            tuple(map(float, pair.split(":"))) for pair in args.rate_schedule.split(","))[1] <= 0:
+        parser.error("--rate-schedule must end with a positive rate, or the \
+last customers never arrive")
+    
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+    
+    if args.sla is not None and args.sla_hours:
+        schedule(args, N, n_tellers, cache)
+        return
+    
+    if args.sla is not None:
+        staff(args, N, cache)
+        return
+    
+    if args.cross_check:
+        cross_check(args, N, n_tellers, cache)
+        return
+    
+    if args.replications > 0:
+        replicate(args, N, n_tellers, cache)
+        return
+    
+    if args.what_if is not None:
+        compare_branches(args, N, n_tellers)
+        return
     
-    i = 0
-    items_per_bucket = math.ceil(len(items) / ticks)
-    buckets = [ [] for _ in range(ticks) ]
+    stats = Stats() if args.stats else None
+    trace = TraceWriter(args.trace) if args.trace else None
     
-    for j, item in enumerate(items):
-        if j % items_per_bucket == 0:
-            bucket = buckets[i]
-            i += 1
-        bucket.append(item)
+    if args.resume:
+        sim = load(args.resume, trace)
+        sim.stats = stats
+        sim.run()
+        report(len(sim.bank.tellers), sim.served, sim.last_service, sim.wait_time,
+            sim.wait_stats, sim.bank, event=True)
+        finish(trace, stats)
+        return
     
-    return buckets
+    if args.snapshot and (args.compact or not args.event):
+        parser.error("--snapshot needs -e and cannot be used with --compact")
+    if args.shifts and args.skills:
+        parser.error("--shifts cannot be combined with --skills")
+    if args.compact and args.patience:
+        parser.error("--patience cannot be used with --compact")
+    if args.trace and args.preemptive and not args.event:
+        parser.error("--trace with --preemptive needs -e, which logs \
+interrupted services")
+    if args.bounded_memory and args.compact:
+        parser.error("--bounded-memory cannot be used with --compact, which \
+builds every customer up front")
+    if args.bounded_memory and args.trace:
+        parser.error("--bounded-memory cannot be used with --trace: its records \
+are few bytes each, but the trace file's mapped pages count towards resident \
+memory and grow with the run")
+    
+    scenario = build_scenario(args, N, n_tellers)
+    
+    # a run that only prints its report is the same every time, so its report
+    # is cached; runs that time, trace, log, measure or save themselves
+    # always run
+    if (cache is None or stats or trace or args.snapshot or args.verbose
+            or args.bounded_memory):
+        simulate(args, scenario, stats, trace)
+        return
+    # the report is written by this file, so it is part of the code version
+    key = result_key('report', scenario.config(), sources=[__file__],
+        seed=args.seed, event=args.event, compact=args.compact)
+    text = cache.get(key)
+    if text is not None:
+        print("[cached in {}; --no-cache runs it again]".format(cache.path),
+            file=sys.stderr)
+    else:
+        with redirect_stdout(io.StringIO()) as out:
+            simulate(args, scenario)
+        text = out.getvalue()
+        cache.put(key, text)
+    print(text, end="")
 
-def main():
-    args = parser.parse_args()
+def simulate(args, scenario, stats=None, trace=None):
+    """
+    `simulate(args, scenario, stats, trace)`
+    Runs the scenario once, as the command line asks, and prints its report
     
+    @param  : args      : the parsed command line arguments
+    @param  : scenario  : Scenario  : the scenario to run
+    @param  : stats     : a Stats object to time each phase with, or None
+    @param  : trace     : a TraceWriter to log events to, or None
+    @return : none
+    """
     def log(s):
         if args.verbose: print(s) 
     
-    N = args.c if args.c > 0 else 1
-    n_tellers = args.t if args.t > 0 else 1
+    N = scenario.n_customers
+    n_tellers = scenario.n_tellers
     
     # instantiate the bank
-    bank = Bank(n_tellers)
+    bank = scenario.build_bank(args.seed)
     
     # set up simulation
     bank.open()
-    t = 0
-    wait_time = 0
     
-    visitors_over_time = distribute(
-        [Customer(str(n).zfill(3)) for n in range(N)],
-        10
-    )
+    # customers are pulled from the arrival process as they walk in
+    rng = random.Random(args.seed)
+    if args.compact:
+        pool = CustomerPool()
+        for t, (purpose, s) in zip(scenario.arrival_times(rng), scenario.visits(rng)):
+            pool.append(t, s, purpose)
+        arrivals = pool.stream()
+    else:
+        arrivals = scenario.arrivals(rng)
+    
+    waits = WaitStats()
+    
+    if args.event:
+        sim = Simulation(bank, arrivals, wait_stats=waits, trace=trace, stats=stats,
+            shifts=scenario.shifts)
+        if args.snapshot:
+            sim.run(until=args.snapshot_at)
+            save(sim, args.snapshot)
+        sim.run()
+        report(n_tellers, sim.served, sim.last_service, sim.wait_time, waits, bank,
+            event=True)
+    else:
+        steps, wait_time = run_ticks(bank, arrivals, log, stats, waits, trace,
+            scenario.shifts)
+        report(n_tellers, N - bank.balked - bank.reneged, steps, wait_time, waits, bank)
+    
+    if args.bounded_memory:
+        print("[memory]")
+        print("customers simulated              = {}".format(N))
+        print("peak resident memory (MB)        = {:.1f}".format(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+        print("=" * 80)
     
+    finish(trace, stats)
+
+def finish(trace, stats):
+    # close the trace file and print the phase breakdown, if either was asked for
+    if trace is not None:
+        trace.close()
+    
+    if stats is not None:
+        print(stats.report())
+        print("=" * 80)
+
+def run_ticks(bank, arrivals, log=lambda s: None, stats=None, wait_stats=None,
+        trace=None, shifts=None):
+    """
+    `run_ticks(bank, arrivals, log, stats, wait_stats, trace, shifts)`
+    Runs an open bank one unit time step at a time until every arriving
+    customer has been served or has given up
+    
+    @param  : bank      : the open Bank to simulate
+    @param  : arrivals  : an iterator of (time, Customer) pairs in arrival order
+    @param  : log       : called with verbose progress messages
+    @param  : stats     : a Stats object to time each phase with, or None to
+    run uninstrumented
+    @param  : wait_stats: a WaitStats object fed each customer's wait as they
+    are served, or None
+    @param  : trace     : a TraceWriter to log arrivals, services and
+    departures to, or None
+    @param  : shifts    : (start time, number of tellers) shift changes, or
+    None
+    @return : tuple     : (the number of unit time steps, the total wait time)
+    """
+    wait_time = 0
+    t = bank.clock
+    pending = next(arrivals, None)
+    shifts = list(shifts or ())
     while bank.is_open():
+        t = bank.clock
         log("=" * 32 + " timestep: {} ".format(str(t).zfill(4)) + "=" * 32)
+        if stats is not None:
+            t0 = clock()
             
-        # update waiting times
-        for customer in bank.customers:
-            customer.wait_a_little()
-        
         # get new customers
-        if t < len(visitors_over_time):
-            visitors = visitors_over_time[t]
-            for visitor in visitors:
-                bank.receive_customer(visitor)
-            log("[visitors that came in] {}".format(len(visitors)))
+        visitors = 0
+        if bank.deadlines:
+            for cust in bank.renege():
+                if trace is not None:
+                    trace.write(tr.RENEGED, cust.left_at, tr.trace_id(cust.customer_id))
+        while pending is not None and pending[0] <= t:
+            joined = bank.receive_customer(pending[1])
+            if trace is not None:
+                trace.write(tr.ARRIVAL if joined else tr.BALKED, t,
+                    tr.trace_id(pending[1].customer_id))
+            pending = next(arrivals, None)
+            visitors += 1
+        log("[visitors that came in] {}".format(visitors))
+        if stats is not None:
+            t1 = clock()
+            stats.add_time('receive_customer', t1 - t0, visitors)
         
         # update internal bank state
         bank.update()
+        while shifts and shifts[0][0] <= t:
+            bank.set_tellers(shifts.pop(0)[1])
+        if stats is not None:
+            t2 = clock()
+            stats.add_time('update', t2 - t1)
         
-        # get available tellers
-        available_tellers = list(
-            filter(lambda t: t.is_available(), bank.tellers)
-        )
-        
-        while len(available_tellers) > 0 and len(bank.customers) > 0:
-            # get teller
-            free_teller = available_tellers.pop(0)
+        served = 0
+        while bank.can_serve():
+            # move a customer from queue to an available teller
+            free_teller, next_customer = bank.serve_next()
+            if next_customer.preemptions:
+                # resuming an interrupted service, already counted
+                continue
             
-            # move a customer from queue to available teller
-            next_customer = bank.customers.get_next_customer()
-            
-            free_teller.serve(next_customer)
-            
-            wait_time += next_customer.has_waited
+            # waits are settled once, at service, rather than every tick
+            wait = next_customer.wait_time()
+            wait_time += wait
+            if wait_stats is not None:
+                wait_stats.add(wait)
+            if trace is not None:
+                cid = tr.trace_id(next_customer.customer_id)
+                trace.write(tr.SERVICE, t, cid, free_teller.employee_id)
+                trace.write(tr.DEPARTURE, t + next_customer.service_time, cid,
+                    free_teller.employee_id)
+            served += 1
             # print("{} is serving: {}".format(free_teller, next_customer))
         log("[visitors left to serve] {}".format(len(bank.customers)))
+        if stats is not None:
+            stats.add_time('serve_next', clock() - t2, served)
+            stats.count('ticks')
+            stats.gauge('queue_length', len(bank.customers))
+            stats.gauge('utilization', bank.utilization())
         
         # increment time step
-        t += 1
+        bank.tick()
+        t = bank.clock
         
         # if no more customers visiting, break
-        if t >= len(visitors_over_time) - 1 and len(bank.customers) == 0:
+        if pending is None and len(bank.customers) == 0:
             bank.close()
     
+    return t - 1, wait_time
+
+def replicate(args, N, n_tellers, cache=None):
+    """
+    `replicate(args, N, n_tellers, cache)`
+    Runs seeded replications of the scenario described by the command line
+    and prints a summary of their average wait times
+    
+    @param  : args      : the parsed command line arguments
+    @param  : N         : the number of customers per replication
+    @param  : n_tellers : the number of tellers at the bank
+    @param  : cache     : the ResultCache to consult, or None
+    @return : none
+    """
+    scenario = build_scenario(args, N, n_tellers)
+    if args.versus is not None:
+        compare_tellers(args, scenario, cache)
+        return
+    summary = run_replications(scenario, args.replications, args.seed, args.workers,
+        crn=args.crn, antithetic=args.antithetic, cache=cache)
+    
+    print("=" * 80)
+    print("[replications]")
+    print("total number of tellers          = {}".format(n_tellers))
+    print("customers per replication        = {}".format(N))
+    print("number of replications           = {}".format(summary.n))
+    print("mean average wait time           = {}".format(summary.mean))
+    print("variance of average wait time    = {}".format(summary.variance))
+    print("{:<33}= [{}, {}]".format(
+        "{:.0%} confidence interval".format(summary.confidence),
+        summary.ci[0], summary.ci[1]))
+    print("=" * 80)
+
+def compare_tellers(args, scenario, cache=None):
+    """
+    `compare_tellers(args, scenario, cache)`
+    Runs paired replications with -t and --versus tellers and prints a
+    confidence interval for the difference in average wait
+    
+    @param  : args      : the parsed command line arguments
+    @param  : scenario  : the scenario with -t tellers
+    @param  : cache     : the ResultCache to consult, or None
+    @return : none
+    """
+    alternative = scenario.replace(n_tellers=args.versus)
+    diff, a, b = run_paired(scenario, alternative, args.replications, args.seed,
+        args.workers, crn=args.crn, antithetic=args.antithetic, cache=cache)
+    
+    print("=" * 80)
+    print("[paired comparison]")
+    print("mean average wait, {:<4} tellers  = {}".format(scenario.n_tellers, a.mean))
+    print("mean average wait, {:<4} tellers  = {}".format(alternative.n_tellers, b.mean))
+    print("number of paired samples         = {}".format(diff.n))
+    print("mean change in average wait      = {}".format(diff.mean))
+    print("{:<33}= [{}, {}]".format(
+        "{:.0%} confidence interval".format(diff.confidence),
+        diff.ci[0], diff.ci[1]))
+    print("=" * 80)
+
+def build_scenario(args, N, n_tellers):
+    """
+    `build_scenario(args, N, n_tellers)`
+    Builds the Scenario described by the command line
+    
+    @param  : args      : the parsed command line arguments
+    @param  : N         : the number of customers
+    @param  : n_tellers : the number of tellers at the bank
+    @return : Scenario  : the scenario
+    """
+    purpose_mix = None
+    if args.purpose_mix:
+        purpose_mix = [
+            (purpose, float(weight))
+            for purpose, weight in (pair.split(":") for pair in args.purpose_mix.split(","))
+        ]
+    classes = None
+    if args.classes:
+        classes = [c.split(",") for c in args.classes.split(";")]
+    rate_schedule = None
+    if args.rate_schedule:
+        rate_schedule = [
+            tuple(map(float, pair.split(":")))
+            for pair in args.rate_schedule.split(",")
+        ]
+    if args.service == service.DETERMINISTIC:
+        dist = service.Deterministic(args.service_mean)
+    elif args.service == service.EXPONENTIAL:
+        dist = service.Exponential(args.service_rate or 1 / args.service_mean)
+    elif args.service == service.LOGNORMAL:
+        dist = service.LogNormal(args.service_mean, args.service_sd)
+    elif args.service == service.EMPIRICAL:
+        dist = service.Empirical(map(float, args.service_samples.split(",")))
+    else:
+        dist = None
+    
+    return Scenario(N, n_tellers,
+        arrival_rate=args.arrival_rate,
+        service_rate=args.service_rate,
+        ticks=args.ticks,
+        discipline=args.queue,
+        arrival_process=args.arrivals,
+        rate_schedule=rate_schedule,
+        batch_size=args.batch_size,
+        service=dist,
+        purpose_mix=purpose_mix,
+        lines=args.lines,
+        jockey=args.jockey,
+        classes=classes,
+        preemptive=args.preemptive,
+        aging=args.aging,
+        staff=parse_staff(args.skills) if args.skills else None,
+        shifts=parse_shifts(args.shifts) if args.shifts else None,
+        balk_at=args.balk_at,
+        patience=service.Exponential(1 / args.patience) if args.patience else None)
+
+def parse_staff(spec):
+    """
+    `parse_staff(spec)`
+    Reads --skills, e.g. '2:loan;6:deposit,withdrawal'
+    
+    @param  : spec  : str   : count:purposes groups separated by ';'
+    @return : list  : (number of tellers, visit purposes) groups
+    """
+    staff = []
+    for group in spec.split(";"):
+        count, _, purposes = group.partition(":")
+        staff.append((int(count), purposes.split(",")))
+    return staff
+
+def parse_shifts(spec):
+    """
+    `parse_shifts(spec)`
+    Reads --shifts, e.g. '60:4,180:2'
+    
+    @param  : spec  : str   : start:tellers pairs separated by ','
+    @return : list  : (start time, number of tellers) pairs
+    """
+    shifts = []
+    for pair in spec.split(","):
+        start, n_tellers = pair.split(":")
+        shifts.append((float(start), int(n_tellers)))
+    return shifts
+
+def compare_branches(args, N, n_tellers):
+    """
+    `compare_branches(args, N, n_tellers)`
+    Runs the scenario up to --what-if once, then each --branch from there,
+    and prints how their waits compare
+    
+    @param  : args      : the parsed command line arguments
+    @param  : N         : the number of customers
+    @param  : n_tellers : the number of tellers before the branches split
+    @return : none
+    """
+    keys = {'tellers': ('n_tellers', int), 'queue': ('discipline', str),
+        'rate': ('arrival_rate', float)}
+    branches = {'as is': {}}
+    for spec in args.branch:
+        changes = {}
+        for pair in spec.split(","):
+            key, _, value = pair.partition("=")
+            if key not in keys:
+                parser.error("unknown --branch change '{}'".format(key))
+            name, kind = keys[key]
+            changes[name] = kind(value)
+        if 'n_tellers' in changes and args.skills:
+            parser.error("--branch tellers= cannot be used with --skills, \
+which staffs tellers by skill group")
+        branches[spec] = changes
+    
+    results = what_if(build_scenario(args, N, n_tellers), args.what_if,
+        branches, args.seed, args.workers, wait_stats=WaitStats())
+    
+    print("=" * 80)
+    print("[what-if from t = {}]".format(args.what_if))
+    for name, sim in results.items():
+        m = sim.wait_stats.metrics()
+        print("{:<32} average wait = {:<10.4g} p95 wait = {:<10.4g}".format(
+            name, m['mean'], m['p95']).rstrip())
+    print("=" * 80)
+
+def staff(args, N, cache=None):
+    """
+    `staff(args, N, cache)`
+    Finds and prints the fewest tellers that meet the --sla target
+    
+    @param  : args  : the parsed command line arguments
+    @param  : N     : the number of customers
+    @param  : cache : the ResultCache to consult, or None
+    @return : none
+    """
+    scenario = build_scenario(args, N, 1)
+    if args.sla_method == "analytic" and not markovian(scenario):
+        parser.error("--sla-method analytic needs poisson arrivals, exponential \
+service and a fifo queue")
+    optimizer = StaffingOptimizer(scenario,
+        replications=max(args.replications, 1),
+        seed=args.seed,
+        workers=args.workers,
+        method=args.sla_method,
+        cache=cache)
+    n_tellers = optimizer.minimum_tellers(args.sla, args.sla_metric)
+    
+    print("=" * 80)
+    print("[staffing]")
+    print("target                           = {} <= {}".format(args.sla_metric, args.sla))
+    print("minimum number of tellers        = {}".format(n_tellers))
+    print("{:<33}= {}".format("{} wait time".format(args.sla_metric),
+        optimizer.value(n_tellers, args.sla_metric)))
+    if optimizer.uses_analytic(args.sla_metric):
+        print("evaluated by                     = M/M/c formulas (steady state)")
+    else:
+        print("teller counts simulated          = {}".format(sorted(optimizer.evaluations)))
+    print("=" * 80)
+
+def schedule(args, N, n_tellers, cache=None):
+    """
+    `schedule(args, N, n_tellers, cache)`
+    Finds and prints the cheapest hourly schedule that meets the --sla
+    target in each of --sla-hours hours
+    
+    @param  : args      : the parsed command line arguments
+    @param  : N         : the number of customers
+    @param  : n_tellers : the most tellers on duty in any hour
+    @param  : cache     : the ResultCache to consult, or None
+    @return : none
+    """
+    scenario = build_scenario(args, N, n_tellers)
+    optimizer = ScheduleOptimizer(scenario, args.sla_hours, n_tellers,
+        period=args.hour_length,
+        salary=args.salary,
+        replications=max(args.replications, 1),
+        seed=args.seed,
+        workers=args.workers,
+        cache=cache)
+    found = optimizer.optimize(args.sla, args.sla_metric)
+    
+    print("=" * 80)
+    print("[shift schedule]")
+    print("target                           = {} <= {} every hour".format(args.sla_metric, args.sla))
+    if found is None:
+        print("not met with {} tellers on duty every hour".format(n_tellers))
+        print("=" * 80)
+        return
+    best, cost = found
+    print("tellers on duty each hour        = {}".format(list(best)))
+    first, shifts = hourly_shifts(best, args.hour_length)
+    print("as command line options          = -t {}{}".format(first, "" if not shifts else
+        " --shifts " + ",".join("{:g}:{}".format(start, n) for start, n in shifts)))
+    print("salary cost                      = {:.2f}".format(cost))
+    print("{:<33}= {}".format("{} wait time each hour".format(args.sla_metric),
+        [round(hour[args.sla_metric], 4) for hour in optimizer.evaluations[best]]))
+    print("schedules simulated              = {}".format(len(optimizer.evaluations)))
+    print("schedules pruned                 = {}".format(optimizer.pruned))
+    print("=" * 80)
+
+def cross_check(args, N, n_tellers, cache=None):
+    """
+    `cross_check(args, N, n_tellers, cache)`
+    Simulates the scenario and prints its wait metrics beside the M/M/c
+    formulas
+    
+    @param  : args      : the parsed command line arguments
+    @param  : N         : the number of customers
+    @param  : n_tellers : the number of tellers at the bank
+    @param  : cache     : the ResultCache to consult, or None
+    @return : none
+    """
+    scenario = build_scenario(args, N, n_tellers)
+    if not markovian(scenario):
+        parser.error("--cross-check needs poisson arrivals, exponential service \
+and a fifo queue")
+    optimizer = StaffingOptimizer(scenario,
+        replications=max(args.replications, 1),
+        seed=args.seed,
+        workers=args.workers,
+        cache=cache)
+    
+    print("=" * 80)
+    print("[cross-check against M/M/{}]".format(n_tellers))
+    print("{:<8} {:>14} {:>14} {:>12}".format("metric", "simulated", "analytic", "difference"))
+    for metric, (simulated, analytic, diff) in optimizer.cross_check(n_tellers).items():
+        print("{:<8} {:>14.4f} {:>14.4f} {:>+12.1%}".format(metric, simulated, analytic, diff))
+    print("=" * 80)
+
+def report(n_tellers, N, steps, wait_time, wait_stats=None, bank=None, event=False):
+    """
+    `report(n_tellers, N, steps, wait_time, wait_stats, bank, event)`
+    Prints the summary statistics of a simulation run
+    
+    @param  : n_tellers : the number of tellers at the bank
+    @param  : N         : the number of customers served
+    @param  : steps     : the number of unit time steps simulated, or with
+    event the simulated time the last service started
+    @param  : wait_time : the total time customers spent waiting
+    @param  : wait_stats: a WaitStats summary of the waits, or None
+    @param  : bank      : the simulated Bank, to report how many customers
+    gave up, how often they changed lines or the waits of each priority
+    class, or None
+    @param  : event     : whether the run was event-driven, which has no time
+    steps [default False]
+    @return : none
+    """
     print("=" * 80)
     print("[stats]")
     print("total number of tellers          = {}".format(n_tellers))
     print("total number of customers served = {}".format(N))
-    print("total number of unit time steps  = {}".format(t - 1))
-    print("average wait time per customer   = {}".format(wait_time / N))
+    if event:
+        print("time the last service started    = {}".format(steps))
+    else:
+        print("total number of unit time steps  = {}".format(steps))
+    print("average wait time per customer   = {}".format(wait_time / N if N else 0))
+    if wait_stats is not None and wait_stats.n > 0:
+        m = wait_stats.metrics()
+        print("wait time standard deviation     = {}".format(m['stdev']))
+        for p in ['p50', 'p95', 'p99']:
+            print("{:<33}= {}".format("{} wait time (estimate)".format(p), m[p]))
+        print("longest wait time                = {}".format(m['max']))
+    if bank is not None and (bank.balk_at is not None or bank.reneged):
+        arrived = N + bank.balked + bank.reneged
+        print("customers that balked            = {}".format(bank.balked))
+        print("customers that reneged           = {}".format(bank.reneged))
+        print("abandonment rate                 = {}".format(
+            (bank.balked + bank.reneged) / arrived if arrived else 0))
+        if bank.reneged:
+            print("average wait before reneging     = {}".format(
+                bank.reneged_wait / bank.reneged))
+    if isinstance(bank, MultiLineBank):
+        print("customers that changed lines     = {}".format(bank.jockeyed))
+    if isinstance(bank, PriorityBank):
+        for name, m in bank.class_metrics().items():
+            print("[class {}]".format(name))
+            print("    customers served             = {}".format(m['n']))
+            print("    average wait time            = {}".format(m['mean']))
+            print("    p95 wait time (estimate)     = {}".format(m['p95']))
+            print("    longest wait time            = {}".format(m['max']))
+            if bank.preemptive:
+                print("    services interrupted         = {}".format(m['preempted']))
+                print("    time back in line            = {}".format(m['interrupted']))
     print("=" * 80)
     
 if __name__ == '__main__':
@@ -0,0 +1,144 @@
+"""
+`test_arrivals.py`
+Tests the lazy arrival processes
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import random
+import sys, os
+from itertools import islice
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim import arrivals
+from banksim.customer import Customer
+from banksim.scenario import Scenario
+
+class TestArrivalProcesses:
+
+    def test_square_wave(self):
+        """
+        `test_square_wave()`
+        Tests that the wave spreads customers evenly over the ticks
+        """
+        times = list(arrivals.square_wave(100, 10))
+        assert times == [t for t in range(10) for _ in range(10)]
+        assert list(arrivals.square_wave(5, 10)) == [0, 1, 2, 3, 4]
+        assert list(arrivals.square_wave(0)) == []
+    
+    def test_bounds(self):
+        """
+        `test_bounds()`
+        Tests that processes stop at n arrivals or at the horizon
+        """
+        with pytest.raises(AssertionError):
+            arrivals.constant(1.0)
+        assert list(arrivals.constant(2.0, n=4)) == [0, 0.5, 1.0, 1.5]
+        assert list(arrivals.constant(2.0, horizon=1.0)) == [0, 0.5]
+        assert len(list(arrivals.poisson(1.0, random.Random(1), n=50))) == 50
+        assert all(t < 10 for t in arrivals.poisson(1.0, random.Random(1), horizon=10))
+    
+    def test_lazy(self):
+        """
+        `test_lazy()`
+        Tests that an unbounded process only draws what is pulled from it
+        """
+        rng = random.Random(3)
+        times = arrivals.poisson(1.0, rng, n=10 ** 12)
+        first = list(islice(times, 5))
+        assert first == sorted(first)
+        
+        # [ case : stopping at n does not draw past the last arrival ]
+        a, b = random.Random(3), random.Random(3)
+        list(arrivals.poisson(1.0, a, n=5))
+        for _ in range(5): b.expovariate(1.0)
+        assert a.random() == b.random()
+    
+    def test_poisson_rate(self):
+        """
+        `test_poisson_rate()`
+        Tests that homogeneous and thinned processes arrive at the right rate
+        """
+        n = len(list(arrivals.poisson(4.0, random.Random(5), horizon=1000)))
+        assert n == pytest.approx(4000, rel=0.05)
+        
+        rate = arrivals.PiecewiseRate([(0, 1), (500, 7)])
+        assert rate(0) == 1 and rate(499.9) == 1 and rate(500) == 7
+        assert rate.max_rate() == 7
+        times = list(arrivals.nonhomogeneous_poisson(rate, 7, random.Random(5), horizon=1000))
+        early = sum(1 for t in times if t < 500)
+        assert early == pytest.approx(500, rel=0.15)
+        assert len(times) - early == pytest.approx(3500, rel=0.05)
+    
+    def test_rate_ends_at_zero(self):
+        """
+        `test_rate_ends_at_zero()`
+        Tests that a thinned process stops once its rate is 0 for good,
+        instead of drawing candidates forever
+        """
+        rate = arrivals.PiecewiseRate([(0, 1), (60, 0), (30, 0)])
+        assert rate.end() == 30
+        assert arrivals.PiecewiseRate([(0, 0), (10, 1)]).end() is None
+        times = list(arrivals.nonhomogeneous_poisson(rate, 1, random.Random(4), n=200))
+        assert 0 < len(times) < 200 and all(t < 30 for t in times)
+        
+        # [ case : an earlier horizon still applies ]
+        times = arrivals.nonhomogeneous_poisson(rate, 1, random.Random(4), horizon=10)
+        assert times.horizon == 10
+        
+        # [ case : a rate that is 0 everywhere cannot be rescaled ]
+        times = arrivals.nonhomogeneous_poisson(arrivals.PiecewiseRate([(0, 0)]), 1,
+            random.Random(4), n=5)
+        assert list(times) == []
+        with pytest.raises(AssertionError):
+            times.set_rate(2)
+    
+    def test_batches(self):
+        """
+        `test_batches()`
+        Tests that batch arrivals come in groups sharing a time
+        """
+        times = list(arrivals.batches(1.0, 3, random.Random(2), n=30))
+        assert len(times) == 30
+        assert len(set(times)) == 10
+        
+        sizes = lambda rng: rng.randint(1, 4)
+        times = list(arrivals.batches(1.0, sizes, random.Random(2), n=100))
+        assert len(times) == 100 and times == sorted(times)
+    
+    def test_customers(self):
+        """
+        `test_customers()`
+        Tests that times become sequentially numbered customers
+        """
+        stream = list(arrivals.customers([0, 1, 1], service_times=[2, 3, 4]))
+        assert [t for t, _ in stream] == [0, 1, 1]
+        assert all(isinstance(c, Customer) for _, c in stream)
+        assert [c.customer_id for _, c in stream] == [0, 1, 2]
+        assert [c.service_time for _, c in stream] == [2, 3, 4]
+    
+    def test_scenario_processes(self):
+        """
+        `test_scenario_processes()`
+        Tests that every process can drive a Scenario
+        """
+        assert Scenario(100).run().average_wait_time() == 45.0
+        for kwargs in [
+            {'arrival_process': 'constant', 'arrival_rate': 0.9},
+            {'arrival_process': 'poisson', 'arrival_rate': 0.9},
+            {'arrival_process': 'nhpp', 'rate_schedule': [(0, 0.5), (50, 2)]},
+            {'arrival_process': 'batch', 'arrival_rate': 0.3, 'batch_size': 3},
+        ]:
+            sim = Scenario(200, **kwargs).run(seed=1)
+            assert sim.served == 200
+        
+        with pytest.raises(AssertionError):
+            Scenario(10, arrival_process='poisson')
+        with pytest.raises(AssertionError):
+            Scenario(10, arrival_process='nhpp')
+        with pytest.raises(AssertionError):
+            Scenario(10, arrival_process='nhpp', rate_schedule=[(0, 1), (60, 0)])
@@ -128,3 +128,161 @@ class TestBankReceiveCustomer:
         for val in fail_vals:
             with pytest.raises(AssertionError):
                 b.receive_customer(val)
+    
+    def test_receive_customer_records_arrival(self):
+        """
+        `test_receive_customer_records_arrival()`
+        Tests that customers are stamped with the bank clock on arrival
+        """
+        b = bk()
+        b.open()
+        assert b.clock == 0
+        b.tick()
+        b.tick()
+        c = Customer("Johnny")
+        b.receive_customer(c)
+        assert c.arrived_at == 2
+        
+        b.tick(3)
+        b.tellers[0].serve(b.customers.get_next_customer(), b.clock)
+        assert c.wait_time() == 3
+
+class TestBankTellerPool:
+    
+    def test_serve_next(self):
+        """
+        `test_serve_next()`
+        Tests that idle tellers are handed out lowest-numbered first and held
+        until their customer's service time has passed
+        """
+        b = bk(3)
+        b.open()
+        for i, s in enumerate([2, 1, 3, 1]):
+            b.receive_customer(Customer(str(i).zfill(3), service_time=s))
+        
+        served = []
+        while b.has_free_teller() and len(b.customers) > 0:
+            served.append(b.serve_next())
+        assert [t for t, _ in served] == b.tellers
+        assert not b.has_free_teller()
+        assert len(b.customers) == 1
+        assert sorted(b.busy) == [(1, 1), (2, 0), (3, 2)]
+        
+        # [ case : serving requires an idle teller ]
+        with pytest.raises(AssertionError):
+            b.serve_next()
+        
+        # [ case : only tellers whose service has ended are freed ]
+        b.tick()
+        b.update()
+        assert b.free == [1]
+        assert b.tellers[1].is_available()
+        assert not b.tellers[0].is_available()
+        
+        teller, cust = b.serve_next()
+        assert teller is b.tellers[1]
+        assert cust.wait_time() == 1
+        
+        b.tick(5)
+        b.update()
+        assert sorted(b.free) == [0, 1, 2]
+        assert all(t.is_available() for t in b.tellers)
+    
+    def test_set_tellers(self):
+        """
+        `test_set_tellers()`
+        Tests hiring tellers and letting busy ones go after their customer
+        """
+        b = bk(2)
+        b.open()
+        for i in range(4):
+            b.receive_customer(Customer(str(i).zfill(3), service_time=2))
+        b.serve_next()
+        b.serve_next()
+        
+        b.set_tellers(3)
+        assert len(b.tellers) == 3 and b.free == [2]
+        b.serve_next()
+        
+        # [ case : a dismissed teller finishes serving and is not freed ]
+        b.set_tellers(1)
+        assert b.free == []
+        assert b.utilization() == 1
+        b.tick(2)
+        b.update()
+        assert b.free == [0]
+        assert len(b.busy) == 0
+        
+        with pytest.raises(AssertionError):
+            b.set_tellers(0)
+        
+        # [ case : a teller rehired before finishing is freed once, when done ]
+        b = bk(2)
+        b.open()
+        for name in ['aaa', 'bbb']:
+            b.receive_customer(Customer(name, service_time=2))
+            b.serve_next()
+        b.set_tellers(1)
+        b.set_tellers(2)
+        assert b.free == [] and not b.tellers[1].is_available()
+        assert b.utilization() == 1
+        b.tick(2)
+        b.update()
+        assert sorted(b.free) == [0, 1]
+    
+    def test_balking(self):
+        """
+        `test_balking()`
+        Tests that arrivals leave when too many people would be ahead of them
+        """
+        b = bk(2, balk_at=1)
+        b.open()
+        cs = [Customer(str(i).zfill(3)) for i in range(5)]
+        
+        # [ case : idle tellers count against the line ]
+        assert [b.receive_customer(c) for c in cs] == [True, True, True, False, False]
+        assert b.balked == 2
+        assert cs[3].left_at == 0 and cs[0].left_at is None
+        assert len(b.customers) == 3
+        
+        # [ case : nobody waits at all with balk_at=0 ]
+        b = bk(1, balk_at=0)
+        b.open()
+        assert b.receive_customer(Customer('aaa'))
+        assert not b.receive_customer(Customer('bbb'))
+        with pytest.raises(AssertionError):
+            bk(1, balk_at=-1)
+    
+    def test_renege(self):
+        """
+        `test_renege()`
+        Tests that customers leave once their patience runs out, and that the
+        deadlines of customers served in time are skipped
+        """
+        b = bk(1)
+        b.open()
+        cs = [Customer(str(i).zfill(3), service_time=3, patience=p)
+            for i, p in enumerate([0, 3, 1, None, 5])]
+        for c in cs:
+            b.receive_customer(c)
+        b.serve_next()
+        assert len(b.deadlines) == 4
+        
+        b.tick(1)
+        assert b.renege() == []
+        b.tick(1)
+        assert b.renege() == [cs[2]]
+        assert cs[2].left_at == 1
+        
+        # [ case : a deadline of exactly now is not yet up ]
+        b.tick(1)
+        b.update()
+        assert b.renege() == []
+        assert b.serve_next()[1] == cs[1]
+        
+        # [ case : served customers' deadlines are dropped, not counted ]
+        b.tick(3)
+        assert b.renege() == [cs[4]]
+        assert b.reneged == 2 and b.reneged_wait == 1 + 5
+        assert len(b.customers) == 1
+        assert b.deadlines == []
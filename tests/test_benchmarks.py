@@ -0,0 +1,57 @@
+"""
+`test_benchmarks.py`
+Tests the benchmark suite's measuring and reporting helpers
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from benchmarks.suite import CASES, run_case, scaling_exponents, compare
+
+def result(case, n, seconds, tellers=1):
+    return {'case': case, 'customers': n, 'tellers': tellers,
+        'seconds': seconds, 'ops_per_sec': n / seconds, 'peak_mb': 0.0}
+
+class TestBenchmarkSuite:
+
+    def test_run_case(self):
+        """
+        `test_run_case()`
+        Tests that every case runs and reports its throughput
+        """
+        for case in CASES:
+            r = run_case(case, 100, 2)
+            assert r['case'] == case
+            assert r['customers'] == 100
+            assert r['ops_per_sec'] > 0
+            assert r['peak_mb'] >= 0
+    
+    def test_scaling_exponents(self):
+        """
+        `test_scaling_exponents()`
+        Tests that linear and quadratic series are told apart
+        """
+        results = [result('linear', n, n * 1e-6) for n in [100, 1000, 10000]]
+        results += [result('quadratic', n, n * n * 1e-9) for n in [100, 1000, 10000]]
+        k = scaling_exponents(results)
+        assert k['linear/t=1'] == pytest.approx(1)
+        assert k['quadratic/t=1'] == pytest.approx(2)
+    
+    def test_compare(self):
+        """
+        `test_compare()`
+        Tests that only slowdowns beyond the threshold count as regressions
+        """
+        old = {'results': [result('bank', 1000, 1.0), result('bank', 10000, 1.0)]}
+        new = {'results': [result('bank', 1000, 1.05), result('bank', 10000, 2.0)]}
+        lines, regressions = compare(old, new, threshold=0.1)
+        assert regressions == 1
+        assert len(lines) == 2
+        assert lines[1].endswith('REGRESSION')
+        assert compare(old, old)[1] == 0
@@ -0,0 +1,155 @@
+"""
+`test_cache.py`
+Tests the on-disk result cache
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+import shutil
+import subprocess
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+ROOT = os.path.abspath(os.path.join('.'))
+
+from banksim.cache import ResultCache, cached_map, canonical, result_key
+from banksim.replication import run_replications
+from banksim.scenario import Scenario
+from banksim.service import Exponential
+from banksim.staffing import StaffingOptimizer
+
+class TestCache:
+
+    def test_key(self):
+        """
+        `test_key()`
+        Tests that keys only depend on what the result does
+        """
+        a = Scenario(100, 2, arrival_rate=1.5, service=Exponential(2))
+        b = Scenario(100, 2, arrival_rate=1.5, service=Exponential(2.0))
+        assert result_key('x', a.config(), seed=1) == result_key('x', b.config(), seed=1)
+        assert result_key('x', a.config(), seed=1) != result_key('x', a.config(), seed=2)
+        assert result_key('x', a.config(), seed=1) != result_key('y', a.config(), seed=1)
+        assert result_key('x', a.config()) != result_key('x', a.replace(n_tellers=3).config())
+        
+        # [ case : tuples and lists, and the order of dict keys, do not matter ]
+        assert canonical({'a': (1, 2.0), 'b': None}) == canonical({'b': None, 'a': [1, 2]})
+        with pytest.raises(TypeError):
+            canonical(object())
+    
+    def test_store(self, tmp_path):
+        """
+        `test_store()`
+        Tests that results survive reopening the cache
+        """
+        cache = ResultCache(str(tmp_path))
+        assert cache.get('k') is None
+        cache.put('k', {'mean': 1.5, 'samples': [1, 2]})
+        assert cache.get('k') == {'mean': 1.5, 'samples': [1, 2]}
+        assert (cache.hits, cache.misses) == (1, 1)
+        
+        reopened = ResultCache(str(tmp_path))
+        assert len(reopened) == 1
+        assert reopened.get('k') == {'mean': 1.5, 'samples': [1, 2]}
+        reopened.clear()
+        assert len(reopened) == 0 and ResultCache(str(tmp_path)).get('k') is None
+    
+    def test_eviction(self, tmp_path):
+        """
+        `test_eviction()`
+        Tests that the least recently used results are evicted first
+        """
+        cache = ResultCache(str(tmp_path), max_bytes=100)
+        for key in 'abc':
+            cache.put(key, 'x' * 10)
+        cache.get('a')
+        for key in 'de':
+            cache.put(key, 'x' * 10)
+        # [ case : each entry takes 24 bytes, so four fit and b, used longest ago, goes ]
+        assert cache.get('b') is None
+        assert all(cache.get(key) is not None for key in 'acde')
+        assert sorted(os.listdir(str(tmp_path))) == ['a.json', 'c.json', 'd.json', 'e.json']
+    
+    def test_cached_map(self, tmp_path):
+        """
+        `test_cached_map()`
+        Tests that only the jobs the cache lacks are run
+        """
+        cache = ResultCache(str(tmp_path))
+        ran = []
+        def run(jobs):
+            ran.extend(jobs)
+            return [j * j for j in jobs]
+        assert cached_map(run, [1, 2], ['1', '2'], cache) == [1, 4]
+        assert cached_map(run, [1, 2, 3], ['1', '2', '3'], cache) == [1, 4, 9]
+        assert ran == [1, 2, 3]
+        
+        # [ case : bypassed ]
+        assert cached_map(run, [1], None, None) == [1]
+        assert ran == [1, 2, 3, 1]
+    
+    def test_replications(self, tmp_path):
+        """
+        `test_replications()`
+        Tests that cached replications give the same summary without running
+        """
+        scenario = Scenario(200, 2, arrival_rate=1.5, service=Exponential(1))
+        cache = ResultCache(str(tmp_path))
+        fresh = run_replications(scenario, 4, seed=3, workers=1)
+        first = run_replications(scenario, 4, seed=3, workers=1, cache=cache)
+        assert cache.misses == 4 and len(cache) == 4
+        again = run_replications(scenario, 6, seed=3, workers=1, cache=cache)
+        assert cache.hits == 4 and cache.misses == 6
+        assert fresh.samples == first.samples == again.samples[:4]
+        
+        # [ case : antithetic pairs reuse their plain halves but not their twins ]
+        run_replications(scenario, 4, seed=3, workers=1, antithetic=True, cache=cache)
+        assert cache.hits == 8 and cache.misses == 10
+    
+    def test_staffing(self, tmp_path):
+        """
+        `test_staffing()`
+        Tests that a second optimizer is answered from the cache
+        """
+        scenario = Scenario(300, 1, arrival_rate=2, service=Exponential(1))
+        cache = ResultCache(str(tmp_path))
+        a = StaffingOptimizer(scenario, replications=2, method='simulate', cache=cache)
+        n = a.minimum_tellers(0.5)
+        misses = cache.misses
+        b = StaffingOptimizer(scenario, replications=2, method='simulate', cache=cache)
+        assert b.minimum_tellers(0.5) == n
+        assert b.evaluations == a.evaluations
+        assert cache.misses == misses
+    
+    def test_command_line_source(self, tmp_path):
+        """
+        `test_command_line_source()`
+        Tests that editing main.py, which writes the cached report, is a
+        change of code version
+        """
+        script = str(tmp_path / 'main.py')
+        shutil.copy(os.path.join(ROOT, 'main.py'), script)
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        def run():
+            return subprocess.run([sys.executable, script, '50', '-t', '2', '-e',
+                '--cache-dir', str(tmp_path / 'cache')], env=env, check=True,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                universal_newlines=True)
+        
+        first = run()
+        assert '[stats]' in first.stdout and not first.stderr
+        # [ case : unchanged, the report comes from the cache ]
+        again = run()
+        assert again.stdout == first.stdout and 'cached' in again.stderr
+        
+        with open(script) as f:
+            source = f.read()
+        with open(script, 'w') as f:
+            f.write(source.replace('print("[stats]")', 'print("[totals]")'))
+        edited = run()
+        assert '[totals]' in edited.stdout and '[stats]' not in edited.stdout
+        assert not edited.stderr
@@ -115,3 +115,43 @@ class TestCustomer:
         # [ case : negative numbers are a no-go]
         with pytest.raises(AssertionError):
             e.wait_a_little(-1)
+    
+    def test_wait_time(self):
+        """
+        `test_wait_time()`
+        Tests that wait times are computed from the arrival and service times
+        """
+        e = Customer('abcd')
+        
+        # [ case : falls back on accumulated waiting when times are unknown ]
+        e.wait_a_little(3)
+        assert e.wait_time() == 3
+        
+        # [ case : computed lazily as served_at - arrived_at ]
+        e.arrived_at = 2
+        e.serve(7)
+        assert e.served_at == 7
+        assert e.wait_time() == 5
+    
+    def test_compact(self):
+        """
+        `test_compact()`
+        Tests that customers are slotted and can use sequential ids
+        """
+        e = Customer('abcd', customer_id=7)
+        
+        # [ case : no per-instance __dict__ ]
+        assert not hasattr(e, '__dict__')
+        with pytest.raises(AttributeError):
+            e.not_an_attribute = 1
+        
+        # [ case : sequential ids are kept as given ]
+        assert e.customer_id == 7
+        
+        # [ case : a UUID is generated on demand, once ]
+        assert e.uuid == e.uuid
+        assert e.uuid != Customer('efgh', customer_id=7).uuid
+        
+        # [ case : customers with UUID ids report that UUID ]
+        d = Customer('abcd')
+        assert d.uuid == d.customer_id
@@ -0,0 +1,76 @@
+"""
+`test_customer_pool.py`
+Unit tests for the array-backed CustomerPool
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.bank import Bank
+from banksim.customer import Customer
+from banksim.customer_pool import CustomerPool
+from banksim.engine import Simulation
+from banksim.reception_queue import ReceptionQueue
+
+class TestCustomerPool:
+
+    def test_append(self):
+        """
+        `test_append()`
+        Tests that customers are stored in typed columns with sequential ids
+        """
+        p = CustomerPool(first_id=10)
+        assert len(p) == 0
+        assert p.append(0) == 0
+        assert p.append(1.5, service_time=2, visit_purpose='loan') == 1
+        assert len(p) == 2
+        assert list(p.ids) == [10, 11]
+        assert list(p.arrivals) == [0, 1.5]
+        assert p.purpose_names[p.purposes[1]] == 'loan'
+        
+        # [ case : negative times are rejected ]
+        with pytest.raises(AssertionError):
+            p.append(-1)
+        with pytest.raises(AssertionError):
+            p.append(0, service_time=-1)
+    
+    def test_customer(self):
+        """
+        `test_customer()`
+        Tests that pooled customers work with ReceptionQueue and Bank
+        """
+        p = CustomerPool()
+        p.append(0, service_time=3, visit_purpose='deposit')
+        c = p.customer(0)
+        assert isinstance(c, Customer)
+        assert c.customer_id == 0
+        assert c.service_time == 3
+        assert c.visit_purpose == 'deposit'
+        
+        q = ReceptionQueue()
+        q.insert_customer(c)
+        assert q.get_next_customer() is c
+        
+        b = Bank()
+        b.open()
+        b.receive_customer(p.customer(0))
+        assert len(b.customers) == 1
+    
+    def test_stream(self):
+        """
+        `test_stream()`
+        Tests that a pool can feed the next-event engine
+        """
+        p = CustomerPool()
+        for t in range(10):
+            for _ in range(10):
+                p.append(t)
+        sim = Simulation(Bank(2), p.stream()).run()
+        assert sim.served == 100
+        assert sim.average_wait_time() == 20.0
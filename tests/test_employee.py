@@ -13,6 +13,7 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join('.')))
 
 from banksim.employee import Employee
+from banksim.customer import Customer
 
 class TestEmployee:
     
@@ -93,6 +94,31 @@ class TestEmployee:
         e.set_available(False)
         assert e.is_available() == False
         assert e.available == False
+    
+    def test_can_help(self):
+        """
+        `test_can_help()`
+        Tests that employees only serve customers they have the skills for
+        """
+        e = Employee('abcd')
+        assert e.skills is None
+        assert e.can_help('loan')
         
+        e = Employee('abcd', skills=['loan', 'deposit'])
+        assert e.skills == frozenset(['loan', 'deposit'])
+        assert e.can_help('deposit')
+        assert not e.can_help('withdrawal')
         
-        
+        # [case: a customer they cannot help leaves them available]
+        assert e.serve(Customer('wxyz', visit_purpose='withdrawal')) == False
+        assert e.is_available()
+        assert e.serve(Customer('wxyz', visit_purpose='loan')) == True
+        assert not e.is_available()
+    
+    def test_hourly_wage(self):
+        """
+        `test_hourly_wage()`
+        Tests that the yearly salary string is turned into an hourly wage
+        """
+        assert Employee('abcd').hourly_wage() == 10.0
+        assert Employee('abcd', salary='19200.00').hourly_wage() == 20.0
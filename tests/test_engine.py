@@ -0,0 +1,150 @@
+"""
+`test_engine.py`
+Tests the next-event simulation engine
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.bank import Bank
+from banksim.customer import Customer
+from banksim.engine import Simulation
+
+def square_wave(n, ticks=10):
+    """
+    `square_wave(n, ticks)`
+    The arrivals main.py produces: n customers spread evenly over ticks
+    """
+    per_tick = -(-n // ticks)
+    return [(i // per_tick, Customer(str(i).zfill(3))) for i in range(n)]
+
+class TestSimulation:
+
+    def test_initialization(self):
+        """
+        `test_initialization()`
+        Tests the pre-conditions of the Simulation class
+        """
+        for val in [None, 1, 'bank']:
+            with pytest.raises(AssertionError):
+                Simulation(val, [])
+        
+        # [ case : an empty arrival stream finishes immediately ]
+        sim = Simulation(Bank(), []).run()
+        assert sim.served == 0
+        assert sim.average_wait_time() == 0
+        assert not sim.bank.is_open()
+    
+    def test_matches_unit_ticks(self):
+        """
+        `test_matches_unit_ticks()`
+        Tests that unit service times reproduce the tick-based results
+        """
+        for n_tellers, expected in [(1, 45.0), (2, 20.0), (10, 0.0)]:
+            sim = Simulation(Bank(n_tellers), square_wave(100)).run()
+            assert sim.served == 100
+            assert sim.average_wait_time() == expected
+    
+    def test_real_valued_times(self):
+        """
+        `test_real_valued_times()`
+        Tests that arrival and service times need not be integers
+        """
+        arrivals = [
+            (0.0, Customer('aaa', service_time=1.5)),
+            (0.5, Customer('bbb', service_time=0.25)),
+            (0.75, Customer('ccc', service_time=2.0)),
+        ]
+        sim = Simulation(Bank(1), arrivals).run()
+        assert [c.served_at for _, c in arrivals] == [0.0, 1.5, 1.75]
+        assert sim.wait_time == pytest.approx(0 + 1.0 + 1.0)
+        assert sim.bank.clock == pytest.approx(3.75)
+    
+    def test_skips_idle_time(self):
+        """
+        `test_skips_idle_time()`
+        Tests that a sparse, long horizon costs only as many events as there
+        are arrivals and departures
+        """
+        day = 8 * 60 * 60
+        arrivals = [(t, Customer(str(t).zfill(5))) for t in range(0, day, 600)]
+        sim = Simulation(Bank(1), arrivals).run()
+        assert sim.served == len(arrivals)
+        assert sim.wait_time == 0
+        assert sim.events == 2 * len(arrivals)
+    
+    def test_close(self):
+        """
+        `test_close()`
+        Tests that customers arriving after closing time are turned away, and
+        that customers already in line are still served
+        """
+        arrivals = [(t, Customer(str(t).zfill(3))) for t in range(10)]
+        sim = Simulation(Bank(1), arrivals, close_at=5).run()
+        assert sim.served == 5
+        assert sim.turned_away == 5
+    
+    def test_abandonment(self):
+        """
+        `test_abandonment()`
+        Tests balking and reneging against the M/M/1 queue with exponential
+        patience, where a customer abandons with probability 1 - (1 - p0)/rho
+        and, with equal rates, p0 = e^-1
+        """
+        from banksim.scenario import Scenario
+        from banksim.service import Exponential
+        import math
+        
+        # [ case : a customer gives up before the teller frees up ]
+        arrivals = [(0, Customer('aaa', service_time=2)),
+            (0, Customer('bbb', patience=1)), (0.5, Customer('ccc', patience=4))]
+        sim = Simulation(Bank(1), arrivals).run()
+        assert sim.served == 2
+        assert sim.bank.reneged == 1 and arrivals[1][1].left_at == 1
+        assert arrivals[2][1].served_at == 2
+        
+        s = Scenario(100000, 1, arrival_rate=1, service_rate=1,
+            patience=Exponential(1))
+        sim = s.run(seed=3)
+        assert sim.bank.reneged / s.n_customers == pytest.approx(math.exp(-1), abs=0.01)
+        assert sim.served + sim.bank.reneged == s.n_customers
+        
+        # [ case : balk_at=0 turns away whoever finds every teller busy, as
+        #   Erlang's loss formula B(2, 2) = 0.4 predicts ]
+        s = Scenario(100000, 2, arrival_rate=2, service_rate=1, balk_at=0)
+        sim = s.run(seed=3)
+        assert sim.bank.balked / s.n_customers == pytest.approx(0.4, abs=0.01)
+        assert sim.wait_time == 0
+    
+    def test_shifts(self):
+        """
+        `test_shifts()`
+        Tests tellers coming on and off duty, with a teller who leaves
+        finishing their customer first
+        """
+        arrivals = [(0, Customer(str(i).zfill(3), service_time=4)) for i in range(6)]
+        sim = Simulation(Bank(1), arrivals, shifts=[(2, 3), (5, 1)]).run()
+        
+        # [ case : two tellers join at 2, and leave once they finish at 6 ]
+        assert [c.served_at for _, c in arrivals] == [0, 2, 2, 4, 8, 12]
+        assert len(sim.bank.tellers) == 1
+        assert sim.bank.clock == 16
+    
+    def test_period_waits(self):
+        """
+        `test_period_waits()`
+        Tests that a simulation splits waits by the period customers arrived in
+        """
+        from banksim.streaming import PeriodWaits
+        
+        arrivals = [(t, Customer(str(t).zfill(3), service_time=2)) for t in range(4)]
+        waits = PeriodWaits(2)
+        Simulation(Bank(1), arrivals, period_waits=waits).run()
+        assert [p['n'] for p in waits.metrics()] == [2, 2]
+        assert [p['mean'] for p in waits.metrics()] == [0.5, 2.5]
@@ -0,0 +1,97 @@
+"""
+`test_erlang.py`
+Tests the M/M/c formulas and their use in staffing
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import math
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.erlang import MMc, erlang_b, erlang_c
+from banksim.scenario import Scenario
+from banksim.staffing import StaffingOptimizer, markovian
+
+class TestErlang:
+
+    def test_known_values(self):
+        """
+        `test_known_values()`
+        Tests against M/M/1 and textbook Erlang tables
+        """
+        # [ case : M/M/1 waits with probability rho, for rho / (mu - lambda) ]
+        q = MMc(0.8, 1, 1)
+        assert q.wait_probability() == pytest.approx(0.8)
+        assert q.mean_wait() == pytest.approx(4.0)
+        assert q.mean_queue_length() == pytest.approx(3.2)
+        assert q.wait_quantile(0.1) == 0
+        assert q.wait_quantile(0.9) == pytest.approx(math.log(8) / 0.2)
+        
+        assert erlang_b(0, 3) == 1
+        assert erlang_b(5, 3) == pytest.approx(0.1101, abs=1e-4)
+        assert erlang_c(5, 3) == pytest.approx(0.2362, abs=1e-4)
+
+    def test_large_c(self):
+        """
+        `test_large_c()`
+        Tests that thousands of tellers neither overflow nor lose precision
+        """
+        q = MMc(4900, 1, 5000)
+        assert 0 < q.wait_probability() < 1
+        assert 0 < q.mean_wait() < 1
+        assert 0 <= MMc(4900, 1, 6000).wait_probability() < 1e-40
+
+    def test_unstable(self):
+        """
+        `test_unstable()`
+        Tests that overloaded banks have infinite waits
+        """
+        q = MMc(3, 1, 3)
+        assert not q.is_stable()
+        assert q.wait_probability() == 1
+        assert math.isinf(q.mean_wait())
+        assert math.isinf(q.metrics()['p50'])
+        assert q.utilization() == 1
+
+    def test_against_simulation(self):
+        """
+        `test_against_simulation()`
+        Tests that long simulations agree with the formulas
+        """
+        opt = StaffingOptimizer(Scenario(20000, 3, arrival_rate=2, service_rate=1),
+            replications=4)
+        check = opt.cross_check(3)
+        assert abs(check['mean'][2]) < 0.1
+        assert abs(check['p90'][2]) < 0.1
+
+    def test_staffing(self):
+        """
+        `test_staffing()`
+        Tests that staffing uses the formulas only for M/M/c scenarios
+        """
+        scenario = Scenario(2000, arrival_rate=9, service_rate=1)
+        assert markovian(scenario)
+        assert not markovian(scenario.replace(discipline='lifo'))
+        assert not markovian(scenario.replace(arrival_process='constant'))
+        assert not markovian(Scenario(100))
+        
+        opt = StaffingOptimizer(scenario)
+        assert opt.minimum_tellers(0.1) == 12
+        assert opt.evaluations == {}
+        assert opt.value(12) == MMc(9, 1, 12).mean_wait()
+        
+        # [ case : the longest wait is always simulated ]
+        opt.minimum_tellers(5, 'max')
+        assert opt.evaluations != {}
+        
+        opt = StaffingOptimizer(scenario, method='simulate')
+        opt.minimum_tellers(0.1)
+        assert opt.evaluations != {}
+        
+        with pytest.raises(AssertionError):
+            StaffingOptimizer(Scenario(100), method='analytic')
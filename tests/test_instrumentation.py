@@ -0,0 +1,89 @@
+"""
+`test_instrumentation.py`
+Tests the per-phase timers, counters and gauges
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.bank import Bank
+from banksim.customer import Customer
+from banksim.engine import Simulation
+from banksim.instrumentation import Stats
+from main import run_ticks
+
+def wave(n, ticks=10):
+    per_tick = -(-n // ticks)
+    return [(i // per_tick, Customer(str(i).zfill(3), customer_id=i)) for i in range(n)]
+
+class TestStats:
+
+    def test_add_time(self):
+        """
+        `test_add_time()`
+        Tests that phase times and call counts accumulate
+        """
+        stats = Stats()
+        stats.add_time('a', 1.0)
+        stats.add_time('a', 2.0, 3)
+        stats.add_time('b', 1.0)
+        assert stats.timers['a'] == [3.0, 4]
+        
+        rows = stats.breakdown()
+        assert [r[0] for r in rows] == ['a', 'b']
+        assert rows[0][3] == pytest.approx(0.75)
+
+    def test_gauge(self):
+        """
+        `test_gauge()`
+        Tests that gauges track their sample count, sum, peak and last value
+        """
+        stats = Stats()
+        for v in [3, 7, 2]:
+            stats.gauge('q', v)
+        assert stats.gauges['q'] == [3, 12, 7, 2]
+        
+        stats.count('ticks')
+        stats.count('ticks', 2)
+        assert stats.counters['ticks'] == 3
+        assert 'ticks' in stats.report()
+
+    def test_run_ticks(self):
+        """
+        `test_run_ticks()`
+        Tests that instrumenting the tick loop does not change its results
+        """
+        bank = Bank(2)
+        bank.open()
+        plain = run_ticks(bank, iter(wave(100)))
+        
+        stats = Stats()
+        bank = Bank(2)
+        bank.open()
+        assert run_ticks(bank, iter(wave(100)), stats=stats) == plain
+        
+        assert stats.timers['receive_customer'][1] == 100
+        assert stats.timers['serve_next'][1] == 100
+        assert stats.counters['ticks'] == stats.timers['update'][1]
+        assert stats.gauges['utilization'][2] == 1
+
+    def test_simulation(self):
+        """
+        `test_simulation()`
+        Tests that the engine times every kind of event it handles
+        """
+        plain = Simulation(Bank(3), wave(60)).run()
+        stats = Stats()
+        sim = Simulation(Bank(3), wave(60), stats=stats).run()
+        assert sim.wait_time == plain.wait_time
+        
+        assert stats.timers['arrival'][1] == 60
+        assert stats.timers['departure'][1] == 60
+        assert stats.timers['dispatch'][1] == 60
+        assert stats.gauges['queue_length'][2] > 0
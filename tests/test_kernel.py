@@ -0,0 +1,104 @@
+"""
+`test_kernel.py`
+Checks the array-based FIFO kernel against the object model
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import random
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+np = pytest.importorskip('numpy')
+
+from banksim.bank import Bank
+from banksim.customer import Customer
+from banksim.engine import Simulation
+from banksim.kernel import fifo_kernel
+
+def simulate(arrivals, service_times, n_tellers):
+    """
+    `simulate(arrivals, service_times, n_tellers)`
+    Runs the same scenario through Bank and returns per-customer waits and
+    departures
+    """
+    customers = [Customer(str(i).zfill(3), service_time=s) for i, s in enumerate(service_times)]
+    Simulation(Bank(n_tellers), zip(arrivals, customers)).run()
+    waits = [c.wait_time() for c in customers]
+    departures = [c.served_at + c.service_time for c in customers]
+    return waits, departures
+
+class TestFifoKernel:
+
+    def test_preconditions(self):
+        """
+        `test_preconditions()`
+        Tests that malformed inputs are rejected
+        """
+        with pytest.raises(AssertionError):
+            fifo_kernel([0, 1], [1], 1)
+        with pytest.raises(AssertionError):
+            fifo_kernel([1, 0], [1, 1], 1)
+        with pytest.raises(AssertionError):
+            fifo_kernel([0, 1], [1, -1], 1)
+        with pytest.raises(AssertionError):
+            fifo_kernel([0, 1], [1, 1], 0)
+    
+    def test_square_wave(self):
+        """
+        `test_square_wave()`
+        Tests the README scenario: 10 customers a tick for 10 ticks
+        """
+        a = np.repeat(np.arange(10), 10)
+        s = np.ones(100, dtype=int)
+        for n_tellers, expected in [(1, 45.0), (2, 20.0), (10, 0.0)]:
+            waits, departures = fifo_kernel(a, s, n_tellers)
+            assert waits.mean() == expected
+            assert waits.dtype == a.dtype
+    
+    def test_matches_object_model(self):
+        """
+        `test_matches_object_model()`
+        Tests random small scenarios against the Bank/Simulation object model
+        """
+        rng = random.Random(7)
+        for _ in range(50):
+            n = rng.randint(1, 40)
+            n_tellers = rng.randint(1, 6)
+            a = sorted(rng.uniform(0, 20) for _ in range(n))
+            s = [rng.expovariate(1.0 / n_tellers) for _ in range(n)]
+            
+            waits, departures = fifo_kernel(a, s, n_tellers)
+            expected_waits, expected_departures = simulate(a, s, n_tellers)
+            assert waits == pytest.approx(expected_waits)
+            assert departures == pytest.approx(expected_departures)
+    
+    def test_batched_rows(self):
+        """
+        `test_batched_rows()`
+        Tests that 2-D inputs give the same answer as each row on its own
+        """
+        rng = np.random.RandomState(3)
+        a = np.sort(rng.uniform(0, 50, size=(8, 60)), axis=1)
+        s = rng.exponential(2.0, size=(8, 60))
+        for n_tellers in [1, 2, 5]:
+            waits, departures = fifo_kernel(a, s, n_tellers)
+            for row in range(a.shape[0]):
+                w, d = fifo_kernel(a[row], s[row], n_tellers)
+                assert np.allclose(waits[row], w)
+                assert np.allclose(departures[row], d)
+        
+        # [ case : integer rows, with tellers often freeing up together ]
+        a = np.repeat(np.arange(10), 10)
+        rows = np.stack([a, a, a // 2 * 2])
+        s = np.stack([np.ones(100, dtype=int), np.arange(100) % 3, np.full(100, 2)])
+        for n_tellers in [2, 3]:
+            waits, departures = fifo_kernel(rows, s, n_tellers)
+            assert waits.dtype == rows.dtype
+            for row in range(3):
+                w, d = fifo_kernel(rows[row], s[row], n_tellers)
+                assert (waits[row] == w).all() and (departures[row] == d).all()
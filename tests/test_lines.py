@@ -0,0 +1,184 @@
+"""
+`test_lines.py`
+Tests the bank with one line per teller
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import random
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.customer import Customer
+from banksim.lines import LoadIndex, Lines, MultiLineBank, SHORTEST, RANDOM, TWO_CHOICES
+from banksim.reception_queue import LIFO
+from banksim.scenario import Scenario
+from banksim.snapshot import snapshot, restore
+
+def customers(n, service_time=1):
+    return [Customer(str(i).zfill(3), service_time=service_time, customer_id=i)
+        for i in range(n)]
+
+class TestLines:
+
+    def test_load_index(self):
+        """
+        `test_load_index()`
+        Tests the tournament tree against a linear scan, ties going to the
+        lowest window
+        """
+        rng = random.Random(1)
+        for n in [1, 2, 5, 8, 33]:
+            index = LoadIndex([0] * n)
+            values = [0] * n
+            for _ in range(500):
+                i = rng.randrange(n)
+                d = rng.choice([-1, 1, 2])
+                index.add(i, d)
+                values[i] += d
+                assert index.shortest() == values.index(min(values))
+                assert index.longest() == values.index(max(values))
+        assert LoadIndex([3, 1, 1, 3]).shortest() == 1
+        assert LoadIndex([3, 1, 1, 3]).longest() == 0
+
+    def test_lines(self):
+        """
+        `test_lines()`
+        Tests that Lines counts everyone waiting across its lines
+        """
+        lines = Lines(3)
+        cs = customers(4)
+        for i, c in enumerate(cs):
+            lines.insert_customer(c, i % 3)
+        assert len(lines) == 4
+        assert lines.get_next_customer(0) == cs[0]
+        assert lines.get_last_customer(0) == cs[3]
+        assert len(lines) == 2
+        assert lines.resize(2) == [cs[2]]
+        assert len(lines) == 1
+        assert lines.resize(4) == []
+        assert len(lines.lines) == 4
+        lines.set_discipline(LIFO)
+        assert all(line.discipline == LIFO for line in lines.lines)
+
+    def test_shortest(self):
+        """
+        `test_shortest()`
+        Tests that customers join the window with the fewest customers, and
+        that each teller only serves their own line
+        """
+        bank = MultiLineBank(3)
+        bank.open()
+        cs = customers(5)
+        for c in cs:
+            bank.receive_customer(c)
+        assert [len(line) for line in bank.customers.lines] == [2, 2, 1]
+        
+        served = []
+        while bank.can_serve():
+            served.append(bank.serve_next())
+        assert [(t.employee_id, c) for t, c in served] == [(0, cs[0]), (1, cs[1]), (2, cs[2])]
+        assert len(bank.customers) == 2
+        assert not bank.has_free_teller()
+        
+        # [ case : windows count the customer being served ]
+        bank.receive_customer(Customer('new', service_time=1))
+        assert [len(line) for line in bank.customers.lines] == [1, 1, 1]
+
+    def test_random_policies(self):
+        """
+        `test_random_policies()`
+        Tests that random choices use every window and that two choices pick
+        the less loaded of the pair
+        """
+        bank = MultiLineBank(4, policy=RANDOM, rng=random.Random(3))
+        bank.open()
+        for c in customers(200):
+            bank.receive_customer(c)
+        assert all(len(line) > 20 for line in bank.customers.lines)
+        
+        bank = MultiLineBank(4, policy=TWO_CHOICES, rng=random.Random(3))
+        bank.open()
+        for c in customers(200):
+            bank.receive_customer(c)
+        lengths = [len(line) for line in bank.customers.lines]
+        assert max(lengths) - min(lengths) <= 2
+
+    def test_jockeying(self):
+        """
+        `test_jockeying()`
+        Tests that the customer at the back of a long line moves to a window
+        that frees up
+        """
+        bank = MultiLineBank(2, policy=RANDOM, jockey=True, rng=random.Random(0))
+        bank.open()
+        cs = customers(6)
+        for c in cs:
+            bank.receive_customer(c)
+            lengths = list(bank.load.values)
+            assert max(lengths) - min(lengths) < 2
+        
+        bank = MultiLineBank(2, jockey=True)
+        bank.open()
+        bank.receive_customer(Customer('long', service_time=10))
+        bank.receive_customer(Customer('short', service_time=1))
+        for c in cs[:2]:
+            bank.receive_customer(c)
+        for t in range(2):
+            while bank.can_serve():
+                bank.serve_next()
+            bank.tick(1)
+            bank.update()
+        
+        # [ case : window 1 is two customers behind window 0 once it empties ]
+        assert bank.jockeyed == 1
+        assert [len(line) for line in bank.customers.lines] == [0, 1]
+        assert bank.can_serve()
+        assert bank.serve_next() == (bank.tellers[1], cs[0])
+
+    def test_set_tellers(self):
+        """
+        `test_set_tellers()`
+        Tests that customers in closed lines choose a line again
+        """
+        bank = MultiLineBank(3)
+        bank.open()
+        for c in customers(9):
+            bank.receive_customer(c)
+        bank.set_tellers(2)
+        assert len(bank.customers) == 9
+        assert [len(line) for line in bank.customers.lines] == [5, 4]
+        bank.set_tellers(4)
+        assert [len(line) for line in bank.customers.lines] == [5, 4, 0, 0]
+        assert bank.load.shortest() == 2
+
+    def test_simulation(self):
+        """
+        `test_simulation()`
+        Tests full runs: everyone is served, one window behaves like one
+        shared line, and the shortest line beats a random one
+        """
+        scenario = Scenario(3000, 4, arrival_rate=3.6, service_rate=1.0)
+        for policy in [SHORTEST, RANDOM, TWO_CHOICES]:
+            for jockey in [False, True]:
+                sim = scenario.replace(lines=policy, jockey=jockey).run(5)
+                assert sim.served == 3000
+                assert len(sim.bank.customers) == 0
+        
+        one = Scenario(1000, 1, arrival_rate=0.9, service_rate=1.0)
+        assert one.replace(lines=RANDOM).run(2).waits is None
+        assert one.replace(lines=RANDOM).run(2, record_waits=True).waits == \
+            one.run(2, record_waits=True).waits
+        
+        wait = lambda policy: scenario.replace(lines=policy).run(5).average_wait_time()
+        assert wait(SHORTEST) < wait(RANDOM)
+        
+        # [ case : routing draws are repeatable and survive a snapshot ]
+        routed = scenario.replace(lines=TWO_CHOICES)
+        sim = routed.build(7, record_waits=True).run(until=400)
+        resumed = restore(snapshot(sim)).run()
+        assert resumed.waits == routed.run(7, record_waits=True).waits
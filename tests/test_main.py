@@ -0,0 +1,103 @@
+"""
+`test_main.py`
+Tests the command line
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+import re
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+import main
+
+def run(monkeypatch, capsys, *argv):
+    """
+    Runs main.py with the given arguments, without the result cache, and
+    returns what it printed
+    """
+    monkeypatch.setattr(sys, 'argv', ['main.py', '--no-cache'] + list(argv))
+    main.main()
+    return capsys.readouterr().out
+
+def average_wait(out):
+    return float(re.search(r"average wait time per customer\s+= (\S+)", out).group(1))
+
+class TestCommandLine:
+
+    def test_shifts(self, monkeypatch, capsys):
+        """
+        `test_shifts()`
+        Tests that --shifts takes effect under both engines
+        """
+        base = ['300', '-t', '1', '--arrival-rate', '1.8', '--service-rate', '1']
+        for engine in [['-e'], []]:
+            alone = average_wait(run(monkeypatch, capsys, *base + engine))
+            hired = average_wait(run(monkeypatch, capsys, *base + engine + ['--shifts', '20:3']))
+            # [ case : one teller falls far behind; two more at t = 20 catch up ]
+            assert hired < alone / 5
+    
+    def test_what_if_rate(self, monkeypatch, capsys):
+        """
+        `test_what_if_rate()`
+        Tests that rate= branches run for every arrival process
+        """
+        for process in [['--ticks', '100'], ['-a', 'constant', '--arrival-rate', '1'],
+                ['-a', 'poisson', '--arrival-rate', '1'],
+                ['-a', 'nhpp', '--rate-schedule', '0:1,30:2'],
+                ['-a', 'batch', '--arrival-rate', '0.5', '--batch-size', '2']]:
+            out = run(monkeypatch, capsys, '200', '-t', '2', '-e', '--what-if', '20',
+                '--branch', 'rate=3', '--branch', 'rate=0.5', *process)
+            waits = dict(re.findall(r"^(as is|rate=\S+)\s+average wait = (\S+)", out, re.M))
+            assert list(waits) == ['as is', 'rate=3', 'rate=0.5']
+            # [ case : more arrivals never shorten the line ]
+            assert float(waits['rate=3']) >= float(waits['rate=0.5'])
+    
+    def test_what_if_skills(self, monkeypatch, capsys):
+        """
+        `test_what_if_skills()`
+        Tests that tellers= branches are refused for skill-based staff
+        """
+        with pytest.raises(SystemExit):
+            run(monkeypatch, capsys, '50', '-e', '--skills', '1:other;1:other',
+                '--what-if', '10', '--branch', 'tellers=4')
+        assert 'staffs tellers by skill group' in capsys.readouterr().err
+    
+    def test_rate_schedule_ends_at_zero(self, monkeypatch, capsys):
+        """
+        `test_rate_schedule_ends_at_zero()`
+        Tests that a schedule after which nobody arrives is refused
+        """
+        with pytest.raises(SystemExit):
+            run(monkeypatch, capsys, '200', '-e', '-a', 'nhpp', '--rate-schedule', '0:1,60:0')
+        assert 'must end with a positive rate' in capsys.readouterr().err
+    
+    def test_bounded_memory(self, monkeypatch, capsys, tmp_path):
+        """
+        `test_bounded_memory()`
+        Tests that --bounded-memory refuses --compact and --trace, for their
+        own reasons
+        """
+        with pytest.raises(SystemExit):
+            run(monkeypatch, capsys, '50', '-e', '--bounded-memory', '--compact')
+        assert 'builds every customer up front' in capsys.readouterr().err
+        with pytest.raises(SystemExit):
+            run(monkeypatch, capsys, '50', '-e', '--bounded-memory', '--trace',
+                str(tmp_path / 'trace.bin'))
+        assert 'mapped pages count towards resident memory' in capsys.readouterr().err
+    
+    def test_report_time(self, monkeypatch, capsys):
+        """
+        `test_report_time()`
+        Tests that only the tick loop reports time steps; the event engine
+        reports when the last service started
+        """
+        ticks = run(monkeypatch, capsys, '100')
+        events = run(monkeypatch, capsys, '100', '-e')
+        assert "total number of unit time steps  = 99" in ticks
+        assert "unit time steps" not in events
+        assert "time the last service started    = 99" in events
@@ -0,0 +1,70 @@
+"""
+`test_memory.py`
+Tests that long runs keep memory proportional to the customers in the bank
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+import re
+import resource
+import subprocess
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.bank import Bank
+from banksim.customer import Customer
+
+# customers in the long run; set BANKSIM_MEMORY_CUSTOMERS=100000000 for the
+# full 10^8-customer check (about an hour)
+CUSTOMERS = int(float(os.environ.get('BANKSIM_MEMORY_CUSTOMERS', 2 * 10 ** 5)))
+# no run may map more than this, so a leak fails fast instead of swapping
+CEILING = 512 * 1024 * 1024
+
+def peak_memory(n, *options):
+    """
+    Runs main.py in bounded-memory mode under the address space ceiling and
+    returns the peak resident memory it reports, in MB
+    """
+    def limit():
+        resource.setrlimit(resource.RLIMIT_AS, (CEILING, CEILING))
+    out = subprocess.run([sys.executable, 'main.py', str(n), '-t', '2', '-e',
+        '--arrival-rate', '1.8', '--service-rate', '1', '--bounded-memory',
+        '--no-cache'] + list(options), stdout=subprocess.PIPE,
+        universal_newlines=True, preexec_fn=limit, check=True).stdout
+    return float(re.search(r"peak resident memory \(MB\)\s+= (\S+)", out).group(1))
+
+class TestMemory:
+
+    def test_flat(self):
+        """
+        `test_flat()`
+        Tests that a long stable run peaks no higher than a short one
+        """
+        small = peak_memory(10 ** 4)
+        assert peak_memory(CUSTOMERS) < small + 8
+    
+    def test_flat_with_reneging(self):
+        """
+        `test_flat_with_reneging()`
+        Tests that customers who give up are not kept either
+        """
+        small = peak_memory(10 ** 4, '--patience', '1000')
+        assert peak_memory(CUSTOMERS, '--patience', '1000') < small + 8
+    
+    def test_deadlines_swept(self):
+        """
+        `test_deadlines_swept()`
+        Tests that deadlines of customers served in time do not pile up
+        """
+        bank = Bank(1)
+        bank.open()
+        for i in range(10000):
+            bank.receive_customer(Customer(str(i).zfill(3), patience=1e9))
+            bank.serve_next()
+            bank.tick()
+            bank.update()
+        assert len(bank.deadlines) <= 32 + 1
@@ -0,0 +1,164 @@
+"""
+`test_priority.py`
+Tests the priority classes derived from visit purposes
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.customer import Customer
+from banksim.engine import Simulation
+from banksim.priority import ClassQueue, PriorityBank
+from banksim.scenario import Scenario
+from banksim.snapshot import snapshot, restore
+
+CLASSES = [['business'], ['deposit', 'withdrawal'], ['other']]
+MIX = [('business', 1), ('deposit', 2), ('withdrawal', 1), ('other', 4)]
+
+def visitor(i, purpose, arrived_at=0, service_time=1):
+    cust = Customer(str(i).zfill(3), visit_purpose=purpose,
+        service_time=service_time, customer_id=i)
+    cust.arrived_at = arrived_at
+    return cust
+
+class TestPriority:
+
+    def test_class_queue(self):
+        """
+        `test_class_queue()`
+        Tests that classes are served best first and each class in order
+        """
+        q = ClassQueue(CLASSES)
+        cs = [visitor(i, p) for i, p in enumerate(
+            ['other', 'deposit', 'business', 'withdrawal', 'loan', 'business'])]
+        for c in cs:
+            q.insert_customer(c)
+        assert len(q) == 6
+        assert q.class_of(cs[4]) == 2
+        
+        # [ case : the back of the worst class leaves first ]
+        assert q.get_last_customer() == cs[4]
+        assert [q.get_next_customer() for _ in range(5)] == [cs[2], cs[5], cs[1], cs[3], cs[0]]
+        assert len(q) == 0
+        with pytest.raises(IndexError):
+            q.get_next_customer()
+        
+        # [ case : a requeued customer goes to the front of their class ]
+        q.insert_customer(cs[1])
+        q.requeue(cs[3])
+        assert q.get_next_customer() == cs[3]
+
+    def test_aging(self):
+        """
+        `test_aging()`
+        Tests that customers who have waited long enough overtake better
+        classes
+        """
+        q = ClassQueue(CLASSES, aging=10)
+        old = visitor(0, 'other', arrived_at=0)
+        new = visitor(1, 'business', arrived_at=25)
+        mid = visitor(2, 'deposit', arrived_at=12)
+        for c in [old, new, mid]:
+            q.insert_customer(c)
+        assert q.rank(old) == 20
+        assert [q.get_next_customer() for _ in range(3)] == [old, mid, new]
+        
+        with pytest.raises(AssertionError):
+            ClassQueue(CLASSES, aging=0)
+
+    def test_preemption(self):
+        """
+        `test_preemption()`
+        Tests that a better class interrupts a worse one, which later
+        finishes the service it had left
+        """
+        bank = PriorityBank(1, CLASSES, preemptive=True)
+        bank.open()
+        slow = visitor(0, 'other', service_time=10)
+        bank.receive_customer(slow)
+        assert bank.serve_next() == (bank.tellers[0], slow)
+        
+        bank.tick(4)
+        vip = visitor(1, 'business', service_time=2)
+        bank.receive_customer(vip)
+        assert bank.has_free_teller()
+        assert bank.serve_next() == (bank.tellers[0], vip)
+        assert slow.preemptions == 1
+        assert slow.service_time == 6
+        assert bank.preempted == [0, 0, 1]
+        
+        # [ case : an equal class does not interrupt ]
+        bank.receive_customer(visitor(2, 'business'))
+        assert not bank.has_free_teller()
+        
+        bank.tick(2)
+        bank.update()
+        assert bank.serve_next()[1].customer_id == 2
+        bank.tick(1)
+        bank.update()
+        assert bank.serve_next()[1] == slow
+        assert slow.wait_time() == 0
+        assert bank.interrupted == [0, 0, 3]
+        
+        # [ case : the interrupted service's entry is skipped, not searched for ]
+        assert sorted(bank.busy) == [(10, 0), (13, 0)]
+        assert bank.utilization() == 1
+        bank.tick(3)
+        bank.update()
+        assert bank.busy == [(13, 0)] and not bank.has_free_teller()
+        bank.tick(3)
+        bank.update()
+        assert bank.free == [0] and bank.busy == []
+        
+        # [ case : a teller finishing as a better class arrives is used first ]
+        bank = PriorityBank(2, CLASSES, preemptive=True)
+        bank.open()
+        for i, s in enumerate([1, 5]):
+            bank.receive_customer(visitor(i, 'other', service_time=s))
+            bank.serve_next()
+        bank.tick(1)
+        bank.receive_customer(visitor(2, 'business'))
+        assert bank.preempted == [0, 0, 0]
+        assert bank.serve_next()[0] is bank.tellers[0]
+
+    def test_simulation(self):
+        """
+        `test_simulation()`
+        Tests full runs: everyone is served once, classes are reported
+        separately, and one teller finishes at the same time however
+        customers are ordered, as no work is lost to preemption
+        """
+        base = Scenario(4000, 1, arrival_rate=0.85, service_rate=1.0, purpose_mix=MIX)
+        plain = base.run(3)
+        ends = {plain.bank.clock}
+        for kw in [{}, {'preemptive': True}, {'aging': 5}, {'preemptive': True, 'aging': 5}]:
+            sim = base.replace(classes=CLASSES, **kw).run(3)
+            assert sim.served == 4000
+            ends.add(sim.bank.clock)
+            metrics = sim.bank.class_metrics()
+            assert list(metrics) == ['business', 'deposit,withdrawal', 'other']
+            assert sum(m['n'] for m in metrics.values()) == 4000
+            assert sum(m['mean'] * m['n'] for m in metrics.values()) == \
+                pytest.approx(sim.wait_time)
+            assert (sum(m['preempted'] for m in metrics.values()) > 0) == bool(kw.get('preemptive'))
+            if not kw:
+                assert metrics['business']['mean'] < metrics['other']['mean']
+        assert len(ends) == 1
+        
+        # [ case : a paused preemptive run resumes exactly ]
+        scenario = base.replace(n_tellers=2, arrival_rate=1.8, classes=CLASSES, preemptive=True)
+        sim = scenario.build(4, record_waits=True).run(until=500)
+        resumed = restore(snapshot(sim)).run()
+        assert resumed.waits == scenario.run(4, record_waits=True).waits
+        assert resumed.bank.preempted == scenario.run(4).bank.preempted
+        
+        with pytest.raises(AssertionError):
+            Scenario(10, classes=CLASSES, lines='shortest')
+        with pytest.raises(AssertionError):
+            Scenario(10, preemptive=True)
@@ -7,6 +7,7 @@ Written by Joshua Paul A. Chan
 
 import pytest
 import sys, os
+from collections import deque
 
 # Fix paths (thanks, @aruisdante)
 # [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
@@ -14,6 +15,7 @@ sys.path.append(os.path.abspath(os.path.join('.')))
 
 from banksim.customer import Customer
 from banksim.reception_queue import ReceptionQueue as rq
+from banksim.reception_queue import FIFO, LIFO, PRIORITY, SJF
 
 class TestReceptionQueue:
     
@@ -27,7 +29,7 @@ class TestReceptionQueue:
         
         # [ case : customer list must exist ]
         assert hasattr(q, 'customers')
-        assert type(q.customers) == list
+        assert type(q.customers) == deque
         
         # [ case : insert_customer must be defined ]
         assert hasattr(q, 'insert_customer')
@@ -102,4 +104,136 @@ class TestReceptionQueueRetrieveCustomer:
         b = q.get_next_customer()
         assert b == c
         assert len(q) == old_len
+
+class TestReceptionQueueDisciplines:
+    
+    def test_invalid_discipline(self):
+        """
+        `test_invalid_discipline()`
+        Tests that only known queue disciplines are accepted
+        """
+        for val in ['random', '', None, 1]:
+            with pytest.raises(AssertionError):
+                rq(val)
+    
+    def test_fifo(self):
+        """
+        `test_fifo()`
+        Tests that the default discipline serves customers first-in, first-out
+        """
+        q = rq()
+        assert q.discipline == FIFO
+        cs = [Customer(str(i).zfill(3)) for i in range(5)]
+        for c in cs: q.insert_customer(c)
+        assert list(q) == cs
+        assert [q.get_next_customer() for _ in cs] == cs
+    
+    def test_lifo(self):
+        """
+        `test_lifo()`
+        Tests that a LIFO queue serves the most recent customer first
+        """
+        q = rq(LIFO)
+        cs = [Customer(str(i).zfill(3)) for i in range(5)]
+        for c in cs: q.insert_customer(c)
+        assert len(q) == 5
+        assert set(q) == set(cs)
+        assert [q.get_next_customer() for _ in cs] == cs[::-1]
+        with pytest.raises(IndexError):
+            q.get_next_customer()
+    
+    def test_priority(self):
+        """
+        `test_priority()`
+        Tests that a priority queue serves the lowest priority value first,
+        breaking ties by arrival order
+        """
+        q = rq(PRIORITY)
+        cs = [Customer(str(i).zfill(3), priority=p) for i, p in enumerate([2, 0, 1, 0])]
+        for c in cs: q.insert_customer(c)
+        assert [q.get_next_customer() for _ in cs] == [cs[1], cs[3], cs[2], cs[0]]
+    
+    def test_sjf(self):
+        """
+        `test_sjf()`
+        Tests that a shortest-job-first queue serves the shortest service time
+        first
+        """
+        q = rq(SJF)
+        cs = [Customer(str(i).zfill(3), service_time=s) for i, s in enumerate([3, 1, 2.5, 1])]
+        for c in cs: q.insert_customer(c)
+        assert [q.get_next_customer() for _ in cs] == [cs[1], cs[3], cs[2], cs[0]]
+    
+    def test_set_discipline(self):
+        """
+        `test_set_discipline()`
+        Tests that switching discipline keeps the order customers joined in
+        """
+        cs = [Customer(str(i).zfill(3), priority=p) for i, p in enumerate([2, 1, 2, 1])]
+        for start in [FIFO, LIFO, PRIORITY, SJF]:
+            q = rq(start)
+            for c in cs: q.insert_customer(c)
+            q.set_discipline(FIFO)
+            assert list(q) == cs
+            q.set_discipline(PRIORITY)
+            assert [q.get_next_customer() for _ in cs] == [cs[1], cs[3], cs[0], cs[2]]
+    
+    def test_get_last_customer(self):
+        """
+        `test_get_last_customer()`
+        Tests that the customer taken from the back is the one that would
+        have been served last
+        """
+        cs = [Customer(str(i).zfill(3), priority=p, service_time=s)
+            for i, (p, s) in enumerate([(2, 3), (1, 1), (2, 2), (0, 4)])]
+        for d, last in [(FIFO, cs[3]), (LIFO, cs[0]), (PRIORITY, cs[2]), (SJF, cs[3])]:
+            q = rq(d)
+            for c in cs: q.insert_customer(c)
+            assert q.get_last_customer() == last
+            assert len(q) == 3
+            assert last not in [q.get_next_customer() for _ in range(3)]
+            with pytest.raises(IndexError):
+                q.get_last_customer()
+    
+    def test_withdraw_customer(self):
+        """
+        `test_withdraw_customer()`
+        Tests that customers who left the line are skipped without being
+        searched for
+        """
+        for d in [FIFO, SJF]:
+            cs = [Customer(str(i).zfill(3), service_time=i) for i in range(5)]
+            q = rq(d)
+            for c in cs: q.insert_customer(c)
+            q.withdraw_customer(cs[0], 1.5)
+            q.withdraw_customer(cs[3], 2)
+            
+            # [ case : leavers are no longer counted, listed or served ]
+            assert cs[0].left_at == 1.5
+            assert len(q) == 3
+            assert sorted(c.name for c in q) == ['001', '002', '004']
+            assert q.get_next_customer() == cs[1]
+            assert q.get_last_customer() == cs[4]
+            assert q.get_next_customer() == cs[2]
+            assert len(q) == 0
+            with pytest.raises(IndexError):
+                q.get_next_customer()
+        
+        # [ case : a new discipline drops the leavers ]
+        cs = [Customer(str(i).zfill(3)) for i in range(3)]
+        q = rq(FIFO)
+        for c in cs: q.insert_customer(c)
+        q.withdraw_customer(cs[1], 0)
+        q.set_discipline(LIFO)
+        assert len(q) == 2
+        assert [q.get_next_customer() for _ in range(2)] == [cs[2], cs[0]]
         
+        # [ case : leavers are swept out once they outnumber those waiting ]
+        for d in [FIFO, SJF]:
+            cs = [Customer(str(i).zfill(3), service_time=i) for i in range(100)]
+            q = rq(d)
+            for c in cs: q.insert_customer(c)
+            for c in cs[1:]: q.withdraw_customer(c, 0)
+            assert len(q) == 1
+            assert len(q.customers) + len(q._heap) < 40
+            assert q.get_next_customer() == cs[0]
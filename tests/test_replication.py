@@ -0,0 +1,119 @@
+"""
+`test_replication.py`
+Tests the seeded replication runner
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.scenario import Scenario
+from banksim.replication import replication_seeds, run_replications, run_paired, t_quantile, normal_quantile, ReplicationSummary
+
+class TestReplication:
+
+    def test_seeds(self):
+        """
+        `test_seeds()`
+        Tests that replication seeds only depend on the master seed
+        """
+        assert replication_seeds(1, 5) == replication_seeds(1, 5)
+        assert replication_seeds(1, 5)[:3] == replication_seeds(1, 3)
+        assert replication_seeds(1, 5) != replication_seeds(2, 5)
+        assert len(set(replication_seeds(1, 100))) == 100
+    
+    def test_t_quantile(self):
+        """
+        `test_t_quantile()`
+        Tests the Student's t approximation against tabulated values
+        """
+        assert t_quantile(0.975, 10) == pytest.approx(2.228, abs=2e-3)
+        assert t_quantile(0.975, 30) == pytest.approx(2.042, abs=1e-3)
+        assert t_quantile(0.95, 1000) == pytest.approx(1.646, abs=1e-3)
+        
+        # [ case : few replications, where the approximation fell short ]
+        assert t_quantile(0.975, 1) == pytest.approx(12.7062, abs=1e-4)
+        assert t_quantile(0.975, 2) == pytest.approx(4.3027, abs=1e-4)
+        assert t_quantile(0.975, 3) == pytest.approx(3.1824, abs=1e-4)
+        assert t_quantile(0.995, 3) == pytest.approx(5.8409, abs=1e-4)
+        assert t_quantile(0.025, 1) == pytest.approx(-12.7062, abs=1e-4)
+        assert t_quantile(0.5, 4) == 0
+    
+    def test_normal_quantile(self):
+        """
+        `test_normal_quantile()`
+        Tests the normal quantile in the centre and both tails
+        """
+        assert normal_quantile(0.5) == 0
+        assert normal_quantile(0.975) == pytest.approx(1.959963984540054, abs=1e-12)
+        assert normal_quantile(0.025) == pytest.approx(-1.959963984540054, abs=1e-12)
+        assert normal_quantile(0.995) == pytest.approx(2.5758293035489, abs=1e-12)
+        assert normal_quantile(1e-10) == pytest.approx(-6.361340902404056, abs=1e-9)
+        with pytest.raises(AssertionError):
+            normal_quantile(1)
+    
+    def test_summary(self):
+        """
+        `test_summary()`
+        Tests the mean, variance and interval of a summary
+        """
+        s = ReplicationSummary([1.0, 2.0, 3.0, 4.0])
+        assert s.mean == 2.5
+        assert s.variance == pytest.approx(5.0 / 3)
+        assert s.ci[0] < 2.5 < s.ci[1]
+        assert s.half_width() == pytest.approx(3.182 * (5.0 / 12) ** 0.5, rel=1e-2)
+    
+    def test_deterministic_scenario(self):
+        """
+        `test_deterministic_scenario()`
+        Tests that the README scenario has no spread between replications
+        """
+        s = run_replications(Scenario(100, 2), 3, workers=1)
+        assert s.samples == [20.0, 20.0, 20.0]
+        assert s.variance == 0
+    
+    def test_reproducible_across_workers(self):
+        """
+        `test_reproducible_across_workers()`
+        Tests that results depend on the master seed, not the worker count
+        """
+        scenario = Scenario(200, 2, arrival_rate=1.6, service_rate=1.0)
+        a = run_replications(scenario, 6, seed=42, workers=1)
+        b = run_replications(scenario, 6, seed=42, workers=2)
+        c = run_replications(scenario, 6, seed=43, workers=1)
+        assert a.samples == b.samples
+        assert a.samples != c.samples
+        assert a.ci[0] <= a.mean <= a.ci[1]
+    
+    def test_antithetic(self):
+        """
+        `test_antithetic()`
+        Tests that antithetic pairs count as one sample each
+        """
+        scenario = Scenario(200, 2, arrival_rate=1.6, service_rate=1.0)
+        s = run_replications(scenario, 4, seed=1, workers=1, antithetic=True)
+        assert s.n == 4
+        plain = scenario.run(replication_seeds(1, 1)[0]).average_wait_time()
+        mirrored = scenario.run(replication_seeds(1, 1)[0], antithetic=True).average_wait_time()
+        assert s.samples[0] == pytest.approx((plain + mirrored) / 2)
+    
+    def test_paired(self):
+        """
+        `test_paired()`
+        Tests that pairing replications narrows the interval on a difference
+        """
+        a = Scenario(1000, 4, arrival_rate=3.6, service_rate=1.0)
+        b = a.replace(n_tellers=5)
+        diff, sa, sb = run_paired(a, b, 10, seed=3, workers=1)
+        assert diff.samples == [y - x for x, y in zip(sa.samples, sb.samples)]
+        assert diff.mean < 0
+        
+        # [ case : unpaired seeds leave the difference noisier ]
+        unpaired = run_replications(b, 10, seed=4, workers=1)
+        independent = [y - x for x, y in zip(sa.samples, unpaired.samples)]
+        assert diff.variance < ReplicationSummary(independent).variance
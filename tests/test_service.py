@@ -0,0 +1,119 @@
+"""
+`test_service.py`
+Tests the service time distributions
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import pickle
+import random
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.scenario import Scenario
+from banksim.service import Deterministic, Exponential, LogNormal, Empirical, ByPurpose
+
+def sample_mean(dist, n=20000, purpose=None):
+    rng = random.Random(11)
+    return sum(dist.draw(rng, purpose) for _ in range(n)) / n
+
+class TestServiceTime:
+
+    def test_preconditions(self):
+        """
+        `test_preconditions()`
+        Tests that invalid parameters are rejected
+        """
+        for make in [lambda: Deterministic(-1), lambda: Exponential(0),
+                     lambda: LogNormal(0, 1), lambda: Empirical([]),
+                     lambda: Empirical([1, -1]), lambda: ByPurpose({'loan': 5})]:
+            with pytest.raises(AssertionError):
+                make()
+    
+    def test_means(self):
+        """
+        `test_means()`
+        Tests that draws average out to each distribution's mean
+        """
+        assert sample_mean(Deterministic(3)) == 3
+        for dist in [Exponential(0.5), LogNormal(2, 3), Empirical([1, 1, 2, 8])]:
+            assert sample_mean(dist) == pytest.approx(dist.mean(), rel=0.1)
+        
+        # [ case : lognormal is parameterized by its own mean and sd ]
+        rng = random.Random(2)
+        draws = [LogNormal(4, 1).draw(rng) for _ in range(20000)]
+        m = sum(draws) / len(draws)
+        sd = (sum((x - m) ** 2 for x in draws) / len(draws)) ** 0.5
+        assert sd == pytest.approx(1, rel=0.1)
+    
+    def test_by_purpose(self):
+        """
+        `test_by_purpose()`
+        Tests that the distribution used depends on the visit purpose
+        """
+        dist = ByPurpose({'deposit': Deterministic(1), 'loan': Deterministic(10)})
+        rng = random.Random(0)
+        assert dist.draw(rng, 'loan') == 10
+        assert dist.draw(rng, 'deposit') == 1
+        assert dist.draw(rng, 'other') == 1
+        assert dist.mixed_mean({'deposit': 3, 'loan': 1}) == pytest.approx(3.25)
+        
+        # [ case : the mean weighs purposes equally unless told otherwise ]
+        assert dist.mean() == pytest.approx(5.5)
+        weighted = ByPurpose(dist.by_purpose, weights={'deposit': 3, 'loan': 1})
+        assert weighted.mean() == pytest.approx(3.25)
+        assert weighted != dist
+        assert ByPurpose({}, Exponential(2)).mean() == pytest.approx(0.5)
+    
+    def test_equality(self):
+        """
+        `test_equality()`
+        Tests that distributions compare and pickle by value
+        """
+        assert Exponential(2) == Exponential(2)
+        assert Exponential(2) != Exponential(3)
+        assert Exponential(1) != Deterministic(1)
+        assert hash(LogNormal(2, 1)) == hash(LogNormal(2, 1))
+        d = ByPurpose({'loan': Empirical([5, 9])})
+        assert pickle.loads(pickle.dumps(d)) == d
+
+class TestScenarioService:
+
+    def test_service_rate_compat(self):
+        """
+        `test_service_rate_compat()`
+        Tests that service_rate and service_time still build a distribution
+        """
+        assert Scenario(10).service == Deterministic(1)
+        assert Scenario(10, service_rate=2).service == Exponential(2)
+        assert Scenario(10, service_rate=2).replace(service_rate=4).service == Exponential(4)
+    
+    def test_multi_tick_service(self):
+        """
+        `test_multi_tick_service()`
+        Tests that longer services hold tellers for longer
+        """
+        one = Scenario(100, 2).run().average_wait_time()
+        three = Scenario(100, 2, service=Deterministic(3)).run().average_wait_time()
+        assert three > one
+        
+        # [ case : 10 customers every tick needs 30 tellers at 3 ticks each ]
+        assert Scenario(100, 30, service=Deterministic(3)).run().average_wait_time() == 0
+    
+    def test_purpose_mix(self):
+        """
+        `test_purpose_mix()`
+        Tests that purposes are drawn from the mix and set service times
+        """
+        dist = ByPurpose({'deposit': Deterministic(1), 'loan': Deterministic(10)})
+        scenario = Scenario(2000, 5, arrival_rate=1, service=dist,
+            purpose_mix=[('deposit', 3), ('loan', 1)])
+        customers = [c for _, c in scenario.arrivals(random.Random(4))]
+        loans = [c for c in customers if c.visit_purpose == 'loan']
+        assert len(loans) == pytest.approx(500, rel=0.15)
+        assert all(c.service_time == 10 for c in loans)
+        assert all(c.service_time == 1 for c in customers if c.visit_purpose == 'deposit')
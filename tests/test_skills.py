@@ -0,0 +1,202 @@
+"""
+`test_skills.py`
+Tests skill-based routing of customers to tellers
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import random
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.customer import Customer
+from banksim.scenario import Scenario
+from banksim.skills import SkillQueue, SkillBank, staff_skills
+from banksim.whatif import branch
+
+STAFF = [(1, ['loan']), (2, ['deposit', 'withdrawal']), (1, ['deposit', 'withdrawal', 'loan'])]
+
+def visitor(i, purpose, service_time=1):
+    return Customer(str(i).zfill(3), visit_purpose=purpose,
+        service_time=service_time, customer_id=i)
+
+class TestSkills:
+
+    def test_skill_queue(self):
+        """
+        `test_skill_queue()`
+        Tests that the longest-waiting customer among some purposes is next
+        """
+        q = SkillQueue(['deposit', 'loan', 'withdrawal'])
+        cs = [visitor(i, p) for i, p in enumerate(['loan', 'deposit', 'withdrawal', 'loan'])]
+        for t, c in enumerate(cs):
+            c.arrived_at = t
+            q.insert_customer(c)
+        assert q.waiting == 0b111
+        assert q.get_next_customer(0b101) == cs[1]
+        assert q.get_next_customer() == cs[0]
+        assert q.get_next_customer(0b010) == cs[3]
+        assert q.waiting == 0b100
+        with pytest.raises(IndexError):
+            q.get_next_customer(0b011)
+        with pytest.raises(AssertionError):
+            q.insert_customer(visitor(9, 'mortgage'))
+
+    def test_routing(self):
+        """
+        `test_routing()`
+        Tests that customers only go to tellers who can help them, and that
+        specialists are used before generalists
+        """
+        assert staff_skills(STAFF) == ('loan', 'deposit', 'withdrawal')
+        bank = SkillBank(STAFF)
+        bank.open()
+        assert [sorted(t.skills) for t in bank.tellers] == [
+            ['loan'], ['deposit', 'withdrawal'], ['deposit', 'withdrawal'],
+            ['deposit', 'loan', 'withdrawal']]
+        
+        # [ case : the loan officer takes the first loan, the generalist the next ]
+        for i, p in enumerate(['loan', 'loan', 'loan']):
+            bank.receive_customer(visitor(i, p))
+        served = []
+        while bank.can_serve():
+            served.append(bank.serve_next()[0].employee_id)
+        assert served == [0, 3]
+        assert len(bank.customers) == 1
+        
+        # [ case : a deposit can still be served while a loan waits ]
+        bank.receive_customer(visitor(3, 'deposit'))
+        assert bank.can_serve()
+        assert bank.serve_next()[0].employee_id == 1
+        assert not bank.can_serve()
+        
+        bank.tick(1)
+        bank.update()
+        
+        # [ case : the waiting loan goes to the loan officer once they are free ]
+        teller, cust = bank.serve_next()
+        assert (teller.employee_id, cust.customer_id) == (0, 2)
+        assert sorted(bank.free) == [1, 2, 3]
+
+    def test_matches_scan(self):
+        """
+        `test_matches_scan()`
+        Tests the pooled matching against scanning every teller and customer
+        """
+        rng = random.Random(2)
+        skills = ['s{}'.format(k) for k in range(10)]
+        staff = [(rng.randint(1, 4), rng.sample(skills, rng.randint(1, 4))) for _ in range(15)]
+        staff.append((1, skills))
+        bank = SkillBank(staff)
+        bank.open()
+        
+        for step in range(3000):
+            if rng.random() < 0.6:
+                bank.receive_customer(visitor(step, rng.choice(skills), rng.random() * 3))
+            bank.tick(0.1)
+            bank.update()
+            waiting = list(bank.customers)
+            idle = [t for t in bank.tellers if t.is_available()]
+            expected = any(t.can_help(c.visit_purpose) for t in idle for c in waiting)
+            assert bank.can_serve() == expected
+            while bank.can_serve():
+                first = min(c.arrived_at for c in bank.customers
+                    if any(t.can_help(c.visit_purpose) for t in bank.tellers if t.is_available()))
+                teller, cust = bank.serve_next()
+                assert teller.can_help(cust.visit_purpose)
+                assert cust.arrived_at == first
+
+    def test_simulation(self):
+        """
+        `test_simulation()`
+        Tests full runs: tellers who can help with everything behave like an
+        ordinary bank, and everyone is served by a teller who can help them
+        """
+        mix = [('deposit', 5), ('withdrawal', 4), ('loan', 1)]
+        plain = Scenario(5000, 4, arrival_rate=3.2, service_rate=1.0, purpose_mix=mix)
+        everyone = plain.replace(staff=[(4, ['deposit', 'withdrawal', 'loan'])])
+        assert everyone.run(6, record_waits=True).waits == plain.run(6, record_waits=True).waits
+        
+        sim = plain.replace(staff=STAFF).run(6)
+        assert sim.served == 5000
+        
+        with pytest.raises(AssertionError):
+            plain.replace(staff=[(4, ['deposit', 'withdrawal'])])
+        with pytest.raises(AssertionError):
+            plain.replace(staff=[(3, ['deposit', 'withdrawal', 'loan'])])
+        with pytest.raises(AssertionError):
+            SkillBank(STAFF).set_tellers(5)
+
+    def test_set_tellers(self):
+        """
+        `test_set_tellers()`
+        Tests changing the staff of each skill group: busy tellers taken off
+        duty finish their customer, and groups that grow bring back their own
+        tellers before hiring
+        """
+        bank = SkillBank(STAFF)
+        bank.open()
+        for i, p in enumerate(['loan', 'deposit']):
+            bank.receive_customer(visitor(i, p, service_time=2))
+            bank.serve_next()
+        assert sorted(bank.free) == [2, 3]
+        
+        # [ case : idle tellers leave at once, busy ones after their customer ]
+        bank.set_tellers([0, 0, 1])
+        assert bank.on_duty == [False, False, False, True]
+        assert sorted(bank.free) == [3]
+        assert bank.utilization() == 2 / 3
+        bank.receive_customer(visitor(2, 'deposit'))
+        assert bank.serve_next()[0].employee_id == 3
+        bank.tick(2)
+        bank.update()
+        assert sorted(bank.free) == [3]
+        assert bank.utilization() == 0
+        
+        # [ case : a loan can only go to the generalist now ]
+        bank.receive_customer(visitor(3, 'loan'))
+        assert bank.serve_next()[0].employee_id == 3
+        bank.tick(1)
+        bank.update()
+        
+        # [ case : groups bring back their own tellers, then hire new ones ]
+        bank.set_tellers([1, 3, 1])
+        assert len(bank.tellers) == 5
+        assert sorted(bank.free) == [0, 1, 2, 3, 4]
+        assert bank.tellers[4].skills == bank.tellers[1].skills
+        cs = [visitor(i, 'withdrawal') for i in range(4, 8)]
+        for c in cs:
+            bank.receive_customer(c)
+        assert [bank.serve_next()[0].employee_id for _ in cs] == [1, 2, 4, 3]
+        assert not bank.can_serve()
+        
+        # [ case : a teller brought back mid-service is freed once, when done ]
+        bank.set_tellers([1, 0, 1])
+        bank.set_tellers([1, 1, 1])
+        bank.tick(1)
+        bank.update()
+        assert sorted(bank.free) == [0, 1, 3]
+        
+        with pytest.raises(AssertionError):
+            bank.set_tellers([0, 0, 0])
+        
+        # [ case : the generalist alone cannot go, or nobody could take loans ]
+        bank.set_tellers([0, 1, 1])
+        with pytest.raises(AssertionError):
+            bank.set_tellers([0, 2, 0])
+        assert bank.on_duty[3]
+        with pytest.raises(AssertionError):
+            bank.set_tellers([1, 1])
+        
+        # [ case : a what-if branch can restaff a skill-based run ]
+        mix = [('deposit', 5), ('withdrawal', 4), ('loan', 1)]
+        scenario = Scenario(3000, 4, arrival_rate=3.6, service_rate=1.0,
+            purpose_mix=mix, staff=STAFF)
+        sim = scenario.build(6).run(until=300)
+        more = branch(sim, n_tellers=[1, 4, 1]).run()
+        assert more.served == 3000 and len(more.bank.tellers) == 6
+        assert more.average_wait_time() < branch(sim).run().average_wait_time()
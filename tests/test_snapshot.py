@@ -0,0 +1,96 @@
+"""
+`test_snapshot.py`
+Tests pausing, saving and restoring simulations
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import pickle
+import random
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim import arrivals
+from banksim.scenario import Scenario
+from banksim.snapshot import snapshot, restore, save, load
+from banksim.streaming import WaitStats
+
+SCENARIOS = [
+    Scenario(2000, 3, arrival_rate=2.8, service_rate=1),
+    Scenario(2000, 2, arrival_process='batch', arrival_rate=0.6, batch_size=3,
+        service_rate=1, discipline='sjf'),
+    Scenario(2000, 2, arrival_process='nhpp', rate_schedule=[(0, 1), (200, 2.5)],
+        service_rate=1, purpose_mix=[('deposit', 3), ('loan', 1)]),
+    Scenario(500, 2, discipline='lifo'),
+]
+
+class TestSnapshot:
+
+    def test_pause(self):
+        """
+        `test_pause()`
+        Tests that pausing and resuming does not change a run
+        """
+        full = SCENARIOS[0].run(1, record_waits=True)
+        sim = SCENARIOS[0].build(1, record_waits=True)
+        for until in [0, 10, 10, 250.5]:
+            sim.run(until=until)
+            assert sim.bank.clock <= until
+            assert not sim.is_finished()
+        assert sim.run().is_finished()
+        assert sim.waits == full.waits
+
+    def test_restore(self):
+        """
+        `test_restore()`
+        Tests that a restored simulation finishes bit-identically to one that
+        was never interrupted
+        """
+        for scenario in SCENARIOS:
+            full = scenario.run(7, record_waits=True, wait_stats=WaitStats())
+            sim = scenario.build(7, record_waits=True, wait_stats=WaitStats())
+            data = snapshot(sim.run(until=100))
+            
+            resumed = restore(data).run()
+            assert resumed.waits == full.waits
+            assert resumed.wait_time == full.wait_time
+            assert resumed.last_service == full.last_service
+            assert resumed.wait_stats.metrics() == full.wait_stats.metrics()
+            
+            # [ case : the snapshot is not affected by running the original on ]
+            sim.run()
+            assert restore(data).run().waits == full.waits
+
+    def test_size(self):
+        """
+        `test_size()`
+        Tests that a snapshot grows with the live state, not the history
+        """
+        scenario = Scenario(10 ** 5, 4, arrival_rate=3, service_rate=1)
+        early = snapshot(scenario.build(1).run(until=100))
+        late = snapshot(scenario.build(1).run(until=20000))
+        assert len(late) < 2 * len(early)
+
+    def test_file(self, tmp_path):
+        """
+        `test_file()`
+        Tests saving to and loading from a file
+        """
+        path = str(tmp_path / 'run.snap')
+        full = SCENARIOS[1].run(3)
+        save(SCENARIOS[1].build(3).run(until=50), path)
+        assert load(path).run().wait_time == full.wait_time
+
+    def test_arrival_process(self):
+        """
+        `test_arrival_process()`
+        Tests that arrival processes pickle part way through
+        """
+        times = arrivals.batches(1.0, 3, random.Random(2), n=30)
+        head = [next(times) for _ in range(10)]
+        copy = pickle.loads(pickle.dumps(times))
+        assert head + list(copy) == list(arrivals.batches(1.0, 3, random.Random(2), n=30))
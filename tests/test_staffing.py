@@ -0,0 +1,95 @@
+"""
+`test_staffing.py`
+Tests the staffing optimizer
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from itertools import product
+
+from banksim.scenario import Scenario
+from banksim.staffing import (ScheduleOptimizer, StaffingOptimizer,
+    hourly_shifts, quantile, wait_metrics)
+
+class TestStaffing:
+
+    def test_quantile(self):
+        """
+        `test_quantile()`
+        Tests interpolated quantiles of sorted values
+        """
+        assert quantile([1], 0.5) == 1
+        assert quantile([0, 10], 0.5) == 5
+        assert quantile(list(range(101)), 0.95) == 95
+        
+        m = wait_metrics([3, 1, 2])
+        assert m['mean'] == 2 and m['p50'] == 2 and m['max'] == 3
+    
+    def test_minimum_tellers(self):
+        """
+        `test_minimum_tellers()`
+        Tests the search against an exhaustive sweep of the README scenario
+        """
+        opt = StaffingOptimizer(Scenario(100))
+        sweep = {n: opt.evaluate(n)['mean'] for n in range(1, 12)}
+        for limit in [0, 1, 5, 20, 45, 100]:
+            expected = min(n for n, w in sweep.items() if w <= limit)
+            fresh = StaffingOptimizer(Scenario(100))
+            assert fresh.minimum_tellers(limit) == expected
+            # doubling then bisecting only looks at a few counts
+            assert len(fresh.evaluations) <= 8
+    
+    def test_memoized(self):
+        """
+        `test_memoized()`
+        Tests that queries with different targets reuse earlier simulations
+        """
+        opt = StaffingOptimizer(Scenario(300, arrival_rate=5, service_rate=1), replications=2)
+        n = opt.minimum_tellers(1.0, 'p95')
+        assert opt.meets(n, 1.0, 'p95')
+        assert not opt.meets(n - 1, 1.0, 'p95')
+        
+        seen = dict(opt.evaluations)
+        opt.minimum_tellers(1.0, 'mean')
+        for k, v in seen.items():
+            assert opt.evaluations[k] is v
+    
+    def test_hourly_shifts(self):
+        """
+        `test_hourly_shifts()`
+        Tests that only the hours that change the headcount become shifts
+        """
+        assert hourly_shifts([3]) == (3, None)
+        assert hourly_shifts([3, 3, 5, 2, 2], period=10) == (3, [(20, 5), (30, 2)])
+    
+    def test_schedule_optimizer(self):
+        """
+        `test_schedule_optimizer()`
+        Tests the schedule search against trying every schedule, and that
+        dominated schedules are answered without simulating them
+        """
+        s = Scenario(400, 1, arrival_process='nhpp',
+            rate_schedule=[(0, 2), (20, 5), (40, 1)], service_rate=1)
+        every = list(product(range(1, 8), repeat=3))
+        waits = ScheduleOptimizer(s, 3, 7, period=20).evaluate(every)
+        
+        for limit in [0.3, 0.6]:
+            o = ScheduleOptimizer(s, 3, 7, period=20, salary='19200.00')
+            best, cost = o.optimize(limit)
+            cheapest = min(sum(c) for c in every
+                if all(hour['mean'] <= limit for hour in waits[c]))
+            assert sum(best) == cheapest
+            assert cost == 20.0 * cheapest
+            assert all(hour['mean'] <= limit for hour in o.evaluations[best])
+            assert o.pruned > 0
+            assert len(o.evaluations) < 20
+        
+        # [ case : the target cannot be met ]
+        assert ScheduleOptimizer(s, 3, 1, period=20).optimize(0.1) is None
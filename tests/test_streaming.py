@@ -0,0 +1,109 @@
+"""
+`test_streaming.py`
+Tests the constant-memory wait time statistics
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import random
+import statistics
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.scenario import Scenario
+from banksim.staffing import wait_metrics
+from banksim.streaming import (RunningMoments, P2Quantile, Histogram, WaitStats,
+    PeriodWaits)
+
+class TestStreaming:
+
+    def test_running_moments(self):
+        """
+        `test_running_moments()`
+        Tests Welford's mean and variance against the statistics module
+        """
+        rng = random.Random(1)
+        xs = [1e9 + rng.random() for _ in range(1000)]
+        m = RunningMoments()
+        for x in xs:
+            m.add(x)
+        assert m.n == 1000
+        assert m.mean == pytest.approx(statistics.mean(xs))
+        assert m.variance() == pytest.approx(statistics.variance(xs), rel=1e-6)
+        assert m.max == max(xs) and m.min == min(xs)
+        
+        assert RunningMoments().variance() == 0
+
+    def test_p2_quantile(self):
+        """
+        `test_p2_quantile()`
+        Tests the P-square estimates: exact for a handful of values and close
+        for a long stream
+        """
+        with pytest.raises(AssertionError):
+            P2Quantile(1.5)
+        
+        sketch = P2Quantile(0.5)
+        assert sketch.value() == 0
+        for x in [5, 1, 3]:
+            sketch.add(x)
+        assert sketch.value() == 3
+        
+        rng = random.Random(2)
+        xs = [rng.expovariate(1) for _ in range(50000)]
+        for p in [0.5, 0.95, 0.99]:
+            sketch = P2Quantile(p)
+            for x in xs:
+                sketch.add(x)
+            exact = sorted(xs)[int(p * len(xs))]
+            assert sketch.value() == pytest.approx(exact, rel=0.05)
+
+    def test_histogram(self):
+        """
+        `test_histogram()`
+        Tests binning, including values past the last bin
+        """
+        h = Histogram(width=2, bins=3)
+        for x in [0, 1.5, 2, 5, 100]:
+            h.add(x)
+        assert h.counts == [2, 1, 2]
+        assert h.edges() == [0, 2, 4]
+
+    def test_wait_stats(self):
+        """
+        `test_wait_stats()`
+        Tests that streaming metrics agree with the exact ones from a run
+        """
+        sim = Scenario(5000, 4, arrival_rate=3.8, service_rate=1).run(
+            3, record_waits=True, wait_stats=WaitStats())
+        exact = wait_metrics(sim.waits)
+        approx = sim.wait_stats.metrics()
+        
+        assert sim.wait_stats.n == 5000
+        assert approx['mean'] == pytest.approx(exact['mean'])
+        assert approx['max'] == exact['max']
+        for key in ['p50', 'p90', 'p95', 'p99']:
+            assert approx[key] == pytest.approx(exact[key], rel=0.15)
+        assert sum(sim.wait_stats.histogram.counts) == 5000
+    
+    def test_period_waits(self):
+        """
+        `test_period_waits()`
+        Tests that waits are split by the period customers arrived in
+        """
+        w = PeriodWaits(60)
+        w.add(0, 1)
+        w.add(59.9, 3)
+        w.add(150, 5)
+        m = w.metrics()
+        assert [p['n'] for p in m] == [2, 0, 1]
+        assert m[0]['mean'] == 2 and m[2]['max'] == 5
+        
+        # [ case : the last period takes every later arrival ]
+        w = PeriodWaits(60, n_periods=2)
+        w.add(500, 4)
+        assert [p['n'] for p in w.metrics()] == [0, 1]
@@ -0,0 +1,79 @@
+"""
+`test_streams.py`
+Tests the random streams used for variance reduction
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import pickle
+import statistics
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.scenario import Scenario
+from banksim.streams import Antithetic, Substream, CustomerStreams, generator
+
+class TestStreams:
+
+    def test_substream(self):
+        """
+        `test_substream()`
+        Tests that substreams are uniform, repeatable per customer and
+        independent between customers
+        """
+        s = Substream(7, 1)
+        s.select(3)
+        first = [s.random() for _ in range(5)]
+        s.select(3)
+        assert [s.random() for _ in range(5)] == first
+        s.select(4)
+        assert s.random() not in first
+        assert Substream(7, 2).random() != Substream(7, 1).random()
+        
+        s.select(0)
+        us = [s.random() for _ in range(20000)]
+        assert all(0 <= u < 1 for u in us)
+        assert statistics.mean(us) == pytest.approx(0.5, abs=0.01)
+        assert statistics.mean(s.expovariate(2) for _ in range(20000)) == pytest.approx(0.5, rel=0.03)
+        
+        copy = pickle.loads(pickle.dumps(s))
+        assert copy.random() == s.random()
+
+    def test_antithetic(self):
+        """
+        `test_antithetic()`
+        Tests that antithetic generators mirror their uniforms
+        """
+        a, b = generator(5), Antithetic(5)
+        for _ in range(100):
+            assert a.random() + b.random() == pytest.approx(1)
+        
+        s, t = Substream(1, 1), Substream(1, 1, antithetic=True)
+        for _ in range(100):
+            assert s.random() + t.random() == pytest.approx(1)
+
+    def test_common_random_numbers(self):
+        """
+        `test_common_random_numbers()`
+        Tests that customers keep their service times when arrivals change,
+        even when the arrival process makes a varying number of draws
+        """
+        def service_times(scenario):
+            return [c.service_time for _, c in scenario.arrivals(generator(9, crn=True))]
+        
+        base = Scenario(500, arrival_process='nhpp', rate_schedule=[(0, 1), (50, 3)],
+            service_rate=1)
+        busier = base.replace(rate_schedule=[(0, 2), (50, 5)])
+        assert service_times(base) == service_times(busier)
+        
+        # [ case : a shared generator loses step as soon as thinning differs ]
+        shared = lambda sc: [c.service_time for _, c in sc.arrivals(generator(9))]
+        assert shared(base) != shared(busier)
+        
+        assert isinstance(generator(1, crn=True), CustomerStreams)
+        sim = base.run(9, crn=True)
+        assert sim.served == 500
@@ -0,0 +1,125 @@
+"""
+`test_trace.py`
+Tests the binary event trace writer and its memory-mapped reader
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim.bank import Bank
+from banksim.scenario import Scenario
+from banksim import trace as tr
+from main import run_ticks
+
+np = pytest.importorskip('numpy')
+
+class TestTrace:
+
+    def test_round_trip(self, tmp_path):
+        """
+        `test_round_trip()`
+        Tests that records read back as written, including past the
+        preallocated capacity
+        """
+        path = str(tmp_path / 'run.trc')
+        with tr.TraceWriter(path, capacity=2) as w:
+            for i in range(5):
+                w.write(tr.SERVICE, i / 2, i, i % 2)
+            assert w.capacity == 8
+        
+        assert os.path.getsize(path) == tr.HEADER.size + 5 * tr.RECORD.size
+        t = tr.read_trace(path)
+        assert isinstance(t, np.memmap)
+        assert list(t['time']) == [0, 0.5, 1, 1.5, 2]
+        assert list(t['customer']) == [0, 1, 2, 3, 4]
+        assert list(t['teller']) == [0, 1, 0, 1, 0]
+        assert (t['kind'] == tr.SERVICE).all()
+        
+        with tr.TraceWriter(path):
+            pass
+        assert len(tr.read_trace(path)) == 0
+        
+        with open(path, 'wb') as f:
+            f.write(b'not a trace' * 4)
+        with pytest.raises(ValueError):
+            tr.read_trace(path)
+
+    def test_simulation(self, tmp_path):
+        """
+        `test_simulation()`
+        Tests that the engine logs one arrival, service and departure per
+        customer, agreeing with its own wait accounting
+        """
+        path = str(tmp_path / 'run.trc')
+        with tr.TraceWriter(path) as w:
+            sim = Scenario(500, 2, arrival_rate=1.8, service_rate=1).run(1, trace=w)
+        t = tr.read_trace(path)
+        
+        arrivals = np.sort(t[t['kind'] == tr.ARRIVAL], order='customer')
+        services = np.sort(t[t['kind'] == tr.SERVICE], order='customer')
+        departures = t[t['kind'] == tr.DEPARTURE]
+        assert len(arrivals) == len(services) == len(departures) == 500
+        assert set(services['teller']) == {0, 1}
+        assert (services['time'] - arrivals['time']).sum() == pytest.approx(sim.wait_time)
+        assert departures['time'].max() >= sim.last_service
+
+    def test_run_ticks(self, tmp_path):
+        """
+        `test_run_ticks()`
+        Tests that the tick loop logs the same kinds of records
+        """
+        path = str(tmp_path / 'run.trc')
+        bank = Bank(1)
+        bank.open()
+        with tr.TraceWriter(path) as w:
+            _, wait_time = run_ticks(bank, Scenario(20).arrivals(None), trace=w)
+        t = tr.read_trace(path)
+        services = t[t['kind'] == tr.SERVICE]
+        arrivals = t[t['kind'] == tr.ARRIVAL]
+        assert (services['time'] - arrivals['time']).sum() == wait_time
+    
+    def test_preemption(self, tmp_path):
+        """
+        `test_preemption()`
+        Tests that interrupted services are logged as they happen: a
+        preemption ends each interrupted stint, a service starts each resumed
+        one and one departure ends each customer's last
+        """
+        path = str(tmp_path / 'run.trc')
+        scenario = Scenario(2000, 2, arrival_rate=1.8, service_rate=1.0,
+            purpose_mix=[('business', 1), ('other', 3)],
+            classes=[['business'], ['other']], preemptive=True)
+        with tr.TraceWriter(path) as w:
+            sim = scenario.run(2, trace=w)
+        t = tr.read_trace(path)
+        preempted = sum(sim.bank.preempted)
+        assert preempted > 0
+        
+        kinds = t['kind']
+        assert (kinds == tr.PREEMPTED).sum() == preempted
+        assert (kinds == tr.SERVICE).sum() == 2000 + preempted
+        assert (kinds == tr.DEPARTURE).sum() == 2000
+        assert t['time'][kinds == tr.DEPARTURE].max() == sim.bank.clock
+        
+        # [ case : each stint is a service followed by its end, and no teller
+        # serves two customers at once ]
+        stints = {}
+        open_at = {}
+        for time, cust, teller, kind in t.tolist():
+            if kind == tr.SERVICE:
+                assert cust not in open_at
+                open_at[cust] = (time, teller)
+            elif kind in (tr.PREEMPTED, tr.DEPARTURE):
+                start, by = open_at.pop(cust)
+                assert by == teller and start <= time
+                stints.setdefault(teller, []).append((start, time))
+        assert not open_at
+        for spans in stints.values():
+            spans.sort()
+            assert all(a[1] <= b[0] for a, b in zip(spans, spans[1:]))
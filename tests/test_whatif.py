@@ -0,0 +1,102 @@
+"""
+`test_whatif.py`
+Tests branching what-if runs from a shared prefix
+
+Written by Joshua Paul A. Chan
+"""
+
+import pytest
+import sys, os
+import random
+
+# Fix paths (thanks, @aruisdante)
+# [http://stackoverflow.com/questions/24868733/how-to-access-a-module-from-outside-your-file-folder-in-python]
+sys.path.append(os.path.abspath(os.path.join('.')))
+
+from banksim import arrivals
+from banksim.scenario import Scenario
+from banksim.whatif import branch, what_if
+
+SCENARIO = Scenario(3000, 3, arrival_rate=2.8, service_rate=1)
+
+class TestWhatIf:
+
+    def test_unchanged_branch(self):
+        """
+        `test_unchanged_branch()`
+        Tests that a branch without changes finishes like an unbranched run,
+        and that branching leaves the original alone
+        """
+        full = SCENARIO.run(5, record_waits=True)
+        sim = SCENARIO.build(5, record_waits=True).run(until=300)
+        copy = branch(sim).run()
+        assert copy.waits == full.waits
+        assert sim.run().waits == full.waits
+
+    def test_changes(self):
+        """
+        `test_changes()`
+        Tests that each kind of change takes effect after the split only
+        """
+        results = what_if(SCENARIO, 300, {
+            'as is': {},
+            'more': {'n_tellers': 5},
+            'fewer': {'n_tellers': 2},
+            'quieter': {'arrival_rate': 1.5},
+            'lifo': {'discipline': 'lifo'},
+        }, seed=5, record_waits=True)
+        base = results['as is']
+        
+        # [ case : everyone served before the split waited the same ]
+        prefix = SCENARIO.build(5).run(until=300).served
+        assert prefix > 100
+        for sim in results.values():
+            assert sim.served == 3000
+            assert sim.waits[:prefix] == base.waits[:prefix]
+        
+        assert results['more'].average_wait_time() < base.average_wait_time()
+        assert results['fewer'].average_wait_time() > base.average_wait_time()
+        assert results['quieter'].average_wait_time() < base.average_wait_time()
+        assert results['quieter'].last_service > base.last_service
+        assert len(results['more'].bank.tellers) == 5
+        assert results['lifo'].bank.customers.discipline == 'lifo'
+
+    def test_workers(self):
+        """
+        `test_workers()`
+        Tests that branches give the same results in worker processes
+        """
+        branches = {'a': {'n_tellers': 4}, 'b': {'arrival_rate': 2}}
+        here = what_if(SCENARIO, 100, branches, seed=2)
+        there = what_if(SCENARIO, 100, branches, seed=2, workers=2)
+        for name in branches:
+            assert here[name].wait_time == there[name].wait_time
+
+    def test_set_rate(self):
+        """
+        `test_set_rate()`
+        Tests that every arrival process keeps its shape across a rate change
+        """
+        times = arrivals.constant(1.0, n=6)
+        head = [next(times) for _ in range(3)]
+        times.set_rate(2.0)
+        assert head + list(times) == [0, 1, 2, 2.5, 3, 3.5]
+        
+        # [ case : a wave carries on from the next tick, on whole ticks ]
+        times = arrivals.square_wave(9, 3)
+        head = [next(times) for _ in range(4)]
+        times.set_rate(2)
+        assert head + list(times) == [0, 0, 0, 1, 2, 2, 3, 3, 4]
+        times = arrivals.square_wave(6, 2)
+        head = [next(times) for _ in range(3)]
+        times.set_rate(0.5)
+        assert head + list(times) == [0, 0, 0, 2, 4, 6]
+        
+        # [ case : an nhpp schedule is scaled so its peak is the new rate ]
+        rate = arrivals.PiecewiseRate([(0, 1), (10, 4)])
+        times = arrivals.nonhomogeneous_poisson(rate, 4, random.Random(1), n=10)
+        next(times)
+        times.set_rate(2)
+        assert times.rate.schedule == ((0, 0.5), (10, 2))
+        assert times.max_rate == 2
+        assert len(list(times)) == 9